@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Offline benchmark suite for xmlasdict
+
+Times parsing, navigation, unwrapping and serialization on synthetic documents of controlled width, depth,
+attribute density and mixed content. Peak memory, and the memory retained by the result, is measured
+(in a separate run) with tracemalloc. The *_frozen benchmarks repeat some of these on frozen documents,
+a summary compares the memory these retain with that of the regular ElementTree-backed ones.
+Results are saved as json so runs can be compared with --compare.
+
+    $ python benchmarks/bench.py --output bench.json
+    $ python benchmarks/bench.py --quick --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import xmlasdict  # noqa: E402 -- benchmark the working copy rather than some installed version
+from xmlasdict import parse  # noqa: E402
+
+
+# name -> shape of the synthetic document
+#   width: number of child elements per element, depth: number of nested levels below the root,
+#   attrs: number of attributes per element, tags: number of distinct tag-names used per level (so tags repeat),
+#   mixed: add text (with tails) around the elements
+DOCUMENTS = dict(
+    wide=dict(width=20000, depth=1, attrs=2, tags=5, mixed=False),
+    deep=dict(width=3, depth=9, attrs=1, tags=2, mixed=False),
+    chain=dict(width=1, depth=900, attrs=1, tags=1, mixed=False),
+    balanced=dict(width=10, depth=4, attrs=2, tags=3, mixed=False),
+    attributes=dict(width=100, depth=2, attrs=20, tags=3, mixed=False),
+    mixed=dict(width=10, depth=4, attrs=1, tags=3, mixed=True),
+)
+QUICK_SCALE = dict(wide=dict(width=2000), deep=dict(depth=6), chain=dict(depth=300), balanced=dict(width=6),
+                   attributes=dict(width=30), mixed=dict(width=6))
+
+
+def synthetic_xml(width: int, depth: int, attrs: int = 0, tags: int = 1, mixed: bool = False):
+    """ Generates an xml document of the given shape
+    """
+    parts = []
+
+    def element(level: int, index: int):
+        tag = f"t{index % tags}"
+        attributes = ''.join(f' a{a}="v{index}-{a}"' for a in range(attrs))
+        parts.append(f"<{tag}{attributes}>")
+        if level == depth:
+            parts.append(f"value {index}")
+        else:
+            for i in range(width):
+                if mixed:
+                    parts.append(f" text {i} ")
+                element(level + 1, i)
+        parts.append(f"</{tag}>")
+    parts.append("<root>")
+    for i in range(width):
+        element(1, i)
+    parts.append("</root>")
+    return ''.join(parts)
+
+
+def walk(xdict):
+    """ navigates the whole document through the wrapper accessors
+    """
+    count = 0
+    todo = [xdict]
+    while todo:
+        wrapper = todo.pop()
+        for key in wrapper:
+            value = wrapper[key]
+            count += 1
+            if isinstance(value, xmlasdict.IterWrapper):
+                todo.extend(value)
+            elif isinstance(value, xmlasdict.Wrapper):
+                todo.append(value)
+    return count
+
+
+def records(xdict):
+    """ the first level elements (of every tag) to run the per-record benchmarks on
+    """
+    return list(xdict['*[]'])
+
+
+# name -> (setup(xml), run(prepared)) where setup prepares what is passed to run
+BENCHMARKS = dict(
+    parse=(lambda xml: xml, parse),
+    child_access=(lambda xml: records(parse(xml)), lambda recs: [c.tag for r in recs for c in r['*[]']]),
+    getattr=(lambda xml: parse(xml), lambda xdict: [len(getattr(xdict, tag)) for tag in xdict if tag[0] != '@']),
+    attribute_access=(lambda xml: records(parse(xml)), lambda recs: [r[k] for r in recs for k in r if k[0] == '@']),
+    keys=(lambda xml: records(parse(xml)), lambda recs: [r.keys() for r in recs]),
+    walk=(lambda xml: parse(xml), walk),
+    unpack=(lambda xml: parse(f"<a><b>{xml}</b></a>"), lambda xdict: xdict.unpack()),
+    unwrap=(lambda xml: parse(xml), lambda xdict: xdict.unwrap()),
+    str=(lambda xml: parse(xml), str),
+    dumps=(lambda xml: parse(xml), lambda xdict: xdict.dumps()),
+    parse_frozen=(lambda xml: xml, partial(parse, frozen=True)),
+    child_access_frozen=(lambda xml: records(parse(xml, frozen=True)), lambda recs: [c.tag for r in recs for c in r['*[]']]),
+    walk_frozen=(lambda xml: parse(xml, frozen=True), walk),
+    unwrap_frozen=(lambda xml: parse(xml, frozen=True), lambda xdict: xdict.unwrap()),
+    dumps_frozen=(lambda xml: parse(xml, frozen=True), lambda xdict: xdict.dumps()),
+    deep_search=(lambda xml: records(parse(xml)), lambda recs: [len(r['.//t0[]']) for r in recs]),
+    deep_search_frozen=(lambda xml: records(parse(xml, frozen=True)), lambda recs: [len(r['.//t0[]']) for r in recs]),
+    deep_search_root=(lambda xml: parse(xml), lambda xdict: [len(xdict['.//t1[]']) for _ in range(10)]),
+    deep_search_root_frozen=(lambda xml: parse(xml, frozen=True), lambda xdict: [len(xdict['.//t1[]']) for _ in range(10)]),
+)
+
+
+def measure(setup, run, xml, repeat: int):
+    """ returns the timings (best and median, in seconds), the peak memory and the memory retained by the result (bytes)
+    of run(setup(xml))
+    """
+    timings = []
+    for _ in range(repeat):
+        prepared = setup(xml)
+        start = time.perf_counter()
+        run(prepared)
+        timings.append(time.perf_counter() - start)
+    prepared = setup(xml)
+    tracemalloc.start()
+    try:
+        result = run(prepared)
+        retained, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return dict(best=min(timings), median=statistics.median(timings), peak_memory=peak, retained_memory=retained)
+
+
+def run_suite(documents: dict, benchmarks: dict, repeat: int, select: list = None):
+    results = []
+    for doc_name, shape in documents.items():
+        xml = synthetic_xml(**shape)
+        for bench_name, (setup, run) in benchmarks.items():
+            if select and bench_name not in select and doc_name not in select:
+                continue
+            result = dict(document=doc_name, benchmark=bench_name, size=len(xml), **measure(setup, run, xml, repeat))
+            results.append(result)
+            print(f"{doc_name:12} {bench_name:20} best {result['best'] * 1000:10.3f} ms   "
+                  f"median {result['median'] * 1000:10.3f} ms   peak {result['peak_memory'] / 1024:10.1f} KiB   "
+                  f"retained {result['retained_memory'] / 1024:10.1f} KiB")
+    return results
+
+
+def frozen_summary(results: list):
+    """ prints the memory retained by the parsed frozen documents compared to the ElementTree-backed ones
+    """
+    parsed = {(r['document'], r['benchmark']): r for r in results if r['benchmark'] in ('parse', 'parse_frozen')}
+    documents = [doc for doc, bench in parsed if bench == 'parse' and (doc, 'parse_frozen') in parsed]
+    if len(documents) == 0:
+        return
+    print("\nmemory retained by frozen documents (ratio < 1 is a reduction)")
+    for doc in documents:
+        regular, frozen = parsed[(doc, 'parse')], parsed[(doc, 'parse_frozen')]
+        ratio = frozen['retained_memory'] / regular['retained_memory'] if regular['retained_memory'] else float('nan')
+        print(f"{doc:12} etree {regular['retained_memory'] / 1024:10.1f} KiB   "
+              f"frozen {frozen['retained_memory'] / 1024:10.1f} KiB   x{ratio:6.2f}")
+
+
+def compare(results: list, baseline: dict):
+    """ prints the ratio of the best timings and peak memory against those of a baseline run
+    """
+    base = {(r['document'], r['benchmark']): r for r in baseline['results']}
+    print(f"\ncompared to {baseline['meta']['timestamp']} (ratio < 1 is an improvement)")
+    for result in results:
+        other = base.get((result['document'], result['benchmark']))
+        if other is None or other['size'] != result['size']:
+            continue
+        time_ratio = result['best'] / other['best'] if other['best'] else float('nan')
+        memory_ratio = result['peak_memory'] / other['peak_memory'] if other['peak_memory'] else float('nan')
+        print(f"{result['document']:12} {result['benchmark']:20} time x{time_ratio:6.2f}   memory x{memory_ratio:6.2f}")
+
+
+def get_arg_parser():
+    parser = argparse.ArgumentParser(description='benchmarks for xmlasdict on synthetic documents')
+    parser.add_argument('-o', '--output', type=str, help='json file to save the results in')
+    parser.add_argument('-c', '--compare', type=str, help='json file with earlier results to compare with')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='number of timed runs per benchmark')
+    parser.add_argument('-q', '--quick', action='store_true', help='use smaller documents')
+    parser.add_argument('select', nargs='*', help='only run these benchmarks and/or documents')
+    return parser
+
+
+def main():
+    args = get_arg_parser().parse_args()
+    documents = {name: dict(shape, **(QUICK_SCALE[name] if args.quick else {})) for name, shape in DOCUMENTS.items()}
+    results = run_suite(documents, BENCHMARKS, args.repeat, args.select)
+    frozen_summary(results)
+    report = dict(
+        meta=dict(
+            timestamp=datetime.now().isoformat(), xmlasdict=xmlasdict.__version__, python=platform.python_version(),
+            platform=platform.platform(), repeat=args.repeat, quick=args.quick, documents=documents,
+        ),
+        results=results,
+    )
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"\nresults saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
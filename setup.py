@@ -146,7 +146,7 @@ setup(
          'console_scripts': CONSOLE_SCRIPTS,
     },
     install_requires=requirements,
-    extras_require={'dev': requirements_dev},
+    extras_require={'dev': requirements_dev, 'lxml': ['lxml'], 'numpy': ['numpy'], 'pandas': ['pandas']},
     include_package_data=True,
     license=LICENSE,
     classifiers=TROVE_CLASSES,
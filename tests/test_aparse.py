@@ -0,0 +1,85 @@
+import asyncio
+from util4tests import run_single_test, BackendTestCase, skip_unless_backend
+
+from xmlasdict import aparse, Wrapper
+
+
+DOCUMENTS = b"""<?xml version="1.0" encoding="utf-8"?>
+<r><i n="1">one</i><i n="2"><x>two</x></i></r>
+<x:r xmlns:x="urn:x"><i>three</i><r>nested root-tag</r></x:r >
+<r/><r><i>four</i></r><!-- trailing comment -->
+"""
+
+
+def stream_of(*chunks):
+    """ a local stand-in for the network: an asyncio.StreamReader fed with the chunks """
+    reader = asyncio.StreamReader()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    reader.feed_eof()
+    return reader
+
+
+class TestAParse(BackendTestCase):
+
+    def aparse(self, source, **kwargs):
+        """ collects the records from the source, a function returning the stream (as created within the event loop)
+        """
+        async def collect():
+            return [record async for record in aparse(source(), backend=self.backend, **kwargs)]
+        return asyncio.run(collect())
+
+    def test_records(self):
+        records = self.aparse(lambda: stream_of(b"<r><i n='1'>one</i>", b"<i n='2'><x>two</x></i><s>three</s></r>"))
+        assert all(isinstance(r, Wrapper) for r in records)
+        assert [r.tag for r in records] == ['i', 'i', 's']
+        assert records[1].unwrap() == {'@n': '2', 'x': 'two'}
+        assert [str(r.d) for r in self.aparse(lambda: stream_of(b"<r><row><d>1</d></row><h/><row><d>2</d></row></r>"),
+                                              record_tag='row')] == ['1', '2']
+
+    def test_multiple_documents(self):
+        expected = ['one', 'two', 'three', 'nested root-tag', 'four']
+        assert [r['#text'] for r in self.aparse(lambda: stream_of(DOCUMENTS))] == expected
+        for size in (1, 2, 3, 5, 8, 13):  # whatever way the content is split into chunks
+            chunks = [DOCUMENTS[start:start + size] for start in range(0, len(DOCUMENTS), size)]
+            assert [r['#text'] for r in self.aparse(lambda: stream_of(*chunks), chunk_size=size)] == expected, f"failed for {size}"
+
+    def test_async_iterable(self):
+        async def chunks():
+            for chunk in ("<r><i>1</i>", "<i>2</i></r>", "<r><i>3</i></r>"):
+                yield chunk
+        assert [str(r) for r in self.aparse(chunks)] == ['1', '2', '3']
+
+    def test_incomplete(self):
+        with self.assertRaises(SyntaxError):  # the ParseError of etree, or the XMLSyntaxError of lxml
+            self.aparse(lambda: stream_of(b"<r><i>1</i><i>2</"))
+        assert self.aparse(lambda: stream_of(b"  \n")) == []
+
+    def test_not_blocking(self):
+        xml = b"<r>" + b"".join(b"<i>%d</i>" % n for n in range(50000)) + b"</r>"
+        ticks = []
+
+        async def ticking():
+            while True:
+                ticks.append(len(ticks))
+                await asyncio.sleep(0)
+
+        async def parsing():
+            ticker = asyncio.ensure_future(ticking())
+            count = 0
+            async for _ in aparse(stream_of(xml), backend=self.backend, chunk_size=4096):
+                count += 1
+            ticker.cancel()
+            return count
+
+        assert asyncio.run(parsing()) == 50000
+        assert len(ticks) > len(xml) // 4096 // 2, "the event loop should get control in between the pieces"
+
+
+@skip_unless_backend('lxml')
+class TestAParseLxml(TestAParse):
+    backend = 'lxml'
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
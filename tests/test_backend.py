@@ -0,0 +1,51 @@
+import unittest
+import os
+from util4tests import run_single_test, skip_unless_backend
+
+from xmlasdict import parse
+from xmlasdict.backend import available_backends, backend_of, get_backend
+
+
+class TestBackend(unittest.TestCase):
+
+    def test_default(self):
+        assert 'etree' in available_backends()
+        xdict = parse("<r/>")
+        assert backend_of(xdict._node).name == 'etree'
+        with self.assertRaises(AssertionError):
+            get_backend('unknown')
+
+    def test_compile(self):
+        xdict = parse('<r xmlns:p="urn:p"><a>1</a><p:a>2</p:a><b><a>3</a></b><a>4</a></r>')
+        etree = backend_of(xdict._node)
+        for path in ('a', '{urn:p}a', 'b/a', './/a', 'a[2]', 'nothere', '*'):
+            assert etree.compile(path)(xdict._node) == xdict._node.findall(path), f"differs for {path}"
+
+    @skip_unless_backend('lxml')
+    def test_lxml(self):
+        xdict = parse("<r><!-- no comment --><?pi no pi?><a>a</a></r>", backend='lxml')
+        assert backend_of(xdict._node).name == 'lxml'
+        assert xdict.dumps() == "<r><a>a</a></r>", "comments and processing instructions are dropped like etree does"
+
+    @skip_unless_backend('lxml')
+    def test_same_results(self):
+        fitnessfile = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '02-fitness.xml')
+        etree_dict = parse(fitnessfile)
+        lxml_dict = parse(fitnessfile, backend='lxml')
+        assert lxml_dict.dumps() == etree_dict.dumps()
+        assert lxml_dict.unwrap() == etree_dict.unwrap()
+        for path in ['.//D_child1', './/D[D_child_source="BSFA"]/D_child1', './/F_child1[2]', './/*[@id]', '*/D/..']:
+            assert lxml_dict[path + '[]'].dumps() == etree_dict[path + '[]'].dumps(), f"different results for {path}"
+
+    @skip_unless_backend('lxml')
+    def test_namespaced_paths(self):
+        xml = '<r xmlns:p="urn:p"><p:a>1</p:a><a>2</a><b><p:a>3</p:a></b></r>'
+        for backend in available_backends():
+            xdict = parse(xml, backend=backend)
+            assert str(xdict['{urn:p}a']) == '1'
+            assert [str(a) for a in xdict['.//{urn:p}a']] == ['1', '3']
+            assert [str(a) for a in xdict['.//{*}a']] == ['1', '2', '3']
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
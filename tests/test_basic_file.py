@@ -1,15 +1,12 @@
-import unittest
 import os
-from util4tests import run_single_test
+from util4tests import run_single_test, BackendTestCase, skip_unless_backend
 
-from xmlasdict import parse
 
-
-class TestBasicFile(unittest.TestCase):
+class TestBasicFile(BackendTestCase):
 
     def test_basic_file(self):
         xmlinfile = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '01-basic.xml')
-        xdict = parse(xmlinfile)
+        xdict = self.parse(xmlinfile)
         assert f"{xdict.someabstract.para}" == 'This line contains something unusual'
         assert f"{xdict.someLicense.para}" == ''.join([
             'This work is licensed under a ',
@@ -22,5 +19,14 @@ class TestBasicFile(unittest.TestCase):
         assert f"{ct}" == 'Creative Commons Attribution (CC-BY) 4.0 License'
 
 
+@skip_unless_backend('lxml')
+class TestBasicFileLxml(TestBasicFile):
+    backend = 'lxml'
+
+
+class TestBasicFileFrozen(TestBasicFile):
+    frozen = True
+
+
 if __name__ == "__main__":
     run_single_test(__file__)
@@ -0,0 +1,60 @@
+import unittest
+import os
+import tempfile
+from util4tests import run_single_test
+
+from xmlasdict import parse_many, ParseResult
+
+
+INPUTS = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs')
+
+
+def root_tag(xdict):
+    return xdict.tag
+
+
+class TestParseMany(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.bad = os.path.join(self.tmpdir.name, 'bad.xml')
+        with open(self.bad, 'w') as badfile:
+            badfile.write("<unclosed>")
+        self.paths = [os.path.join(INPUTS, name) for name in sorted(os.listdir(INPUTS))]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_in_process(self):
+        results = list(parse_many(self.paths + [self.bad], workers=1))
+        assert [r.path for r in results] == self.paths + [self.bad]
+        assert all(isinstance(r, ParseResult) for r in results)
+        assert all(r.ok for r in results[:-1])
+        assert results[0].value['someabstract']['para'] == 'This line contains something unusual'
+        assert not results[-1].ok and results[-1].value is None
+        assert results[-1].error is not None
+
+    def test_missing_file(self):
+        missing = os.path.join(self.tmpdir.name, 'missing.xml')
+        results = list(parse_many([missing, self.paths[0]], workers=1))
+        assert not results[0].ok and results[0].path == missing
+        assert isinstance(results[0].error, FileNotFoundError), "a missing path should not be parsed as xml content"
+        assert results[1].ok
+
+    def test_pool_ordered(self):
+        paths = self.paths * 5 + [self.bad]
+        results = list(parse_many(paths, transform=root_tag, workers=2, chunksize=2))
+        assert [r.path for r in results] == paths
+        assert [r.value for r in results[:3]] == [r.value for r in parse_many(self.paths, transform=root_tag, workers=0)]
+        assert results[2].value == 'SAMPLE_SET'
+        assert [r.ok for r in results] == [True] * (len(paths) - 1) + [False]
+
+    def test_pool_unordered(self):
+        paths = self.paths * 5 + [self.bad]
+        results = list(parse_many(paths, transform=root_tag, workers=2, ordered=False))
+        assert sorted(r.path for r in results) == sorted(paths)
+        assert sum(1 for r in results if not r.ok) == 1
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
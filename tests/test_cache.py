@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+from util4tests import run_single_test
+
+from xmlasdict import (
+    parse, LRUCache, enable_serialization_cache, disable_serialization_cache, serialization_cache,
+    enable_parse_cache, disable_parse_cache, parse_cache,
+)
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_entries_bound(self):
+        cache = LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1  # makes b the least recently used
+        cache.put('c', 3)
+        assert 'b' not in cache
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+        assert cache.stats()['hits'] == 2
+        assert cache.stats()['misses'] == 1
+        assert cache.stats()['evictions'] == 1
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.stats()['hits'] == 0
+
+    def test_bytes_bound(self):
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        cache.put('a', 'x' * 4)
+        cache.put('b', 'x' * 4)
+        cache.put('c', 'x' * 4)
+        assert len(cache) == 2 and 'a' not in cache
+        assert cache.stats()['bytes'] == 8
+        cache.put('d', 'x' * 11)  # too big to be cached at all
+        assert 'd' not in cache
+        assert cache.stats()['bytes'] == 8
+
+    def test_valid(self):
+        cache = LRUCache()
+        cache.put('a', 1)
+        assert cache.get('a', valid=lambda value: value == 1) == 1
+        assert cache.get('a', default=0, valid=lambda value: value == 2) == 0
+        assert 'a' not in cache
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+class TestSerializationCache(unittest.TestCase):
+
+    def tearDown(self):
+        disable_serialization_cache()
+
+    def test_disabled(self):
+        assert serialization_cache() is None
+        xdict = parse("<r><a><b>b</b></a></r>")
+        assert str(xdict.a) == '<b>b</b>'
+
+    def test_cached_serializations(self):
+        cache = enable_serialization_cache(max_bytes=1024 * 1024)
+        assert serialization_cache() is cache
+        xdict = parse("<r> <a><b>b</b></a> <a><c/></a> </r>")
+        assert str(xdict) == '<a><b>b</b></a> <a><c /></a>'
+        assert str(xdict) == '<a><b>b</b></a> <a><c /></a>'
+        assert xdict.dumps() == '<r> <a><b>b</b></a> <a><c /></a> </r>'
+        assert cache.stats()['misses'] == 2
+        assert cache.stats()['hits'] == 1
+        # the outerXML of each element is cached, so also when accessed through another wrapper
+        assert xdict.a.dumps() == '<a><b>b</b></a> <a><c /></a> '
+        assert xdict.a.dumps() == '<a><b>b</b></a> <a><c /></a> '
+        assert xdict.a[1].dumps() == '<a><c /></a> '
+        assert cache.stats()['misses'] == 4
+        assert cache.stats()['hits'] == 4
+
+    def test_eviction(self):
+        cache = enable_serialization_cache(max_bytes=200)
+        xdict = parse("<r>" + "".join(f"<i>{'x' * 50}{n}</i>" for n in range(10)) + "</r>")
+        assert [len(i.dumps()) for i in xdict.i] == [58] * 10
+        assert cache.stats()['bytes'] <= 200
+        assert cache.stats()['evictions'] > 0
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.xmlfile = os.path.join(self.tmpdir, 'doc.xml')
+        with open(self.xmlfile, 'w') as xmlfile:
+            xmlfile.write('<r><a>1</a></r>')
+
+    def tearDown(self):
+        disable_parse_cache()
+        shutil.rmtree(self.tmpdir)
+
+    def test_disabled(self):
+        assert parse_cache() is None
+        assert parse(self.xmlfile) is not parse(self.xmlfile)
+
+    def test_memoized(self):
+        cache = enable_parse_cache(max_entries=2)
+        assert parse_cache() is cache
+        xdict = parse(self.xmlfile)
+        assert parse(self.xmlfile) is xdict
+        assert parse(os.path.join(self.tmpdir, '.', 'doc.xml')) is xdict
+        assert parse(self.xmlfile, frozen=True) is not xdict, "frozen documents are cached separately"
+        assert parse("<r><a>1</a></r>") is not xdict, "only files are cached"
+        stats = cache.stats()
+        assert stats['hits'] == 2 and stats['misses'] == 2 and stats['entries'] == 2
+        cache.clear()
+        assert parse(self.xmlfile) is not xdict
+
+    def test_changed_file(self):
+        cache = enable_parse_cache()
+        xdict = parse(self.xmlfile)
+        stat = os.stat(self.xmlfile)
+        with open(self.xmlfile, 'w') as xmlfile:
+            xmlfile.write('<r><a>2</a></r>')
+        os.utime(self.xmlfile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        changed = parse(self.xmlfile)
+        assert changed is not xdict and changed.a['#text'] == '2'
+        assert cache.stats()['misses'] == 2 and cache.stats()['entries'] == 1
+
+    def test_eviction(self):
+        cache = enable_parse_cache(max_entries=None, max_bytes=30)
+        other = os.path.join(self.tmpdir, 'other.xml')
+        with open(other, 'w') as xmlfile:
+            xmlfile.write('<other><a>2</a></other>')
+        parse(self.xmlfile)
+        parse(other)
+        assert cache.stats()['evictions'] == 1 and cache.stats()['bytes'] == os.path.getsize(other)
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
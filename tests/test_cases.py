@@ -1,28 +1,26 @@
-import unittest
-from util4tests import run_single_test, log
-from xmlasdict import parse
+from util4tests import run_single_test, log, BackendTestCase, skip_unless_backend
 
 
-class TestCases(unittest.TestCase):
+class TestCases(BackendTestCase):
 
     def test_access(self):
-        xdict = parse("<root><num>1</num><name>Marc</name></root>")
+        xdict = self.parse("<root><num>1</num><name>Marc</name></root>")
         assert int(str(xdict.num)) == 1, "error accessing num node content"
         assert str(xdict.name) == 'Marc', "error accessing name node content"
 
     def test_nested_access(self):
-        xdict = parse("<root><wrap><num>1</num><name>Marc</name></wrap></root>")
+        xdict = self.parse("<root><wrap><num>1</num><name>Marc</name></wrap></root>")
         assert int(str(xdict.wrap.num)) == 1, "error accessing num node content"
         assert str(xdict.wrap.name) == 'Marc', "error accessing name node content"
 
     def test_attributes(self):
         # check addressing test_attributes
-        xdict = parse("<r top='me'><child type='some'/></r>")
+        xdict = self.parse("<r top='me'><child type='some'/></r>")
         assert xdict['@top'] == 'me', "error accessing root attribute"
         assert xdict.child['@type'] == 'some', "error accessing child attribute"
 
     def test_list_access(self):
-        xdict = parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
+        xdict = self.parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
 
         # basic roundtrip support like innerXML
         assert str(xdict) == '<i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d>'
@@ -46,12 +44,30 @@ class TestCases(unittest.TestCase):
         log.debug(f"xdict['i']={xdict['i']}")
         assert str(xdict.i) == str(xdict['i']), "referencing childs should be supported in two ways"
         assert len(xdict.i) == len(xdict['i']), "referencing childs should be supported in two ways"
-        # todo implement __hash__ and __eq__ on wrapper and iterwrapper for this to work!
-        # assert xdict.i == xdict['i'], "referencing childs should be supported in two ways"
+        assert xdict.i == xdict['i'], "referencing childs should be supported in two ways"
+
+    def test_list_slicing(self):
+        xdict = self.parse("<r>" + "".join(f"<i>{n}</i>" for n in range(10)) + "</r>")
+        items = xdict.i
+        assert len(items) == 10
+        assert str(items[-1]) == '9'
+        assert [str(i) for i in items[2:8:2]] == ['2', '4', '6']
+        view = items[::-1][1:4]
+        assert len(view) == 3
+        assert [str(i) for i in view] == ['8', '7', '6']
+        assert str(view[-1]) == '6'
+        assert view.tag == ['i', 'i', 'i']
+        assert view.unwrap() == ['8', '7', '6']
+        assert view.dumps() == '<i>8</i><i>7</i><i>6</i>'
+        assert str(items[3:4]) == '3', "single element slices produce a plain wrapper"
+        single = self.parse("<r><i>1</i><s>a</s></r>")
+        assert single.unpack()[0:1].dumps() == single.dumps(), "also when slicing wrappers"
+        with self.assertRaises(IndexError):
+            items[10]
 
     def test_dict_ness(self):
         # there is also some more dictlike behaviour we expose
-        xdict = parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
+        xdict = self.parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
         assert set(xdict) == {'i', 's', 'd', '@a'}, "iterating the xdict should expose its keys()"
 
         assert len(list(xdict)) == 4, "not the order but the size should be predictable"
@@ -65,7 +81,7 @@ class TestCases(unittest.TestCase):
         assert str(pydict['d']) == '<n>me</n>'
 
     def test_unwrap(self):
-        xdict = parse("<r p='@p'><a>a</a><a><aa>aa</aa><ab>ab</ab></a><b>b</b></r>")
+        xdict = self.parse("<r p='@p'><a>a</a><a><aa>aa</aa><ab>ab</ab></a><b>b</b></r>")
         shallow_dict = dict(xdict)
         assert [str(n) for n in shallow_dict['a']] == ['a', '<aa>aa</aa><ab>ab</ab>']
 
@@ -77,12 +93,12 @@ class TestCases(unittest.TestCase):
 
     def test_list_all(self):
         # there is also a way to just iterate over all the nested children
-        xdict = parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
+        xdict = self.parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
         assert [str(x) for x in xdict['*']] == ['1', '2', 'a', '3', 'b', 'c', '<n>me</n>']
 
     def test_path_like_access(self):
         # there is also a way to just iterate over all the nested children
-        xdict = parse("<r><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><s>me</s></d></r>")
+        xdict = self.parse("<r><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><s>me</s></d></r>")
         assert [str(n) for n in xdict['s']] == ['a', 'b', 'c']
         assert [str(n) for n in xdict['./s']] == ['a', 'b', 'c']
         assert [str(n) for n in xdict['.//s']] == ['a', 'b', 'c', 'me']
@@ -90,16 +106,41 @@ class TestCases(unittest.TestCase):
         assert str(xdict['./d/s']) == 'me'
         assert str(xdict['.//d/s']) == 'me'
 
+    def test_empty_namespace_access(self):
+        # the {} prefix selects the tags without namespace, as in the ElementTree paths
+        xdict = self.parse("<r><i>1</i><i>2</i><d><i>3</i></d></r>")
+        assert [str(n) for n in xdict['{}i']] == ['1', '2']
+        assert [str(n) for n in xdict['.//{}i']] == ['1', '2', '3']
+        assert str(xdict['{}d']['{}i']) == '3'
+
+    def test_wide_access(self):
+        # plain tags are served from a cached child index, path-like keys still go through findall
+        xml = "<r a='on'>" + "".join(f"<i>{n}</i><s>{n}</s>" for n in range(1000)) + "<d><s>me</s></d></r>"
+        xdict = self.parse(xml)
+        items = xdict.i
+        assert len(items) == 1000
+        assert [str(items[n]) for n in range(0, 1000, 100)] == [str(n) for n in range(0, 1000, 100)]
+        assert [str(n) for n in xdict['s']] == [str(n) for n in xdict['./s']]
+        assert len(xdict['.//s']) == 1001
+        assert len(xdict['s[]']) == 1000
+        assert xdict.keys() is xdict.keys(), "the set of keys should be cached"
+        assert set(xdict) == {'i', 's', 'd', '@a'}
+        assert len(xdict) == 4
+        with self.assertRaises(AttributeError):
+            xdict.x
+
     def test_tag_getting(self):
-        xdict = parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
+        xdict = self.parse("<r a='on'><i>1</i><i>2</i><s>a</s><i>3</i><s>b</s><s>c</s><d><n>me</n></d></r>")
         assert [x.tag for x in xdict['*']] == ['i', 'i', 's', 'i', 's', 's', 'd']
         assert xdict['*'].tag == ['i', 'i', 's', 'i', 's', 's', 'd']
 
     def test_ambiguous_terms(self):
         known_members = ['tag', 'dumps', 'unpack', 'unwrap']
-        xml = "<r>" + "".join([f"<{m}>{m}_content</{m}>" for m in known_members]) + "</r>"
+        # these are deliberately not made members, so they never hide any tags
+        other_terms = ['text', 'to_columns', 'to_dataframe', 'digest', 'diff', 'select', 'walk']
+        xml = "<r>" + "".join([f"<{m}>{m}_content</{m}>" for m in known_members + other_terms]) + "</r>"
         # we have to be cautious with the introduced functions and properties as they hide some potential tags
-        xdict = parse(xml)
+        xdict = self.parse(xml)
         # tag
         assert xdict.tag == 'r'
         assert str(xdict['tag']) == 'tag_content'
@@ -112,24 +153,46 @@ class TestCases(unittest.TestCase):
         # unwrap
         assert xdict.unwrap()['unwrap'] == 'unwrap_content'
         assert str(xdict['unwrap']) == 'unwrap_content'
+        # text is available as #text
+        assert xdict['#text'] == ''.join(f"{m}_content" for m in known_members + other_terms)
+        # the other terms are no members, so they reach the elements
+        for term in other_terms:
+            assert str(getattr(xdict, term)) == f"{term}_content", f"{term} should not be a member"
+            assert str(xdict[term]) == f"{term}_content"
 
     def test_empty(self):
         # we should decide how <empty/> elements should be read
-        xdict = parse("<root><empty type='important' /></root>")
+        xdict = self.parse("<root><empty type='important' /></root>")
         assert str(xdict.empty) == '', "empty elements should produce empty string representation"
         assert not(bool(xdict.empty)), "empty elements should behave as false"
 
+    def test_text(self):
+        xdict = self.parse("<r><e/><s>  </s><t> t </t><m> a <b>b</b> c </m><n><e/></n><l><i/><i>1</i></l></r>")
+        # emptiness and text are answered without serializing, yet in line with str()
+        for key in ['e', 's', 't', 'm', 'n']:
+            assert bool(xdict[key]) == bool(str(xdict[key])), f"bool() and str() disagree on {key}"
+        assert not xdict.s
+        assert xdict.n, "nested elements are content"
+        assert str(xdict.t) == 't'
+        assert xdict.t['#text'] == 't'
+        assert xdict.m['#text'] == 'a b c'
+        assert xdict.m['#text'] == 'a b c'
+        assert str(xdict.m) == 'a <b>b</b> c'
+        assert [i['#text'] for i in xdict.l.i] == ['', '1']
+        assert xdict.l.i, "lists are only empty if they hold a single empty element"
+        assert not xdict['e[]']
+
     def test_unpack_shallow(self):
         # should allow automatic unpacking of lead-wrappers down to the level of naked rows
         # NOTE pysubyt does this for xml sources so we will need this
-        xdict = parse("<r0><r1><r2><r3><d>1</d><d>2</d></r3></r2></r1></r0>")
+        xdict = self.parse("<r0><r1><r2><r3><d>1</d><d>2</d></r3></r2></r1></r0>")
         data = xdict.unpack()
         log.debug(f"data = {data} type = {type(data)}")
         assert data.dumps() == "<d>1</d><d>2</d>"
         assert str(data) == "['1', '2']"
 
         # todo find a way to automatically dig down to the level of the first list like pysubyt does --> ie down to ro.r1.r2.r3
-        xdict = parse("<r0><r1><r2><r3><d>1</d></r3></r2></r1></r0>")
+        xdict = self.parse("<r0><r1><r2><r3><d>1</d></r3></r2></r1></r0>")
         data = xdict.unpack()
         assert data.dumps() == "<d>1</d>"
         assert str(data) == "1"
@@ -137,13 +200,13 @@ class TestCases(unittest.TestCase):
     def test_unpack_deep(self):
         # should allow automatic unpacking of lead-wrappers down to the level of naked rows
         # NOTE pysubyt does this for xml sources so we will need this
-        xdict = parse("<r0><r1><r2><r3><d><id>1</id><nm>Me</nm></d><d><id>2</id><nm>You</nm></d></r3></r2></r1></r0>")
+        xdict = self.parse("<r0><r1><r2><r3><d><id>1</id><nm>Me</nm></d><d><id>2</id><nm>You</nm></d></r3></r2></r1></r0>")
         data = xdict.unpack()
         assert data.dumps() == "<d><id>1</id><nm>Me</nm></d><d><id>2</id><nm>You</nm></d>"
         assert [str(n) for n in data] == ['<id>1</id><nm>Me</nm>', '<id>2</id><nm>You</nm>']
 
         # todo find a way to automatically dig down to the level of the first list like pysubyt does --> ie down to ro.r1.r2.r3
-        xdict = parse("<r0><r1><r2><r3><d><id>1</id><nm>One</nm></d></r3></r2></r1></r0>")
+        xdict = self.parse("<r0><r1><r2><r3><d><id>1</id><nm>One</nm></d></r3></r2></r1></r0>")
         data = xdict.unpack()
         assert data.dumps() == "<d><id>1</id><nm>One</nm></d>"
         assert [str(n) for n in data] == ['<id>1</id><nm>One</nm>']
@@ -154,13 +217,13 @@ class TestCases(unittest.TestCase):
         ]
 
         for xml in inputs:
-            xdict = parse(xml)
+            xdict = self.parse(xml)
             assert xdict.dumps() == xml, f"failed roundtrip parse-serialize for {xml}"
 
     def test_mixed_content_model(self):
         mixed_content = '<a href="http://example.org/">This</a> is <em>actual</em> mixed <strong>content</strong>'
         mixed_xml = "<p>" + mixed_content + "</p>"
-        xdict = parse(mixed_xml)
+        xdict = self.parse(mixed_xml)
         assert str(xdict) == mixed_content
         assert xdict.dumps() == mixed_xml
 
@@ -176,9 +239,9 @@ class TestCases(unittest.TestCase):
           </row>
         </root>"""
 
-        strict_xdict = parse(strict)
-        spaced_xdict = parse(spaced)
-        pretty_xdict = parse(pretty)
+        strict_xdict = self.parse(strict)
+        spaced_xdict = self.parse(spaced)
+        pretty_xdict = self.parse(pretty)
 
         #  roundtripping keeps all whitespace
         assert strict_xdict.dumps() == strict
@@ -212,7 +275,7 @@ class TestCases(unittest.TestCase):
         expected_count = len(xmls)
         for name, xml in xmls.items():
             expected_count -= 1
-            xdict = parse(xml)  # parse(xml.strip())
+            xdict = self.parse(xml)  # self.parse(xml.strip())
             count = 0
             for item in xdict['item[]']:
                 count += 1
@@ -223,7 +286,7 @@ class TestCases(unittest.TestCase):
         """ Specific test for [side-issue of #4](https://github.com/vliz-be-opsci/py-xmlasdict/issues/4)
         """
         xml = "<root><wrap><item><name>Me</name></item></wrap></root>"
-        xdict = parse(xml)
+        xdict = self.parse(xml)
 
         assert xdict.tag == 'root'
         lowest = xdict.unpack()
@@ -236,7 +299,7 @@ class TestCases(unittest.TestCase):
     def test_namespaces(self):
         # check what to do about namespace declarations and prefixes
 
-        # xdict = parse("""<root xmlns="https://example.org/p1 xmlns:pfx="https://example.org/p2">
+        # xdict = self.parse("""<root xmlns="https://example.org/p1 xmlns:pfx="https://example.org/p2">
         #  <a xmlns="https://example.org/p1">a in p1</a>
         #  <pfx:a>a in p2</pfx:a>
         # </root>""", dict(p1="https://example.org/p1", p2="https://example.org/p2"))
@@ -254,5 +317,14 @@ class TestCases(unittest.TestCase):
         pass
 
 
+@skip_unless_backend('lxml')
+class TestCasesLxml(TestCases):
+    backend = 'lxml'
+
+
+class TestCasesFrozen(TestCases):
+    frozen = True
+
+
 if __name__ == "__main__":
     run_single_test(__file__)
@@ -0,0 +1,75 @@
+import os
+from util4tests import run_single_test, skip_unless_backend, skip_unless_installed, BackendTestCase
+
+from xmlasdict import to_columns, compile
+
+
+RECORDS = """<data>
+  <rec id="r1" ok="true"><measure><depth>1.5</depth><when>2020-01-01</when></measure><n>1</n><name> first </name></rec>
+  <rec id="r2" ok="0"><measure><depth>2.5</depth></measure><n>2</n></rec>
+  <rec id="r3" ok="false"><measure><depth>-1</depth><when>2021-06-30</when></measure><n>3</n><name>third</name></rec>
+</data>"""
+FIELDS = {'id': '@id', 'depth': 'measure/depth', 'when': 'measure.when', 'n': 'n', 'name': 'name', 'ok': '@ok'}
+
+
+@skip_unless_installed('numpy')
+class TestColumns(BackendTestCase):
+
+    def test_columns(self):
+        import numpy
+        xdict = self.parse(RECORDS)
+        columns = to_columns(xdict.unpack(), FIELDS, dtypes=dict(depth=float, when='datetime64[D]', n=int, ok=bool))
+        assert list(columns) == list(FIELDS)
+        assert columns['id'].dtype == object and list(columns['id']) == ['r1', 'r2', 'r3']
+        assert columns['depth'].dtype == numpy.float64 and list(columns['depth']) == [1.5, 2.5, -1.0]
+        assert columns['when'].dtype == numpy.dtype('datetime64[D]')
+        assert numpy.isnat(columns['when'][1]) and str(columns['when'][2]) == '2021-06-30'
+        assert columns['n'].dtype == int and columns['n'].sum() == 6
+        assert list(columns['name']) == ['first', None, 'third'], "text is stripped, missing text is None"
+        assert list(columns['ok']) == [True, False, False]
+
+    def test_missing(self):
+        import numpy
+        xdict = self.parse(RECORDS)
+        with self.assertRaises(ValueError):
+            to_columns(xdict.rec, ['name'], dtypes=dict(name=int))
+        columns = to_columns(xdict.rec, dict(name='name', x='@x'), dtypes=dict(name=str, x=float), missing=dict(name='?'))
+        assert list(columns['name']) == ['first', '?', 'third'] and columns['name'].dtype.kind == 'U'
+        assert numpy.isnan(columns['x']).all()
+        with self.assertRaises(ValueError):
+            to_columns(xdict.rec, ['name'], dtypes=dict(name=bool), missing=dict(name=False))
+
+    def test_single_record(self):
+        xdict = self.parse(RECORDS)
+        columns = to_columns(xdict.rec[1], ['@id', 'n'], dtypes={'n': int})
+        assert list(columns['@id']) == ['r2'] and list(columns['n']) == [2]
+
+    def test_streamed_records(self):
+        xdict = self.parse(RECORDS)
+        streamed = to_columns(self.parse_iter(RECORDS, record_tag='rec'), FIELDS, dtypes=dict(depth=float))
+        in_memory = to_columns(xdict.rec, FIELDS, dtypes=dict(depth=float))
+        for name in FIELDS:
+            assert list(streamed[name]) == list(in_memory[name]), f"streamed column {name} differs"
+
+    def test_fitness(self):
+        fitnessfile = os.path.join(os.path.dirname(__file__), 'inputs', '02-fitness.xml')
+        xdict = self.parse(fitnessfile)
+        columns = to_columns(xdict.Element1.D, dict(source='D_child_source', first=compile('D_child1'), text='#text'))
+        assert list(columns['source']) == [str(d.D_child_source) for d in xdict.Element1.D]
+        assert list(columns['first']) == ['keywordA1', 'keywordB1']
+        assert list(columns['text']) == [d['#text'] for d in xdict.Element1.D]
+
+
+@skip_unless_installed('numpy')
+@skip_unless_backend('lxml')
+class TestColumnsLxml(TestColumns):
+    backend = 'lxml'
+
+
+@skip_unless_installed('numpy')
+class TestColumnsFrozen(TestColumns):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
@@ -0,0 +1,86 @@
+import os
+from util4tests import run_single_test, BackendTestCase, skip_unless_backend
+
+from xmlasdict import compile, CompiledPath, Wrapper, IterWrapper
+
+
+class TestCompile(BackendTestCase):
+
+    def setUp(self):
+        fitnessfile = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '02-fitness.xml')
+        self.xdict = self.parse(fitnessfile)
+
+    def test_same_as_accessors(self):
+        _ = self.xdict
+        assert str(compile('Element1.B')(_)) == str(_.Element1.B)
+        assert compile('Element1.E.para.ulink.@url')(_) == _.Element1.E.para.ulink['@url']
+        assert compile('Element1', 'E', 'para', 'ulink', '@url')(_) == 'http://example.org/path'
+        assert compile('Element1.title.#text')(_) == 'This is a dataset'
+        assert compile('.//D_child_source')(_).dumps() == _['.//D_child_source'].dumps()
+        assert compile('Element1.F.F_child1[]')(_).dumps() == _.Element1.F['F_child1[]'].dumps()
+        assert compile('Element1.B[]')(_).dumps() == _.Element1['B[]'].dumps()
+        single = compile('Element1.B[]')(_)
+        assert isinstance(single, IterWrapper) and len(single) == 1
+        assert isinstance(compile('Element1.B')(_), Wrapper)
+
+    def test_repeated_steps(self):
+        _ = self.xdict
+        # steps matching several elements continue from each of them
+        d_child1 = compile('Element1.D.D_child1[]')
+        assert [str(n) for n in d_child1(_)] == ['keywordA1', 'keywordA2', 'keywordB1', 'keywordB2']
+        assert [str(n) for n in compile('D_child1[]')(_['.//D_child_source/..'])] == [str(n) for n in _['.//D_child1']]
+        assert compile('Element1.F.F_child1.@id')(_) == ['MRGID:2546', 'MRGID:2547']
+        assert compile('Element1.F.F_child1.F_child1_descr.#text')(_)[0] == 'Some textual description'
+
+    def test_reuse(self):
+        d_source = compile("D_child_source")
+        assert [d_source(d)['#text'] for d in self.xdict.Element1.D] == ['ASFA', 'BSFA']
+        # raw elements are accepted as well
+        assert [d_source(d._node)['#text'] for d in self.xdict.Element1.D] == ['ASFA', 'BSFA']
+        assert [len(e) for e in d_source.findall(self.xdict.Element1.D)] == [0, 0]
+
+    def test_find(self):
+        _ = self.xdict
+        for path in ('Element1.D.D_child1', './/D_child_source', 'Element1.F.F_child1.@id', 'nothere', '#text'):
+            found = compile(path).findall(_)
+            assert compile(path).find(_) is (found[0] if len(found) > 0 else None), f"differs for {path}"
+        # from an IterWrapper the first start node with a match is used
+        assert compile('D_child_source').find(_.Element1.D).text == 'ASFA'
+        assert compile('nothere').find(_.Element1.D) is None
+
+    def test_missing(self):
+        with self.assertRaises(AttributeError):
+            compile('Element1.nothere')(self.xdict)
+        with self.assertRaises(AttributeError):
+            compile('Element1.@nothere')(self.xdict)
+        assert compile('Element1.nothere[]')(self.xdict) == []
+        assert compile('Element1.nothere.@id[]')(self.xdict) == []
+
+    def test_repr(self):
+        assert repr(compile('a.b[]')) == "CompiledPath('a', 'b[]')"
+        assert isinstance(compile('.//a/b'), CompiledPath)
+        assert compile('.//a/b').path == './/a/b'
+        with self.assertRaises(AssertionError):
+            compile('a.@b.c')
+
+    def test_dotted_predicates(self):
+        # only the dots in between the steps split them, not those in predicates or namespaces
+        assert compile("item[@x='1.5']").steps == ("item[@x='1.5']", )
+        assert compile('a.b[@x="1.5"].c.@id').steps == ('a', 'b[@x="1.5"]', 'c', '@id')
+        assert compile('{urn:x.y}a.b[]').steps == ('{urn:x.y}a', 'b[]')
+        xdict = self.parse("<r><item x='1.5'>a</item><item x='2'>b</item></r>")
+        assert str(compile("item[@x='1.5']")(xdict)) == 'a'
+        assert compile("item[@x='2'].#text")(xdict) == 'b'
+
+
+@skip_unless_backend('lxml')
+class TestCompileLxml(TestCompile):
+    backend = 'lxml'
+
+
+class TestCompileFrozen(TestCompile):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
@@ -0,0 +1,75 @@
+import os
+from util4tests import run_single_test, skip_unless_backend, skip_unless_installed, BackendTestCase
+
+from xmlasdict import to_dataframe, iter_dataframes
+
+
+RECORDS = """<data>
+  <rec id="r1"><measure unit="m"><depth>1.5</depth></measure><kw>a</kw><kw>b</kw></rec>
+  <rec id="r2"><measure><depth>2.5</depth><when>2020-01-01</when></measure></rec>
+  <rec id="r3"><measure unit="cm"><depth>-1</depth></measure><kw>c</kw></rec>
+</data>"""
+
+
+@skip_unless_installed('pandas')
+class TestDataFrame(BackendTestCase):
+
+    def test_flattened(self):
+        xdict = self.parse(RECORDS)
+        frame = to_dataframe(xdict.rec, dtypes={'measure.depth': float})
+        assert list(frame.columns) == ['@id', 'measure.@unit', 'measure.depth', 'kw', 'kw[2]', 'measure.when']
+        assert list(frame['@id']) == ['r1', 'r2', 'r3']
+        assert list(frame['measure.depth']) == [1.5, 2.5, -1.0]
+        assert frame['measure.@unit'][0] == 'm' and frame['measure.@unit'].isna().tolist() == [False, True, False]
+        assert frame['kw[2]'][0] == 'b' and frame['kw[2]'].isna().tolist() == [False, True, True]
+        assert frame['measure.when'].isna().sum() == 2
+
+    def test_dotted_tags(self):
+        xdict = self.parse("<r><rec><a><b.c>1</b.c><b><c>2</c></b></a></rec><rec><a><b><c>3</c></b></a></rec></r>")
+        frame = to_dataframe(xdict.rec)
+        assert list(frame.columns) == ['a.b\\.c', 'a.b.c'], "dots in tag-names should not collide with nesting"
+        assert frame['a.b\\.c'].isna().tolist() == [False, True] and frame['a.b.c'].tolist() == ['2', '3']
+
+    def test_fields(self):
+        xdict = self.parse(RECORDS)
+        frame = to_dataframe(xdict.rec, fields=dict(id='@id', depth='measure/depth'), dtypes=dict(depth=float))
+        assert list(frame.columns) == ['id', 'depth'] and frame['depth'].sum() == 3.0
+
+    def test_leaf_records(self):
+        fitnessfile = os.path.join(os.path.dirname(__file__), 'inputs', '02-fitness.xml')
+        xdict = self.parse(fitnessfile)
+        frame = to_dataframe(xdict['.//D_child1'])
+        assert list(frame['#text']) == ['keywordA1', 'keywordA2', 'keywordB1', 'keywordB2']
+        assert len(to_dataframe(xdict.Element1.D).columns) == 3
+
+    def test_same_as_unwrap(self):
+        import pandas
+        xdict = self.parse(RECORDS)
+        frame = to_dataframe(xdict.rec)
+        normalized = pandas.json_normalize([rec.unwrap() for rec in xdict.rec])
+        assert frame['measure.depth'].tolist() == normalized['measure.depth'].tolist()
+        assert frame['@id'].tolist() == normalized['@id'].tolist()
+
+    def test_chunks(self):
+        records = "<data>" + "".join(f"<rec n='{n}'><v>{n * 2}</v></rec>" for n in range(25)) + "</data>"
+        frames = list(iter_dataframes(self.parse_iter(records, record_tag='rec'), chunksize=10, dtypes={'v': int}))
+        assert [len(f) for f in frames] == [10, 10, 5]
+        assert [v for f in frames for v in f['v']] == [n * 2 for n in range(25)]
+        frames = list(iter_dataframes(self.parse(records).rec, chunksize=30, fields={'n': '@n'}, dtypes={'n': int}))
+        assert len(frames) == 1 and frames[0]['n'].sum() == sum(range(25))
+        assert list(iter_dataframes([], chunksize=10)) == []
+
+
+@skip_unless_installed('pandas')
+@skip_unless_backend('lxml')
+class TestDataFrameLxml(TestDataFrame):
+    backend = 'lxml'
+
+
+@skip_unless_installed('pandas')
+class TestDataFrameFrozen(TestDataFrame):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
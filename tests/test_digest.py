@@ -0,0 +1,77 @@
+from util4tests import run_single_test, skip_unless_backend, BackendTestCase
+
+from xmlasdict import digest, diff, Difference
+
+
+THIS = """<r a="1">
+  <i n="1">one</i>
+  <i n="2">two <b>bold</b> more</i>
+  <j>same</j>
+</r>"""
+OTHER = """<r a="2"><i n="1">one</i><i n="2" x="y">two <b>bolder</b> more</i><j>same</j><k/></r>"""
+
+
+class TestDigest(BackendTestCase):
+
+    def test_equality(self):
+        xdict = self.parse(THIS)
+        assert xdict.i[0] == self.parse('<i n="1">\n one\n</i>'), "text is compared stripped"
+        assert xdict.i[0] != xdict.i[1]
+        assert xdict.i == xdict['i'] and xdict.i != xdict.j
+        assert xdict.j == self.parse('<j>same</j>') and xdict.j != self.parse('<k>same</k>')
+        assert xdict.i[0] != self.parse('<i n="1" m="0">one</i>'), "attributes are part of the content"
+        assert xdict.i[1] != self.parse('<i n="2">two <b>bold</b> less</i>'), "tails are part of the content"
+        assert self.parse('<j a="1">same</j>') == {'@a': '1'}, "comparing with other mappings still works"
+
+    def test_hashing(self):
+        xdict = self.parse(THIS)
+        other = self.parse(OTHER)
+        found = {xdict.i[0], xdict['i'][0], other.i[0], xdict.j, other.j}
+        assert len(found) == 2, "equal content should hash the same"
+        counts = dict()
+        for node in list(xdict.i) + list(other.i):
+            counts[node] = counts.get(node, 0) + 1
+        assert list(counts.values()) == [2, 1, 1]
+
+    def test_digest(self):
+        xdict = self.parse(THIS)
+        assert isinstance(digest(xdict), bytes)
+        assert digest(xdict) == digest(self.parse(THIS))
+        assert digest(xdict) != digest(self.parse(OTHER))
+        assert digest(xdict.i[1].b) != digest(self.parse(OTHER).i[1].b)
+        assert digest(xdict.i) == digest(self.parse(THIS).i) != digest(xdict.i[0])
+        assert digest(xdict['j[]']) == digest(xdict.j), "a list of one element digests as that element"
+
+    def test_diff(self):
+        xdict = self.parse(THIS)
+        other = self.parse(OTHER)
+        assert diff(xdict, self.parse(THIS)) == []
+        differences = diff(xdict, other)
+        assert [d.path for d in differences] == ['@a', 'i[2]/@x', 'i[2]/b/#text', 'k']
+        assert differences[0] == Difference('@a', '1', '2')
+        assert differences[1] == Difference('i[2]/@x', None, 'y')
+        assert differences[2] == Difference('i[2]/b/#text', 'bold', 'bolder')
+        assert differences[3].path == 'k' and differences[3].this is None and differences[3].other == other.k
+        assert [d.path for d in diff(xdict.i, other.i)] == ['[2]/@x', '[2]/b/#text']
+        assert [d.path for d in diff(xdict.i, other.j)] == ['[1]', '[2]'], "other tags are reported whole"
+
+    def test_deep(self):
+        depth = 2000
+        deep = "<n>" * depth + "bottom" + "</n>" * depth
+        xdict = self.parse(deep)
+        assert xdict == self.parse(deep) and hash(xdict) == hash(self.parse(deep))
+        assert [d.path for d in diff(xdict, self.parse(deep.replace('bottom', 'top')))] == \
+            ['/'.join(['n'] * (depth - 1) + ['#text'])]
+
+
+@skip_unless_backend('lxml')
+class TestDigestLxml(TestDigest):
+    backend = 'lxml'
+
+
+class TestDigestFrozen(TestDigest):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
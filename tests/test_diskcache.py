@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from multiprocessing import Pool
+from util4tests import run_single_test
+
+from xmlasdict import parse, DiskCache
+from xmlasdict.frozen import FrozenElement
+
+
+INPUTS = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs')
+
+
+def parse_cached(args):
+    path, cache_dir = args
+    return parse(path, cache_dir=cache_dir).dumps()
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.xmlfile = os.path.join(self.tmpdir, 'doc.xml')
+        shutil.copy(os.path.join(INPUTS, '01-basic.xml'), self.xmlfile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_entries(self):
+        cache = DiskCache(self.cache_dir, max_bytes=10)
+        assert cache.get('a') is None
+        cache.put('a', b'x' * 4)
+        cache.put('b', b'y' * 4)
+        assert cache.get('a') == b'x' * 4
+        assert cache.get('b', valid=lambda data: False) is None
+        cache.put('c', b'z' * 11)  # too big
+        assert 'c' not in cache and len(cache) == 2
+        stats = cache.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 2 and stats['bytes'] == 8
+        cache.clear()
+        assert len(cache) == 0 and cache.stats()['misses'] == 0
+
+    def test_eviction(self):
+        cache = DiskCache(self.cache_dir, max_bytes=10)
+        cache.put('a', b'x' * 4)
+        cache.put('b', b'y' * 4)
+        os.utime(os.path.join(self.cache_dir, 'a.cache'), ns=(0, 0))  # make a the least recently used
+        cache.put('c', b'z' * 4)
+        assert 'a' not in cache and 'b' in cache and 'c' in cache
+        assert cache.stats()['evictions'] == 1
+        with self.assertRaises(AssertionError):
+            cache.get('../a')
+
+    def test_cached_parse(self):
+        cache = DiskCache(self.cache_dir)
+        xdict = parse(self.xmlfile, cache_dir=cache)
+        assert isinstance(xdict._node, FrozenElement)
+        assert xdict.dumps() == parse(self.xmlfile).dumps()
+        assert cache.stats()['misses'] == 1 and len(cache) == 1
+        again = parse(self.xmlfile, cache_dir=cache)
+        assert again.dumps() == xdict.dumps() and again.unwrap() == xdict.unwrap()
+        assert cache.stats()['hits'] == 1
+
+    def test_touched_file(self):
+        cache = DiskCache(self.cache_dir)
+        parse(self.xmlfile, cache_dir=cache)
+        stat = os.stat(self.xmlfile)
+        os.utime(self.xmlfile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # same content, other mtime
+        parse(self.xmlfile, cache_dir=cache)
+        parse(self.xmlfile, cache_dir=cache)
+        assert cache.stats()['hits'] == 2, "unchanged content should still be loaded from the cache"
+
+    def test_changed_file(self):
+        cache = DiskCache(self.cache_dir)
+        parse(self.xmlfile, cache_dir=cache)
+        stat = os.stat(self.xmlfile)
+        with open(self.xmlfile, 'w') as xmlfile:
+            xmlfile.write('<changed><x>1</x></changed>')
+        os.utime(self.xmlfile, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # even with the same mtime
+        xdict = parse(self.xmlfile, cache_dir=cache)
+        assert xdict.tag == 'changed' and xdict.x['#text'] == '1'
+        assert cache.stats()['misses'] == 2 and len(cache) == 1
+
+    def test_corrupt_snapshot(self):
+        parse(self.xmlfile, cache_dir=self.cache_dir)
+        snapshot = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        with open(snapshot, 'r+b') as entry:
+            entry.truncate(os.path.getsize(snapshot) - 10)
+        assert parse(self.xmlfile, cache_dir=self.cache_dir).dumps() == parse(self.xmlfile).dumps()
+
+    def test_other_inputs(self):
+        xdict = parse("<root><a>1</a></root>", cache_dir=self.cache_dir)
+        assert xdict.a['#text'] == '1' and len(DiskCache(self.cache_dir)) == 0
+
+    def test_concurrent(self):
+        with Pool(4) as pool:
+            dumps = pool.map(parse_cached, [(self.xmlfile, self.cache_dir)] * 16)
+        assert all(d == parse(self.xmlfile).dumps() for d in dumps)
+        assert len(DiskCache(self.cache_dir)) == 1
+        assert not any(name.endswith('.tmp') for name in os.listdir(self.cache_dir))
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
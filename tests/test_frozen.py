@@ -0,0 +1,130 @@
+import io
+import os
+import pathlib
+import tracemalloc
+import unittest
+from util4tests import run_single_test, skip_unless_backend
+from xml.etree import ElementTree
+
+from xmlasdict import parse
+from xmlasdict.frozen import FrozenElement
+
+
+INPUTS = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs')
+MIXED = '<r a="1" b="2">hi <b c="2">x<i>y</i>z</b> tail <b>q</b><c/>\n  <d xmlns="urn:x">ns</d>\n</r>'
+
+
+class TestFrozen(unittest.TestCase):
+    backend = 'etree'
+
+    def test_frozen_elements(self):
+        xdict = parse(MIXED, backend=self.backend, frozen=True)
+        root = xdict._node
+        assert isinstance(root, FrozenElement)
+        doc = root._doc
+        assert len(doc) == 6
+        assert list(doc.parents) == [-1, 0, 1, 0, 0, 0]
+        assert list(doc.child_counts) == [4, 1, 0, 0, 0, 0]
+        assert list(doc.ends) == [6, 3, 3, 4, 5, 6]
+        assert root.tag == 'r' and root.text == 'hi ' and root.tail is None
+        assert root.attrib == {'a': '1', 'b': '2'} and root.keys() == ['a', 'b'] and root.get('b') == '2'
+        b, _, c, d = list(root)
+        assert b.tail == ' tail ' and c.text is None and c.tail == '\n  ' and d.tag == '{urn:x}d'
+        assert [e.tag for e in root.iter()] == ['r', 'b', 'i', 'b', 'c', '{urn:x}d']
+        assert [e.tag for e in root.iter('b')] == ['b', 'b']
+        assert ''.join(b.itertext()) == 'xyz'
+        assert b[0].getparent() is b and root.getparent() is None
+
+    def test_proxy_identity(self):
+        xdict = parse(MIXED, backend=self.backend, frozen=True)
+        root = xdict._node
+        assert root[0] is next(iter(root)) is root.find('b')
+        assert root.find('.//i') is root[0][0]
+
+    def test_read_only_attrib(self):
+        xdict = parse(MIXED, backend=self.backend, frozen=True)
+        xdict._node.attrib['a'] = 'changed'
+        assert xdict['@a'] == '1'
+
+    def test_same_as_etree(self):
+        for name in sorted(os.listdir(INPUTS)):
+            path = os.path.join(INPUTS, name)
+            xdict, frozen = parse(path), parse(path, backend=self.backend, frozen=True)  # compare with plain etree
+            assert frozen.dumps() == xdict.dumps(), f"frozen serialization differs for {name}"
+            assert str(frozen) == str(xdict) and frozen['#text'] == xdict['#text']
+            assert frozen.unwrap() == xdict.unwrap(), f"frozen unwrap differs for {name}"
+            for path in ('.//*', './/*[1]', './/*/..', '*/*[last()]'):
+                assert [e.tag for e in frozen._node.findall(path)] == [e.tag for e in xdict._node.findall(path)]
+
+    def test_inputs(self):
+        content = MIXED.encode('utf-8')
+        expected = parse(MIXED).dumps()
+        for source in (content, memoryview(content), io.BytesIO(content)):
+            assert parse(source, backend=self.backend, frozen=True).dumps() == expected, f"failed for {source}"
+        path = os.path.join(INPUTS, '01-basic.xml')
+        assert parse(pathlib.Path(path), backend=self.backend, frozen=True).dumps() == parse(path).dumps()
+
+    def test_incomplete(self):
+        with self.assertRaises(Exception):
+            parse('<r><a></r>', backend=self.backend, frozen=True)
+
+    def test_wide_and_deep(self):
+        wide = "<r>" + "".join(f"<i n='{n}'>{n}</i>\n" for n in range(20000)) + "</r>"
+        xdict = parse(wide, backend=self.backend, frozen=True)
+        assert len(xdict.i) == 20000 and xdict.i[-1]['@n'] == '19999'
+        assert xdict._node._doc.text.count('\n') == 1, "the repeated whitespace should be stored only once"
+        depth = 2000
+        deep = parse("<n>" * depth + "bottom" + "</n>" * depth, backend=self.backend, frozen=True)
+        assert deep['#text'] == 'bottom' and len(deep._node.findall('.//n')) == depth - 1
+
+    def test_less_memory(self):
+        xml = "<r>" + "".join(f"<i n='{n}' m='x'><v>{n}</v><w/></i>" for n in range(5000)) + "</r>"
+        resident = dict()
+        for frozen in (False, True):
+            tracemalloc.start()
+            try:
+                xdict = parse(xml, frozen=frozen)
+                resident[frozen] = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            assert xdict.i[10].v['#text'] == '10'
+        assert resident[True] * 2 < resident[False], f"frozen should be at least half the size, measured {resident}"
+
+    def test_tag_index(self):
+        xml = "<r>" + "".join(f"<i n='{n}'><v>{n}</v><i n='{n}.{n}'/></i>" for n in range(100)) + "<v/></r>"
+        xdict = parse(xml, backend=self.backend, frozen=True)
+        doc = xdict._node._doc
+        assert doc._tag_index is None, "the tag index is only built on the first deep search"
+        nbytes = doc.nbytes()
+        assert [str(v) for v in xdict['.//v']] == [str(n) for n in range(100)] + ['']
+        assert doc._tag_index is not None and doc.nbytes() == nbytes + 4 * len(doc)
+        assert [str(v) for v in xdict.i[7]['.//v[]']] == ['7'] and xdict.i[7]['.//i']['@n'] == '7.7'
+        assert xdict.i[7]._node.find('.//i') is xdict.i[7].i._node
+        assert xdict['.//nothere[]'] == [] and len(xdict['.//i']) == 200
+        expected = parse(xml)
+        for path in ('.//i', './/v', './/i/v', 'i//i', './/i[@n="5.5"]', './/v/..'):
+            assert [e.get('n') for e in xdict._node.findall(path)] == [e.get('n') for e in expected._node.findall(path)]
+        mixed = parse(MIXED, backend=self.backend, frozen=True)._node
+        assert [e.text for e in mixed.findall('.//{urn:x}d')] == ['ns']
+        with self.assertRaises(SyntaxError):  # not a tag, so left to (the error reporting of) ElementPath
+            mixed.findall('.//..')
+
+    def test_without_tag_index(self):
+        xdict = parse(MIXED, backend=self.backend, frozen=True)
+        doc = xdict._node._doc
+        doc.use_tag_index = False
+        assert [e.tag for e in doc.root.iter('b')] == ['b', 'b'] and len(xdict['.//i']._node) == 0
+        assert doc._tag_index is None
+
+    def test_etree_serialization(self):
+        xdict = parse(MIXED, backend=self.backend, frozen=True)
+        assert ElementTree.tostring(xdict.b[0]._node, encoding='unicode') == '<b c="2">x<i>y</i>z</b> tail '
+
+
+@skip_unless_backend('lxml')
+class TestFrozenLxml(TestFrozen):
+    backend = 'lxml'
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
@@ -0,0 +1,83 @@
+import zlib
+from util4tests import run_single_test, skip_unless_backend
+import unittest
+
+from xmlasdict import IncrementalParser, Wrapper
+
+
+XML = b"<r><head>h</head><rows><row n='1'><d>1</d></row><row n='2'><d>2</d></row></rows><row n='3'><d>3</d></row></r>"
+
+
+class TestIncrementalParser(unittest.TestCase):
+    backend = 'etree'
+
+    def fed(self, fragments, **kwargs):
+        """ feeds the fragments, draining the records after each, returns all records """
+        parser = IncrementalParser(backend=self.backend, **kwargs)
+        records = list()
+        for fragment in fragments:
+            parser.feed(fragment)
+            records.extend(parser.records())
+        parser.close()
+        records.extend(parser.records())
+        return records
+
+    def test_records(self):
+        records = self.fed([XML[:30], XML[30:31], XML[31:]])
+        assert all(isinstance(r, Wrapper) for r in records)
+        assert [r.tag for r in records] == ['head', 'rows', 'row']
+        assert [r['@n'] for r in self.fed([XML], record_tag='row')] == ['1', '2', '3']
+        assert [r.tag for r in self.fed([XML], depth=2)] == ['row', 'row', 'd']
+        assert [r['@n'] for r in self.fed([XML], record_tag='row', depth=1)] == ['3']
+        assert [r.tag for r in self.fed([XML], depth=0)] == ['r']
+
+    def test_any_fragments(self):
+        expected = [r.dumps() for r in self.fed([XML], record_tag='row')]
+        for size in (1, 2, 7, 64):
+            fragments = [XML[start:start + size] for start in range(0, len(XML), size)]
+            assert [r.dumps() for r in self.fed(fragments, record_tag='row')] == expected, f"failed for {size}"
+        assert [r.dumps() for r in self.fed([memoryview(XML), b''], record_tag='row')] == expected
+        assert [r.dumps() for r in self.fed([XML.decode('utf-8')], record_tag='row')] == expected
+
+    def test_decompressed(self):
+        xml = b"<r>" + b"".join(b"<i n='%d'/>" % n for n in range(5000)) + b"</r>"
+        compressed = zlib.compress(xml)
+        decompressor = zlib.decompressobj()
+        fragments = [decompressor.decompress(compressed[start:start + 100]) for start in range(0, len(compressed), 100)]
+        records = self.fed(fragments + [decompressor.flush()])
+        assert len(records) == 5000 and records[-1]['@n'] == '4999'
+
+    def test_release(self):
+        parser = IncrementalParser(backend=self.backend)
+        parser.feed(b"<r>" + b"".join(b"<i>%d</i>" % n for n in range(100)))
+        records = list(parser.records())
+        assert len(records) == 100 and str(records[-1]) == '99'
+        assert len(parser._reader.root) == 0, "drained records should be released from the tree"
+        assert list(parser.records()) == [], "records are only drained once"
+        parser.feed(b"</r>")
+        parser.close()
+        assert list(parser.records()) == []
+
+    def test_documents(self):
+        parser = IncrementalParser(backend=self.backend)
+        parser.feed(b"<r><i>1</i></r>\n<?xml version='1.0'?><r><i>2</i></r>")
+        parser.feed(b"<r><i>3</i></r>")
+        parser.close()
+        assert [str(r) for r in parser.records()] == ['1', '2', '3'] and parser.documents == 3
+
+    def test_close(self):
+        parser = IncrementalParser(backend=self.backend)
+        parser.feed(b"<r><i>1</i>")
+        with self.assertRaises(SyntaxError):  # the ParseError of etree, or the XMLSyntaxError of lxml
+            parser.close()
+        with self.assertRaises(AssertionError):
+            parser.feed(b"</r>")
+
+
+@skip_unless_backend('lxml')
+class TestIncrementalParserLxml(TestIncrementalParser):
+    backend = 'lxml'
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
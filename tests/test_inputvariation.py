@@ -1,11 +1,20 @@
 import unittest
-from util4tests import run_single_test
+from util4tests import run_single_test, skip_unless_backend
+import io
+import mmap
 import os
+import pathlib
 
-from xmlasdict import parse
+from xmlasdict import parse, parse_iter
+from xmlasdict.parser import input_kind
+
+
+XMLINFILE = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '01-basic.xml')
+CONTENT = '<root a="1"><rec>één</rec><rec>twee</rec></root>'
 
 
 class TestInputVariants(unittest.TestCase):
+    backend = 'etree'
 
     def test_file_input(self):
         xmlinfile = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '01-basic.xml')
@@ -16,6 +25,71 @@ class TestInputVariants(unittest.TestCase):
         xml = parse("<root/>")
         assert xml is not None, "we should have gotten some return"
 
+    def test_string_input_leading_whitespace(self):
+        xml = parse("\n  <root><a>x</a></root>", backend=self.backend)
+        assert xml.a['#text'] == 'x'
+
+    def test_string_input_not_a_file(self):
+        with self.assertRaises(Exception):
+            parse("no-such-file.xml", backend=self.backend)
+
+    def test_bytes_input(self):
+        for content in (CONTENT.encode('utf-8'), bytearray(CONTENT.encode('utf-8'))):
+            xml = parse(content, backend=self.backend)
+            assert xml['@a'] == '1'
+            assert xml.rec[0]['#text'] == 'één', "bytes should be parsed without prior decoding"
+
+    def test_bytes_input_declared_encoding(self):
+        content = '<?xml version="1.0" encoding="iso-8859-1"?><root>één</root>'.encode('iso-8859-1')
+        xml = parse(content, backend=self.backend)
+        assert xml['#text'] == 'één', "the declared encoding should be respected"
+
+    def test_memoryview_input(self):
+        content = CONTENT.encode('utf-8')
+        with memoryview(content) as view:
+            xml = parse(view, backend=self.backend)
+        assert [r['#text'] for r in xml.rec] == ['één', 'twee']
+
+    def test_mmap_input(self):
+        with open(XMLINFILE, 'rb') as xmlfile, mmap.mmap(xmlfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            xml = parse(mapped, backend=self.backend)
+            mapped.close()  # fails if some view on the mapped file would still be held
+        assert xml.dumps() == parse(XMLINFILE, backend=self.backend).dumps()
+
+    def test_mmap_position(self):
+        with open(XMLINFILE, 'rb') as xmlfile, mmap.mmap(xmlfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            mapped.seek(5)
+            assert input_kind(mapped) == 'buffer', "an mmap should be fed as buffer, not read as file"
+            xml = parse(mapped, backend=self.backend)
+            assert mapped.tell() == 5, "the buffer is not read"
+            records = [r.dumps() for r in parse_iter(mapped, backend=self.backend)]
+        assert xml.dumps() == parse(XMLINFILE, backend=self.backend).dumps(), "the whole mapped content is parsed"
+        assert records == [r.dumps() for r in xml['*[]']]
+
+    def test_path_input(self):
+        xml = parse(pathlib.Path(XMLINFILE), backend=self.backend)
+        assert xml.dumps() == parse(XMLINFILE, backend=self.backend).dumps()
+
+    def test_fileobject_input(self):
+        with open(XMLINFILE, 'rb') as xmlfile:
+            xml = parse(xmlfile, backend=self.backend)
+        assert xml.dumps() == parse(XMLINFILE, backend=self.backend).dumps()
+        xml = parse(io.BytesIO(CONTENT.encode('utf-8')), backend=self.backend)
+        assert xml.rec[1]['#text'] == 'twee'
+
+    def test_unsupported_input(self):
+        with self.assertRaises(AssertionError):
+            parse(42, backend=self.backend)
+
+    def test_parse_iter_inputs(self):
+        content = CONTENT.encode('utf-8')
+        expected = ['één', 'twee']
+        for source in (CONTENT, content, memoryview(content), io.BytesIO(content)):
+            assert [r['#text'] for r in parse_iter(source, backend=self.backend)] == expected, f"failed for {source}"
+        xdict = parse(XMLINFILE, backend=self.backend)
+        records = [r.dumps() for r in parse_iter(pathlib.Path(XMLINFILE), backend=self.backend)]
+        assert records == [r.dumps() for r in xdict['*[]']]
+
     # in lxml (https://lxml.de/lxmlhtml.html)
     #  TODO make these work also
     def test_url_input(self):
@@ -44,5 +118,10 @@ class TestInputVariants(unittest.TestCase):
         pass
 
 
+@skip_unless_backend('lxml')
+class TestInputVariantsLxml(TestInputVariants):
+    backend = 'lxml'
+
+
 if __name__ == "__main__":
     run_single_test(__file__)
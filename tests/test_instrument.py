@@ -0,0 +1,102 @@
+import contextvars
+import threading
+import unittest
+from util4tests import run_single_test
+
+from xmlasdict import parse, instrumented, Wrapper, IterWrapper
+
+
+XML = "<r id='1'><a>x</a><a><b>y</b></a><c>z</c></r>"
+
+
+class TestInstrument(unittest.TestCase):
+
+    def test_counts(self):
+        xdict = parse(XML)
+        with instrumented() as stats:
+            xdict.a[1].b
+            xdict['@id']
+            xdict['.//b']  # served from the tag index of the document
+            xdict['a/b']
+            list(xdict.keys())
+            str(xdict.c)
+            xdict.dumps()
+            xdict.unwrap()
+            xdict.a.unwrap()
+        snapshot = stats.snapshot()
+        operations = snapshot['operations']
+        assert operations['findchildren']['calls'] == 6
+        assert operations['getchildren']['calls'] == 1, "only the path-like key (other than .//tag) should need a findall"
+        assert operations['getattribute']['calls'] == 1
+        assert operations['keys']['calls'] == 1
+        assert operations['str'] == dict(calls=1, seconds=operations['str']['seconds'], bytes=1)
+        assert operations['dumps']['bytes'] == len(XML.replace("'", '"').encode('utf-8'))
+        assert operations['unwrap']['calls'] == 3 and operations['iter_unwrap']['calls'] == 1
+        assert all(op['seconds'] >= 0 for op in operations.values())
+        assert snapshot['allocations']['IterWrapper'] == 2
+        assert snapshot['allocations']['Wrapper'] >= 4
+        stats.reset()
+        assert stats.snapshot() == dict(operations=dict(), allocations=dict())
+
+    def test_disabled(self):
+        originals = (Wrapper.__dict__['_getchildren'], Wrapper.keys, Wrapper.__init__, IterWrapper.__str__)
+        with instrumented() as stats:
+            assert Wrapper.keys is not originals[1]
+            with instrumented() as nested:
+                parse(XML).a
+            parse(XML).c
+        assert (Wrapper.__dict__['_getchildren'], Wrapper.keys, Wrapper.__init__, IterWrapper.__str__) == originals
+        assert nested.snapshot()['allocations'] == dict(Wrapper=1, IterWrapper=1)
+        assert stats.snapshot()['allocations'] == dict(Wrapper=3, IterWrapper=1)
+        parse(XML).c
+        assert stats.snapshot()['allocations'] == dict(Wrapper=3, IterWrapper=1), "nothing is counted after the context"
+
+    def test_exception(self):
+        with self.assertRaises(AttributeError):
+            with instrumented() as stats:
+                parse(XML).nope
+        assert Wrapper.__dict__['_findchildren'].__name__ == '_findchildren'
+        assert stats.snapshot()['operations'] == dict(), "failed operations are not counted"
+
+    def test_threads(self):
+        xdict = parse(XML)
+
+        def work():
+            for _ in range(100):
+                xdict['@id']
+        with instrumented() as stats:
+            # threads running in a copy of the context are counted as well
+            threads = [threading.Thread(target=contextvars.copy_context().run, args=(work,)) for _ in range(4)]
+            threads.append(threading.Thread(target=work))  # but not those started in an empty context
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert stats.snapshot()['operations']['getattribute']['calls'] == 400
+
+    def test_separate_contexts(self):
+        xdict = parse(XML)
+        both_active = threading.Barrier(2)
+        snapshots = dict()
+
+        def work(name, key, times):
+            with instrumented() as stats:
+                both_active.wait()
+                for _ in range(times):
+                    xdict[key]
+                both_active.wait()
+            snapshots[name] = stats.snapshot()['operations']
+        threads = [
+            threading.Thread(target=work, args=('attributes', '@id', 100)),
+            threading.Thread(target=work, args=('children', 'c', 50)),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert list(snapshots['attributes']) == ['getattribute'] and snapshots['attributes']['getattribute']['calls'] == 100
+        assert list(snapshots['children']) == ['findchildren'] and snapshots['children']['findchildren']['calls'] == 50
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
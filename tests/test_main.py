@@ -0,0 +1,87 @@
+import unittest
+import os
+import io
+import json
+from unittest import mock
+from util4tests import run_single_test
+
+from xmlasdict.__main__ import get_arg_parser, write, convert_file
+
+
+INPUTS = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs')
+BASIC = os.path.join(INPUTS, '01-basic.xml')
+ENA = os.path.join(INPUTS, '03-ena.xml')
+
+
+def run(*argv):
+    out = io.StringIO()
+    failed = write(get_arg_parser().parse_args(argv), out)
+    return out.getvalue(), failed
+
+
+class TestMain(unittest.TestCase):
+
+    def test_single_json(self):
+        output, failed = run(BASIC)
+        assert failed == 0
+        assert json.loads(output)['someabstract'] == {'para': 'This line contains something unusual'}
+
+    def test_records_jsonl(self):
+        output, failed = run('--record', 'SAMPLE_LINK', '--format', 'jsonl', ENA)
+        lines = output.splitlines()
+        assert failed == 0
+        assert len(lines) == 3
+        assert json.loads(lines[0]) == {'XREF_LINK': {'DB': 'ENA-SUBMISSION', 'ID': 'ERA2955466'}}
+
+    def test_records_json(self):
+        output, failed = run('-r', 'DB', '-i', '2', ENA)
+        assert json.loads(output) == ['ENA-SUBMISSION', 'ENA-FASTQ-FILES', 'ENA-SUBMITTED-FILES']
+        output, failed = run('-r', 'nothere', ENA)
+        assert json.loads(output) == []
+
+    def test_unpack(self):
+        # unpacking descends from SAMPLE_SET to its only (and mixed content) SAMPLE
+        output, failed = run('--unpack', ENA)
+        rows = json.loads(output)
+        assert len(rows) == 1
+        assert rows[0]['@accession'] == 'ERS5181294'
+        output, failed = run('--tag', 'SAMPLE_SET', ENA)
+        assert list(json.loads(output)[0]) == ['SAMPLE']
+
+    def test_workers(self):
+        paths = [os.path.join(INPUTS, name) for name in sorted(os.listdir(INPUTS))]
+        bad = os.path.join(INPUTS, 'not-there.xml')
+        expected, _ = run('-f', 'jsonl', *paths)
+        output, failed = run('-w', '2', '-f', 'jsonl', *paths, bad)
+        assert failed == 1
+        assert output == expected
+        output, failed = run('-w', '2', *paths)
+        assert len(json.loads(output)) == len(paths)
+        # the workers stream the records from each of the files
+        expected, _ = run('-r', 'DB', '-f', 'jsonl', ENA, ENA)
+        output, failed = run('-w', '2', '-r', 'DB', '-f', 'jsonl', ENA, ENA)
+        assert failed == 0 and output == expected and len(output.splitlines()) == 6
+
+    def test_missing_file(self):
+        for argv in ([], ['-r', 'DB'], ['-u']):
+            with self.assertLogs('xmlasdict.__main__', level='ERROR') as logged:
+                output, failed = run(*argv, '-f', 'jsonl', os.path.join(INPUTS, 'not-there.xml'))
+            assert failed == 1 and output == ''
+            assert 'FileNotFoundError' in logged.output[0], f"the input should be read as a file for {argv}"
+
+    def test_convert_file(self):
+        # the records are streamed from the file, rather than found in the fully parsed document
+        with mock.patch('xmlasdict.__main__.parse', side_effect=AssertionError("should not parse")):
+            result = convert_file((ENA, 'DB', False, None))
+        assert result.ok and result.path == ENA
+        assert result.value == ['ENA-SUBMISSION', 'ENA-FASTQ-FILES', 'ENA-SUBMITTED-FILES']
+        result = convert_file((os.path.join(INPUTS, 'not-there.xml'), 'DB', False, None))
+        assert not result.ok and isinstance(result.error, FileNotFoundError)
+
+    def test_exclusive_modes(self):
+        with self.assertRaises(SystemExit):
+            get_arg_parser().parse_args(['-r', 'DB', '-t', 'SAMPLE', ENA])
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
@@ -0,0 +1,93 @@
+import os
+import io
+import tracemalloc
+from util4tests import run_single_test, BackendTestCase, skip_unless_backend
+
+from xmlasdict import Wrapper
+from xmlasdict.backend import get_backend
+from xmlasdict.parser import _RecordReader, _iterevents
+
+
+class TestParseIter(BackendTestCase):
+
+    def test_default_records(self):
+        xml = "<r><i n='1'>one</i><i n='2'><x>two</x></i><s>three</s></r>"
+        records = self.parse_iter(xml)
+        first = next(records)
+        assert isinstance(first, Wrapper)
+        assert first.tag == 'i'
+        assert first['@n'] == '1'
+        assert str(first) == 'one'
+        second = next(records)
+        assert str(second.x) == 'two'
+        assert second.unwrap() == {'@n': '2', 'x': 'two'}
+        third = next(records)
+        assert third.dumps() == '<s>three</s>'
+        with self.assertRaises(StopIteration):
+            next(records)
+
+    def test_record_tag(self):
+        xml = "<r><head>h</head><rows><row><d>1</d></row><row><d>2</d></row></rows><row><d>3</d></row></r>"
+        assert [str(rec.d) for rec in self.parse_iter(xml, record_tag='row')] == ['1', '2', '3']
+
+    def test_nested_record_tag(self):
+        # records nested inside a record are part of that outer record
+        xml = "<r><n id='a'><n id='b'/></n><n id='c'/></r>"
+        records = [rec.unwrap() for rec in self.parse_iter(xml, record_tag='n')]
+        assert records == [{'@id': 'a', 'n': {'@id': 'b'}}, {'@id': 'c'}]
+
+    def test_release(self):
+        xml = "<r>" + "".join(f"<i>{n}</i>" for n in range(10)) + "</r>"
+        records = list(self.parse_iter(xml))
+        # records stay usable once the parser moved on, they are just no longer part of the tree
+        assert [str(rec) for rec in records] == [str(n) for n in range(10)]
+
+    def test_detached(self):
+        xml = "<r><h>head</h>" + "".join(f"<i><d>{n}</d></i>" for n in range(10)) + "<t>tail</t></r>"
+        reader = _RecordReader()
+        records = list(reader.read(_iterevents([xml], get_backend(self.backend))))
+        assert len(records) == 12
+        # every completed element got removed from the tree, so nothing is left behind under the root
+        assert reader.root is not None and reader.done
+        assert len(reader.root) == 0
+
+    def _peak_memory(self, count: int):
+        content = b"<r>" + b"".join(b"<i n='%d'><d>record %d</d></i>" % (n, n) for n in range(count)) + b"</r>"
+        xml = io.BytesIO(content)
+        tracemalloc.start()
+        try:
+            seen = sum(1 for rec in self.parse_iter(xml) if str(rec.d).startswith('record'))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert seen == count
+        return peak
+
+    def test_flat_memory(self):
+        # the peak is bound by the chunks fed to the parser, not by the size of the document
+        small, large = self._peak_memory(10000), self._peak_memory(80000)
+        assert large < 2 * small, f"peak memory grew from {small} to {large} for an 8 times larger document"
+
+    def test_file_input(self):
+        xmlinfile = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '03-ena.xml')
+        samples = list(self.parse_iter(xmlinfile, record_tag='SAMPLE'))
+        assert len(samples) == 1
+        assert samples[0]['@accession'] == 'ERS5181294'
+        assert str(samples[0].IDENTIFIERS.PRIMARY_ID) == 'ERS5181294'
+
+        with open(xmlinfile, 'rb') as xmlfile:
+            links = [str(link.XREF_LINK.DB) for link in self.parse_iter(xmlfile, record_tag='SAMPLE_LINK')]
+        assert links[0] == 'ENA-SUBMISSION'
+
+    def test_fileobject_input(self):
+        xml = io.BytesIO(b"<r><i>1</i><i>2</i></r>")
+        assert [str(i) for i in self.parse_iter(xml, record_tag='i')] == ['1', '2']
+
+
+@skip_unless_backend('lxml')
+class TestParseIterLxml(TestParseIter):
+    backend = 'lxml'
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
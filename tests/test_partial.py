@@ -0,0 +1,75 @@
+import io
+import os
+import tempfile
+from util4tests import run_single_test, skip_unless_backend, BackendTestCase
+
+from xmlasdict import parse
+
+
+XML = "<r>\n  <meta><h>header</h><o>other</o></meta>\n" + "".join(f"<rec n='{n}'>{n}</rec>" for n in range(50000)) + "\n</r>"
+
+
+class CountingFile(io.BytesIO):
+    """ file object counting the bytes read from it """
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class TestPartial(BackendTestCase):
+
+    def test_stop_after_tag(self):
+        xdict = self.parse(XML, stop_after='h')
+        assert str(xdict.meta.h) == 'header'
+        assert xdict.meta.keys() == {'h'} and 'rec' not in xdict.keys(), "nothing after the header should be in there"
+        assert xdict.dumps() == "<r>\n  <meta><h>header</h></meta></r>"
+
+    def test_stop_after_path(self):
+        xdict = self.parse(XML, stop_after='meta/o')
+        assert xdict.meta.unwrap() == {'h': 'header', 'o': 'other'} and 'rec' not in xdict.keys()
+        assert self.parse(XML, stop_after='*/h').meta.keys() == {'h'}
+        assert len(self.parse(XML, stop_after='r/h').rec) == 50000, "the path is relative to the root element"
+
+    def test_stop_after_function(self):
+        xdict = self.parse(XML, stop_after=lambda w: w.tag == 'rec' and w['@n'] == '2')
+        assert [str(r) for r in xdict.rec] == ['0', '1', '2'] and str(xdict.meta.o) == 'other'
+
+    def test_no_match(self):
+        xdict = self.parse(XML, stop_after='nothere')
+        assert xdict.dumps() == self.parse(XML).dumps()
+
+    def test_reads_only_the_header(self):
+        content = XML.encode('utf-8')
+        xmlfile = CountingFile(content)
+        assert str(self.parse(xmlfile, stop_after='h').meta.h) == 'header'
+        assert xmlfile.bytes_read < len(content) // 4, "reading should stop right after the header"
+        for source in (content, memoryview(content)):
+            assert self.parse(source, stop_after='h').meta.keys() == {'h'}
+
+    def test_closes_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'big.xml')
+            with open(path, 'w') as xmlfile:
+                xmlfile.write(XML)
+            opened = set(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else set()
+            assert self.parse(path, stop_after='h').meta.keys() == {'h'}
+            if opened:
+                assert set(os.listdir('/proc/self/fd')) <= opened, "the file should be closed right away"
+
+    def test_invalid(self):
+        with self.assertRaises(AssertionError):
+            parse(XML, stop_after='h', frozen=True)
+        with self.assertRaises(AssertionError):
+            self.parse(XML, stop_after='meta/@id')
+
+
+@skip_unless_backend('lxml')
+class TestPartialLxml(TestPartial):
+    backend = 'lxml'
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
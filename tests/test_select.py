@@ -0,0 +1,75 @@
+import os
+from util4tests import run_single_test, skip_unless_backend, BackendTestCase
+
+from xmlasdict import compile, select
+from xmlasdict.path import Selection
+
+
+RECORDS = """<data>
+  <rec id="r1"><meta><name> first </name><by role="x">me</by></meta><tag>a</tag><tag>b</tag></rec>
+  <rec id="r2"><meta><name>second</name></meta><tag>c</tag></rec>
+  <rec><meta/></rec>
+</data>"""
+FIELDS = {'name': 'meta/name', 'id': '@id', 'tags': 'tag[]', 'tag': 'tag', 'role': 'meta.by.@role', 'meta': 'meta'}
+
+
+class TestSelect(BackendTestCase):
+
+    def test_select(self):
+        xdict = self.parse(RECORDS)
+        first = xdict.rec[0]
+        selected = select(first, FIELDS)
+        assert selected == {
+            'name': 'first', 'id': 'r1', 'tags': ['a', 'b'], 'tag': ['a', 'b'], 'role': 'x',
+            'meta': {'name': 'first', 'by': {'@role': 'x'}},
+        }
+        assert selected['name'] == str(first['meta/name']) and selected['id'] == first['@id']
+        assert selected['tags'] == [str(t) for t in first['tag[]']] and selected['meta'] == first.meta.unwrap()
+
+    def test_single_traversal(self):
+        selection = Selection.of(FIELDS)
+        assert selection._others == [], "plain tag/tag paths should join the tree of steps"
+        assert Selection(['meta/name', 'a//b', './/name', 'meta/*'])._others == ['a//b', './/name', 'meta/*']
+        assert compile('meta/name[]').elm_steps == ('meta', 'name') and compile('meta/name').path == 'meta/name'
+        assert compile('{urn:x/y}meta/name').elm_steps == ('{urn:x/y}meta', 'name')
+
+    def test_missing(self):
+        xdict = self.parse(RECORDS)
+        selected = select(xdict.rec[2], FIELDS)
+        assert selected == dict(name=None, id=None, tags=[], tag=None, role=None, meta='')
+
+    def test_bulk(self):
+        xdict = self.parse(RECORDS)
+        selected = select(xdict.rec, ['@id', 'tag[]', 'meta.name.#text'])
+        assert [s['@id'] for s in selected] == ['r1', 'r2', None]
+        assert [s['tag[]'] for s in selected] == [['a', 'b'], ['c'], []]
+        assert [s['meta.name.#text'] for s in selected] == ['first', 'second', None]
+        assert selected == [select(r, ['@id', 'tag[]', 'meta.name.#text']) for r in xdict.rec]
+        streamed = [select(r, FIELDS) for r in self.parse_iter(RECORDS, record_tag='rec')]
+        assert streamed == select(xdict.rec, FIELDS)
+
+    def test_path_like(self):
+        fitnessfile = os.path.join(os.path.dirname(__file__), 'inputs', '02-fitness.xml')
+        xdict = self.parse(fitnessfile)
+        selected = select(xdict, {
+            'sources': './/D_child_source', 'first': 'Element1/D[1]/D_child1[1]', 'url': compile('Element1.E.para.ulink.@url'),
+            'ids': 'Element1.F.F_child1.@id', 'title': 'Element1.title.#text',
+        })
+        assert selected['sources'] == [str(s) for s in xdict['.//D_child_source']]
+        assert selected['first'] == 'keywordA1'
+        assert selected['url'] == 'http://example.org/path'
+        assert selected['ids'] == ['MRGID:2546', 'MRGID:2547']
+        assert selected['title'] == 'This is a dataset'
+
+
+@skip_unless_backend('lxml')
+class TestSelectLxml(TestSelect):
+    backend = 'lxml'
+
+
+class TestSelectFrozen(TestSelect):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
@@ -0,0 +1,73 @@
+from util4tests import run_single_test, skip_unless_backend, BackendTestCase
+
+from xmlasdict import parse, compile, walk
+from xmlasdict.tagindex import TagIndex
+
+
+XML = """<r><a n="1"><b n="1.1"><a n="1.1.1"/></b><c/><a n="1.2"><a n="1.2.1"/></a></a>
+  <a n="2"/><b n="3"><c><a n="3.1"/></c></b><d xmlns="urn:x"><a n="4.1"/></d></r>"""
+PATHS = ('.//a', './/b', './/c', './/nothere', './/{urn:x}a', './/{urn:x}d')
+
+
+class TestTagIndex(BackendTestCase):
+
+    def test_same_as_findall(self):
+        xdict = self.parse(XML)
+        index = xdict._doc_index
+        assert isinstance(index, TagIndex)
+        for node in xdict._node.iter():
+            for path in PATHS:
+                assert index.findall(node, path) == node.findall(path), f"differs for {path} from {node.tag}"
+        assert [a['@n'] for a in xdict['.//a']] == ['1', '1.1.1', '1.2', '1.2.1', '2', '3.1']
+        assert [a['@n'] for a in xdict.a[0]['.//a']] == ['1.1.1', '1.2', '1.2.1']
+        assert xdict.a[1]['.//a[]'] == [] and xdict.b.c['.//a']['@n'] == '3.1'
+
+    def test_other_paths(self):
+        xdict = self.parse(XML)
+        index = xdict._doc_index
+        for path in ('a', './a', 'a//a', './/a[@n]', './/*', './/b/a', './/{}a'):
+            assert index.findall(xdict._node, path) is None, f"{path} should be left to findall"
+        assert [a['@n'] for a in xdict['.//b/a[]']] == ['1.1.1']
+
+    def test_shared(self):
+        xdict = self.parse(XML)
+        index = xdict._doc_index
+        # the index of the document is passed on to all wrappers built from it
+        assert xdict.a._doc_index is index and xdict.a[0]._doc_index is index
+        assert all(a._doc_index is index for a in xdict['.//a'])
+        assert xdict.a[0].unpack()._doc_index is index and list(xdict.a)[1]._doc_index is index
+        assert all(v._doc_index is index for path, _, v in walk(xdict) if '@' not in path)
+        assert compile('b.c')(xdict)._doc_index is index
+        assert [a['@n'] for a in compile('.//a[]')(xdict.b)] == ['3.1']
+
+    def test_lazy(self):
+        xdict = self.parse(XML)
+        index = xdict._doc_index
+        str(xdict.a[0].b)
+        assert index._elements is None, "only deep searches should build the index"
+        xdict['.//c']
+        assert len(index._elements) == 13 and index._ends[0] == 13
+
+    def test_switched_off(self):
+        xdict = self.parse(XML)
+        index = xdict._doc_index
+        index.use_tag_index = False
+        assert [a['@n'] for a in xdict['.//a']] == ['1', '1.1.1', '1.2', '1.2.1', '2', '3.1']
+        assert index.findall(xdict._node, './/a') is None and index._elements is None
+
+    def test_not_indexed(self):
+        assert parse(XML, frozen=True)._doc_index is None, "frozen documents have an index of their own"
+        records = list(self.parse_iter(XML, record_tag='a'))
+        assert records[0]._doc_index is None
+        assert [a['@n'] for a in records[0]['.//a']] == ['1.1.1', '1.2', '1.2.1']
+        header = self.parse(XML, stop_after=lambda w: w.tag == 'c')
+        assert [a['@n'] for a in header['.//a']] == ['1', '1.1.1']
+
+
+@skip_unless_backend('lxml')
+class TestTagIndexLxml(TestTagIndex):
+    backend = 'lxml'
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
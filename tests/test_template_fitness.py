@@ -1,16 +1,14 @@
-import unittest
 import os
-from xmlasdict import parse
-from util4tests import run_single_test
+from util4tests import run_single_test, BackendTestCase, skip_unless_backend
 
 
-class TestTemplateFitness(unittest.TestCase):
+class TestTemplateFitness(BackendTestCase):
     """ Particularly tests some expectations we have inside the pysubyt project for dealing with xml
     """
 
     def test_fitness(self):
         fitnessfile = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs', '02-fitness.xml')
-        _ = parse(fitnessfile)
+        _ = self.parse(fitnessfile)
 
         assert f"{_.Element1.B}" == "en", "simple access should yield string content"
         assert f"{_.Element1.empty}" == "", "emtpy elements should evalute to ''"
@@ -47,5 +45,14 @@ class TestTemplateFitness(unittest.TestCase):
         assert not(_.Element1.F.F_child1[0].F_child1_elements.Elem1)
 
 
+@skip_unless_backend('lxml')
+class TestTemplateFitnessLxml(TestTemplateFitness):
+    backend = 'lxml'
+
+
+class TestTemplateFitnessFrozen(TestTemplateFitness):
+    frozen = True
+
+
 if __name__ == '__main__':
     run_single_test(__file__)
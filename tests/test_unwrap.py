@@ -0,0 +1,67 @@
+import os
+import random
+from util4tests import run_single_test, BackendTestCase, skip_unless_backend
+
+from xmlasdict import Wrapper, IterWrapper
+
+
+def recursive_unwrap(wrapper):
+    """ the original recursive unwrap() implementation, expressed through the public Wrapper api
+    """
+    if isinstance(wrapper, IterWrapper):
+        return [recursive_unwrap(w) for w in wrapper]
+
+    def unwrap(value): return recursive_unwrap(value) if isinstance(value, Wrapper) else value
+    return {k: unwrap(wrapper[k]) for k in set(wrapper)} if len(set(wrapper)) > 0 else str(wrapper)
+
+
+def random_xml(rnd: random.Random, depth: int = 0):
+    tag = rnd.choice('abcd')
+    attrs = ''.join(f' {a}="{rnd.randint(0, 9)}"' for a in rnd.sample('xyz', rnd.randint(0, 2)))
+    content = rnd.choice(['', ' text ', 'mixed '])
+    if depth < 5:
+        content += ''.join(random_xml(rnd, depth + 1) + rnd.choice(['', 'tail']) for _ in range(rnd.randint(0, 4)))
+    return f"<{tag}{attrs}>{content}</{tag}>"
+
+
+class TestUnwrap(BackendTestCase):
+
+    def test_same_as_recursive(self):
+        inputs = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'inputs')
+        for name in sorted(os.listdir(inputs)):
+            xdict = self.parse(os.path.join(inputs, name))
+            assert xdict.unwrap() == recursive_unwrap(xdict), f"unwrap() changed for {name}"
+            assert xdict['*'].unwrap() == recursive_unwrap(xdict['*']), f"unwrap() changed for {name}"
+
+    def test_same_as_recursive_random(self):
+        rnd = random.Random(42)
+        for _ in range(200):
+            xdict = self.parse(random_xml(rnd))
+            assert xdict.unwrap() == recursive_unwrap(xdict), f"unwrap() changed for {xdict.dumps()}"
+
+    def test_deep(self):
+        depth = 2000  # beyond the python recursion limit, within the libxml2 depth limit
+        xdict = self.parse("<n>" * depth + "bottom" + "</n>" * depth)
+        unwrapped = xdict.unwrap()
+        for _ in range(depth - 1):
+            unwrapped = unwrapped['n']
+        assert unwrapped == 'bottom'
+
+    def test_wide(self):
+        xdict = self.parse("<r>" + "".join(f"<i n='{n}'>{n}</i>" for n in range(10000)) + "<s> s </s></r>")
+        unwrapped = xdict.unwrap()
+        assert unwrapped['s'] == 's'
+        assert unwrapped['i'] == [{'@n': str(n)} for n in range(10000)]
+
+
+@skip_unless_backend('lxml')
+class TestUnwrapLxml(TestUnwrap):
+    backend = 'lxml'
+
+
+class TestUnwrapFrozen(TestUnwrap):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
@@ -0,0 +1,70 @@
+from util4tests import run_single_test, skip_unless_backend, BackendTestCase
+
+from xmlasdict import Wrapper, walk
+
+
+XML = '<r id="1"><a x="y">one</a><b><c>two</c><c k="v">three</c></b><a>four</a></r>'
+
+
+class TestWalk(BackendTestCase):
+
+    def test_walk(self):
+        xdict = self.parse(XML)
+        events = list(walk(xdict))
+        assert [(path, depth) for path, depth, _ in events] == [
+            ('.', 0), ('@id', 1), ('a[1]', 1), ('a[1]/@x', 2), ('b', 1), ('b/c[1]', 2), ('b/c[2]', 2), ('b/c[2]/@k', 3),
+            ('a[2]', 1),
+        ]
+        assert events[0][2].tag == 'r' and events[1][2] == '1' and events[3][2] == 'y'
+        assert all(isinstance(value, Wrapper) for path, _, value in events if '@' not in path)
+        assert [str(value) for path, _, value in events if path.startswith('b/c')] == ['two', 'three', 'v']
+
+    def test_paths(self):
+        xdict = self.parse(XML)
+        for path, depth, value in walk(xdict):
+            if path != '.':
+                steps = [s.split('[')[0] if '[' in s else s for s in path.split('/')]
+                indexes = [int(s.split('[')[1][:-1]) - 1 if '[' in s else 0 for s in path.split('/')]
+                found = xdict
+                for step, index in zip(steps, indexes):
+                    found = found[step + '[]'][index] if step[0] != '@' else found[step]
+                assert found == value, f"the path {path} should lead to the value"
+
+    def test_prune(self):
+        xdict = self.parse(XML)
+        visited = list()
+
+        def prune(path, depth, wrapper):
+            visited.append(path)
+            return wrapper.tag == 'b'
+
+        assert [path for path, _, _ in walk(xdict, prune=prune)] == ['.', '@id', 'a[1]', 'a[1]/@x', 'b', 'a[2]']
+        assert visited == ['.', 'a[1]', 'b', 'a[2]'], "pruned content is not visited"
+        assert [path for path, _, _ in walk(xdict, max_depth=1)] == ['.', '@id', 'a[1]', 'b', 'a[2]']
+        assert [path for path, _, _ in walk(xdict, max_depth=0)] == ['.']
+
+    def test_iterwrapper(self):
+        xdict = self.parse(XML)
+        assert [(path, value) for path, _, value in walk(xdict.a) if path[-1] != ']'] == [('[1]/@x', 'y')]
+        assert [path for path, _, _ in walk(xdict.b.c)] == ['[1]', '[2]', '[2]/@k']
+
+    def test_deep(self):
+        depth = 2000  # deeper than the recursion limit
+        xdict = self.parse("<n>" * depth + "bottom" + "</n>" * depth)
+        events = list(walk(xdict))
+        assert len(events) == depth and events[-1][1] == depth - 1 and str(events[-1][2]) == 'bottom'
+        assert events[-1][0] == '/'.join(['n'] * (depth - 1))
+        assert xdict.unpack().tag == ['n']
+
+
+@skip_unless_backend('lxml')
+class TestWalkLxml(TestWalk):
+    backend = 'lxml'
+
+
+class TestWalkFrozen(TestWalk):
+    frozen = True
+
+
+if __name__ == "__main__":
+    run_single_test(__file__)
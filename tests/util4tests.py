@@ -1,10 +1,14 @@
+import importlib.util
 import logging
 import logging.config
 import os
 import sys
+import unittest
 import pytest
 import yaml
 from dotenv import load_dotenv
+from xmlasdict import parse, parse_iter
+from xmlasdict.backend import available_backends
 
 
 log = logging.getLogger('tests')
@@ -26,3 +30,30 @@ def run_single_test(testfile):
         "with -v(erbose) and -s(no stdout capturing) " +
         "and logging to stdout, level controlled by env var ${PYTEST_LOGCONF}")
     sys.exit(pytest.main(["-vv", "-s",  testfile]))
+
+
+def skip_unless_backend(name):
+    """ Skips the decorated test(case) if the named parser backend is not available
+    """
+    return unittest.skipUnless(name in available_backends(), f"backend '{name}' is not available")
+
+
+def skip_unless_installed(module: str):
+    """ Skips the decorated test(case) if the (optional dependency) module is not installed
+    """
+    return unittest.skipUnless(importlib.util.find_spec(module) is not None, f"module '{module}' is not installed")
+
+
+class BackendTestCase(unittest.TestCase):
+    """ Base for test cases that should be run against each of the parser backends.
+    Subclasses switch the backend used by self.parse() and self.parse_iter() by overriding the backend attribute,
+    and switch self.parse() to producing frozen documents by overriding the frozen attribute.
+    """
+    backend = 'etree'
+    frozen = False
+
+    def parse(self, *args, **kwargs):
+        return parse(*args, backend=self.backend, frozen=self.frozen, **kwargs)
+
+    def parse_iter(self, *args, **kwargs):
+        return parse_iter(*args, backend=self.backend, **kwargs)
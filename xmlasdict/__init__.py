@@ -8,12 +8,28 @@
 
 """
 
-from .parser import parse
-from .wrapper import Wrapper, IterWrapper
+from .parser import parse, parse_iter, aparse, IncrementalParser
+from .wrapper import Wrapper, IterWrapper, walk
+from .batch import parse_many, ParseResult
+from .path import CompiledPath, compile, select
+from .columns import to_columns, to_dataframe, iter_dataframes
+from .instrument import Instrumentation, instrumented
+from .compare import digest, diff, Difference
+from .cache import (
+    LRUCache, DiskCache, enable_serialization_cache, disable_serialization_cache, serialization_cache,
+    enable_parse_cache, disable_parse_cache, parse_cache,
+)
 from .__version__ import __version__
 import logging
 
-__all__ = ['parse', 'Wrapper', 'IterWrapper', '__version__']
+__all__ = [
+    'parse', 'parse_iter', 'aparse', 'IncrementalParser', 'parse_many', 'ParseResult', 'Wrapper', 'IterWrapper', 'walk',
+    'CompiledPath', 'compile', 'select', 'to_columns', 'to_dataframe', 'iter_dataframes', 'Instrumentation', 'instrumented',
+    'digest', 'diff', 'Difference',
+    'LRUCache', 'DiskCache', 'enable_serialization_cache', 'disable_serialization_cache', 'serialization_cache',
+    'enable_parse_cache', 'disable_parse_cache', 'parse_cache',
+    '__version__'
+]
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
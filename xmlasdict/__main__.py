@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 import argparse
+import json
 import sys
 import logging
 import logging.config
+from multiprocessing import Pool
+from pathlib import Path
+from .parser import parse, parse_iter
+from .batch import ParseResult, _picklable
 
 log = logging.getLogger(__name__)
 
@@ -11,7 +16,7 @@ def get_arg_parser():
     """ Defines the arguments to this script by using Python's [argparse](https://docs.python.org/3/library/argparse.html)
     """
     parser = argparse.ArgumentParser(
-        description='python library to read xml DOM trees as dicts (with iter and gettattribute behaviour)',
+        description='converts xml files (or stdin) to json (or json-lines) following the xmlasdict unwrap() semantics',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 
     parser.add_argument(
@@ -22,14 +27,62 @@ def get_arg_parser():
         help='location of the logging config (yml) to use',
     )
 
-    # TODO define your own command line arguments
+    parser.add_argument(
+        'inputs',
+        type=str,
+        nargs='*',
+        metavar='INPUT',
+        help='xml files to convert, none or - to read from stdin',
+    )
     parser.add_argument(
         '-o',
-        '--option',
+        '--output',
+        type=str,
+        action='store',
+        help='file to write to, defaults to stdout',
+    )
+    parser.add_argument(
+        '-f',
+        '--format',
+        choices=['json', 'jsonl'],
+        default='json',
+        help='json produces one document, jsonl produces one line per (converted record of each) input',
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '-r',
+        '--record',
         type=str,
         action='store',
-        help='Some Option',
-        default='TheOptionValue',
+        metavar='TAG',
+        help='stream (with constant memory) the elements with this tag-name as separate records',
+    )
+    mode.add_argument(
+        '-u',
+        '--unpack',
+        action='store_true',
+        help='convert the rows produced by unpack()',
+    )
+    mode.add_argument(
+        '-t',
+        '--tag',
+        type=str,
+        action='store',
+        help='the tag-name to stop unpacking at (implies --unpack)',
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=1,
+        help='number of processes to convert multiple input files in parallel',
+    )
+    parser.add_argument(
+        '-i',
+        '--indent',
+        type=int,
+        action='store',
+        help='indentation for pretty-printed json (ignored for jsonl)',
     )
     return parser
 
@@ -40,7 +93,85 @@ def enable_logging(args: argparse.Namespace):
     import yaml   # conditional dependency -- we only need this (for now) when logconf needs to be read
     with open(args.logconf, 'r') as yml_logconf:
         logging.config.dictConfig(yaml.load(yml_logconf, Loader=yaml.SafeLoader))
-    log.info(f"Logging enabled according to config in {args.logconf}")
+    log.info("Logging enabled according to config in %s", args.logconf)
+
+
+def convert(source, record: str = None, unpack: bool = False, tag: str = None):
+    """ Converts the source (file-path or stdin) into a sequence of native py items:
+    one per record, one per unpacked row, or the single unwrapped document.
+    """
+    if record is not None:
+        yield from (rec.unwrap() for rec in parse_iter(source, record_tag=record))
+        return
+    # else
+    xdict = parse(source)
+    if not unpack:
+        yield xdict.unwrap()
+        return
+    # else
+    yield from (row.unwrap() for row in xdict.unpack(tag=tag))
+
+
+def convert_file(task):
+    """ Converts one file (in a worker process) into the list of its items, just as :func:`convert` streams them,
+    capturing any error into the returned :class:`~xmlasdict.ParseResult`
+    """
+    path, record, unpack, tag = task
+    try:
+        return ParseResult(path, value=list(convert(Path(path), record, unpack, tag)))
+    except Exception as e:
+        log.debug("failed to convert %s: %s", path, e)
+        return ParseResult(path, error=_picklable(e))
+
+
+def converted(args: argparse.Namespace):
+    """ Yields (source, items) with the items converted from each of the inputs, in order.
+    """
+    inputs = [sys.stdin if i == '-' else i for i in args.inputs] or [sys.stdin]
+    if args.workers > 1 and len(inputs) > 1:
+        assert sys.stdin not in inputs, "stdin can not be combined with multiple workers"
+        tasks = ((path, args.record, args.unpack, args.tag) for path in inputs)
+        with Pool(min(args.workers, len(inputs))) as pool:
+            for result in pool.imap(convert_file, tasks):
+                yield result.path, result.value if result.ok else result.error
+        return
+    # else convert one by one, streaming the items as they are produced
+    for source in inputs:
+        # stdin as bytes to let the parser handle the declared encoding, any other input as a Path
+        # so it is always read as a file, even if it does not exist or happens to start with '<'
+        source = sys.stdin.buffer if source is sys.stdin else Path(source)
+        yield source, convert(source, args.record, args.unpack, args.tag)
+
+
+def write(args: argparse.Namespace, out):
+    """ Writes all converted items to out, returns the number of inputs that failed to convert
+    """
+    args.unpack = args.unpack or args.tag is not None
+    indent = args.indent if args.format == 'json' else None
+    single = len(args.inputs) <= 1 and args.record is None and not args.unpack  # produce a single json object
+    separator = '' if single else '[\n' if indent is not None else '['
+    failed = 0
+    for source, items in converted(args):
+        try:
+            if isinstance(items, Exception):
+                raise items
+            for item in items:
+                dumped = json.dumps(item, ensure_ascii=False, indent=indent)
+                if args.format == 'jsonl':
+                    out.write(dumped + '\n')
+                    continue
+                out.write(separator + dumped)
+                separator = ',\n' if indent is not None else ','
+        except Exception as e:  # streamed conversion errors only surface while iterating the items
+            log.debug("conversion of %s failed", source, exc_info=True)
+            log.error("could not convert %s: %s: %s", source, type(e).__name__, e)
+            failed += 1
+    if args.format == 'json' and not single:
+        empty = separator[0] == '['  # the list was never opened
+        out.write('[]' if empty else '\n]' if indent is not None else ']')
+    if args.format == 'json':
+        out.write('\n')
+    return failed
 
 
 def main():
@@ -49,8 +180,13 @@ def main():
     args = get_arg_parser().parse_args()
     enable_logging(args)
 
-    log.info("The args passed to %s are: %s." % (sys.argv[0], args))
-    log.debug("Some Logging")
+    log.info("The args passed to %s are: %s.", sys.argv[0], args)
+    if args.output is None:
+        failed = write(args, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            failed = write(args, out)
+    sys.exit(1 if failed > 0 else 0)
 
 
 if __name__ == '__main__':
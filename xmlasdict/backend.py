@@ -0,0 +1,251 @@
+from functools import lru_cache
+from xml.etree import ElementTree, ElementPath
+import logging
+import re
+
+
+log = logging.getLogger(__name__)
+CHUNK_SIZE = 16 * 1024 * 1024  # size of the slices in which buffers are fed to the parsers
+PLAIN_TAG = re.compile(r'(?:\{[^{}]*\})?[^/*\[\]@.{}]+')  # (optionally {namespace} prefixed) tag-names, not paths
+
+
+def chunked(buffer, chunk_size: int = CHUNK_SIZE):
+    """ Yields the content of the (bytes-like) buffer as memoryview slices, without copying
+    """
+    with memoryview(buffer) as view, view.cast('B') as data:
+        for start in range(0, len(data), chunk_size):
+            with data[start:start + chunk_size] as chunk:
+                yield chunk
+
+
+def filechunks(xmlfile, chunk_size: int = 64 * 1024):
+    """ Yields the content of the opened xmlfile in chunks
+    """
+    chunk = xmlfile.read(chunk_size)
+    while chunk:
+        yield chunk
+        chunk = xmlfile.read(chunk_size)
+
+
+class EtreeBackend:
+    """ The default backend: parsing and path-queries by the standard library xml.etree.ElementTree
+    """
+    name = 'etree'
+
+    @property
+    def element_type(self):
+        return ElementTree.Element
+
+    def parse(self, source):
+        """ Parses the xml file (path or binary file object) and returns its root element
+        """
+        return ElementTree.parse(source).getroot()
+
+    def fromstring(self, text):
+        """ Parses the actual XML content and returns its root element
+        """
+        return ElementTree.fromstring(text)
+
+    def frombuffer(self, buffer):
+        """ Parses the actual XML content in a bytes-like buffer (e.g. memoryview or mmap) and returns its root element,
+        the content is fed to the parser in slices, without copying
+        """
+        parser = ElementTree.XMLParser()
+        for chunk in self.chunks(buffer):
+            parser.feed(chunk)
+        return parser.close()
+
+    def chunks(self, buffer, chunk_size: int = CHUNK_SIZE):
+        """ Yields the content of the bytes-like buffer in slices that can be fed to the (pull)parsers of this backend
+        """
+        return chunked(buffer, chunk_size)
+
+    def pullparser(self, events=('end', )):
+        """ Returns a (non-blocking) XMLPullParser to which XML content (str or bytes) can be fed incrementally
+        """
+        return ElementTree.XMLPullParser(events=events)
+
+    def findall(self, node, path: str):
+        """ Returns the list of elements that match the ElementTree-path (see ElementTree.node.findall) from the node
+        """
+        return node.findall(path)
+
+    def compile(self, path: str):
+        """ Parses the ElementTree-path once, into a function returning the list of matching elements from a node
+        """
+        if PLAIN_TAG.fullmatch(path) is not None:  # for which findall() has a (faster) shortcut of its own
+            return lambda node: node.findall(path)
+        try:
+            selector = _etree_selector(path)
+        except AttributeError:  # should the ElementPath internals ever change, just leave the parsing to findall
+            return lambda node: node.findall(path)
+        if len(selector) == 0:
+            return lambda node: []
+
+        def select(node):
+            result = [node]
+            context = ElementPath._SelectorContext(node)
+            for step in selector:
+                result = step(context, result)
+            return list(result)
+        return select
+
+
+@lru_cache(maxsize=256)
+def _etree_selector(path: str):
+    """ the tuple of ElementPath selector steps for the path, built like ElementPath.iterfind does,
+    but held in a cache of its own that is not cleared as a whole when it fills up
+    """
+    if path[-1:] == "/":
+        path = path + "*"  # implicit all
+    if path[:1] == "/":
+        raise SyntaxError("cannot use absolute path on element")
+    tokens = iter(ElementPath.xpath_tokenizer(path))
+    selector = []
+    for token in tokens:  # where each of the ops consumes the further tokens it needs
+        if token[0] == "/" and len(selector) > 0:
+            continue  # the separator in between steps
+        try:
+            selector.append(ElementPath.ops[token[0]](tokens.__next__, token))
+        except StopIteration:
+            raise SyntaxError("invalid path") from None
+    return tuple(selector)
+
+
+class LxmlBackend(EtreeBackend):
+    """ Backend using the C-parser and compiled XPath expressions of `lxml <https://lxml.de/>`_
+
+    Comments and processing instructions are left out of the parsed tree, internal entities are resolved,
+    and (huge_tree) size limits are lifted, all in line with what the standard library does.
+    Note that libxml2 still limits the nesting depth of documents to 2048 levels.
+    The elements are serialized with the standard library so the produced XML is the same for both backends.
+    """
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree   # conditional dependency -- we only need this when the lxml backend is requested
+        self._etree = etree
+
+    @property
+    def element_type(self):
+        return self._etree._Element
+
+    def _parser(self, **options):
+        return self._etree.XMLParser(remove_comments=True, remove_pis=True, huge_tree=True, **options)
+
+    def parse(self, source):
+        return self._etree.parse(source, self._parser()).getroot()
+
+    def fromstring(self, text):
+        if isinstance(text, str):  # lxml refuses str with an encoding declaration, so pass it as utf-8 encoded bytes
+            return self._etree.fromstring(text.encode('utf-8'), self._parser(encoding='utf-8'))
+        return self._etree.fromstring(text, self._parser())
+
+    def frombuffer(self, buffer):
+        parser = self._parser()
+        for chunk in self.chunks(buffer):
+            parser.feed(chunk)
+        return parser.close()
+
+    def chunks(self, buffer, chunk_size: int = CHUNK_SIZE):
+        for chunk in chunked(buffer, chunk_size):
+            yield bytes(chunk)  # lxml only accepts bytes, so these slices do get copied
+
+    def pullparser(self, events=('end', )):
+        return self._etree.XMLPullParser(events=events, remove_comments=True, remove_pis=True, huge_tree=True)
+
+    def findall(self, node, path: str):
+        return self._compiled(path)(node)
+
+    @lru_cache(maxsize=256)
+    def _compiled(self, path: str):
+        return self.compile(path)
+
+    def compile(self, path: str):
+        xpath = self._xpath(path)
+        if xpath is None:  # leave it to the ElementTree-path support (and its error reporting) in lxml itself
+            return lambda node: node.findall(path)
+
+        def select(node):
+            try:
+                found = xpath(node)
+                if isinstance(found, list) and all(isinstance(elm, self._etree._Element) for elm in found):
+                    return found
+            except self._etree.XPathError:
+                pass
+            return node.findall(path)
+        return select
+
+    def _xpath(self, path: str):
+        """ compiles the ElementTree-path as XPath, None if it can not be expressed as such
+        """
+        if path.startswith('/'):  # ElementTree does not allow absolute paths
+            return None
+        if '{*}' in path or '{}' in path:  # ElementTree namespace wildcards have no XPath equivalent
+            return None
+        try:
+            return self._etree.ETXPath(path)  # unlike plain XPath this supports the {namespace}tag notation
+        except self._etree.XPathError:
+            return None
+
+
+BACKENDS = dict(etree=EtreeBackend, lxml=LxmlBackend)
+DEFAULT_BACKEND = 'etree'
+_loaded = dict()         # name -> loaded backend
+_element_types = dict()  # element-type -> loaded backend
+
+
+def get_backend(name: str = None):
+    """ Returns the backend with the given name, falling back to the default backend if it is not available.
+
+    :param name: the name of the backend (one of 'etree' or 'lxml'), None for the default one
+    :type name: str
+    """
+    name = name or DEFAULT_BACKEND
+    assert name in BACKENDS, f"unknown backend '{name}', choose one of {list(BACKENDS)}"
+    if name not in _loaded:
+        try:
+            backend = BACKENDS[name]()
+        except ImportError:
+            log.warning("backend '%s' is not available, falling back to '%s'", name, DEFAULT_BACKEND)
+            return get_backend(DEFAULT_BACKEND)
+        _loaded[name] = backend
+        register_element_type(backend.element_type, backend)
+    return _loaded[name]
+
+
+def register_element_type(element_type, backend):
+    """ Registers the backend to handle the (path-queries on) elements of the given type,
+    without making it available for parsing through :func:`~get_backend`
+    """
+    _element_types[element_type] = backend
+
+
+def available_backends():
+    """ Returns the list of backend names that can actually be used
+    """
+    return [name for name in BACKENDS if get_backend(name).name == name]
+
+
+def backend_of(node):
+    """ Returns the backend that produced the node, None if this is not an element of any loaded backend
+    """
+    backend = _element_types.get(type(node))
+    if backend is None:  # allow for subclasses
+        backend = next((b for t, b in _element_types.items() if isinstance(node, t)), None)
+    return backend
+
+
+def is_element(node):
+    """ Checks if the node is an element produced by any of the backends
+    """
+    return backend_of(node) is not None
+
+
+def findall(node, path: str):
+    """ Returns the list of elements that match the ElementTree-path, using the backend that produced the node
+    """
+    return backend_of(node).findall(node, path)
+
+
+get_backend(DEFAULT_BACKEND)
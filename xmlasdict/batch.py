@@ -0,0 +1,82 @@
+from multiprocessing import Pool
+from pathlib import Path
+from typing import NamedTuple, Any
+import os
+import pickle
+import logging
+from .parser import parse
+
+
+log = logging.getLogger(__name__)
+
+
+class ParseResult(NamedTuple):
+    """ The outcome of parsing (and transforming) one of the files passed to :func:`~parse_many`
+    """
+    path: str                # the path of the parsed file
+    value: Any = None        # the result of the transform applied to the parsed file, None in case of error
+    error: Exception = None  # the exception raised while parsing or transforming the file, None in case of success
+
+    @property
+    def ok(self):
+        """ True if the file was parsed and transformed without error """
+        return self.error is None
+
+
+def unwrap(xdict):
+    """ The default transform of :func:`~parse_many`: the native py representation of the parsed content
+    """
+    return xdict.unwrap()
+
+
+def parse_many(paths, transform=None, workers: int = None, chunksize: int = 1, ordered: bool = True, backend: str = None):
+    """ Parses many xml files, spreading the work over a pool of worker processes.
+    Each file is parsed with :func:`~xmlasdict.parse` and then passed to the transform,
+    errors are collected per file so one bad document doesn't stop the batch.
+
+    :param paths: the file-paths of the xml files to parse
+    :param transform: picklable (i.e. module level) function turning the parsed :class:`~xmlasdict.Wrapper` into
+        a picklable result, defaults to calling unwrap()
+    :param workers: number of worker processes, defaults to the number of cpus, 0 or 1 to work in the current process
+    :type workers: int
+    :param chunksize: number of files handed to a worker at once
+    :type chunksize: int
+    :param ordered: yield the results in the order of the paths (default) or as they complete
+    :type ordered: bool
+    :param backend: the parser backend to use: 'etree' (default, the standard library) or 'lxml' (if installed)
+    :type backend: str
+    :return: generator of :class:`~ParseResult` for each of the paths
+    """
+    transform = transform or unwrap
+    tasks = ((path, transform, backend) for path in paths)
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1:
+        yield from map(_parse_one, tasks)
+        return
+    # else
+    log.debug("parsing in a pool of %d workers with chunksize %d", workers, chunksize)
+    with Pool(workers) as pool:
+        fanout = pool.imap if ordered else pool.imap_unordered
+        yield from fanout(_parse_one, tasks, chunksize=chunksize)
+
+
+def _parse_one(task):
+    """ parses and transforms one file, capturing any error into the returned ParseResult
+    """
+    path, transform, backend = task
+    try:
+        # as a Path it is always read as a file, even if it does not exist or happens to start with '<'
+        return ParseResult(path, value=transform(parse(Path(path), backend=backend)))
+    except Exception as e:
+        log.debug("failed to parse %s: %s", path, e)
+        return ParseResult(path, error=_picklable(e))
+
+
+def _picklable(error: Exception) -> Exception:
+    """ the error itself if it can be passed back from a worker process, else a RuntimeError describing it
+    """
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
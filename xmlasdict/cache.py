@@ -0,0 +1,337 @@
+from collections import OrderedDict
+from threading import Lock
+import os
+import sys
+import tempfile
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """ A least-recently-used cache, bounded by a maximum number of entries and/or a maximum (estimated) size in bytes.
+    When adding an entry makes the cache exceed any of those bounds the least recently used entries are evicted.
+
+    The :func:`~LRUCache.stats` keep track of hits, misses and evictions to allow sizing the cache under actual load.
+
+    :param max_entries: maximum number of entries to hold, None for no limit
+    :param max_bytes: maximum size in bytes (according to the sizeof function) to hold, None for no limit
+    :param sizeof: function estimating the size in bytes of the cached values
+    """
+    def __init__(self, max_entries: int = None, max_bytes: int = None, sizeof=sys.getsizeof):
+        assert max_entries is None or max_entries > 0, "max_entries should be positive (or None for no limit)"
+        assert max_bytes is None or max_bytes > 0, "max_bytes should be positive (or None for no limit)"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size), least recently used first
+        self._bytes = 0
+        self._lock = Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key, default=None, valid=None):
+        """ Returns the value cached for the key (marking it as recently used), or the default if not available.
+
+        :param valid: optional function checking if the cached value can (still) be used,
+            if not it is dropped and this counts as a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and valid is not None and not valid(entry[0]):
+                self._discard(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return default
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        """ Adds (or replaces) the value for the key, evicting the least recently used entries as needed.
+        Values that on their own exceed max_bytes are not cached at all.
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            self._discard(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def discard(self, key):
+        """ Removes the entry for the key, if any.
+        """
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        """ Removes all entries and resets the stats.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self):
+        """ Returns a dict with the current hits, misses, evictions, entries and bytes of this cache.
+        """
+        with self._lock:
+            return dict(
+                hits=self._hits, misses=self._misses, evictions=self._evictions,
+                entries=len(self._entries), bytes=self._bytes,
+                max_entries=self.max_entries, max_bytes=self.max_bytes,
+            )
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCache:
+    """ A cache of binary entries stored as files in a directory, bounded by a maximum total size in bytes.
+    When adding an entry makes the directory exceed that size the least recently used entries are evicted.
+
+    Entries are written to a temporary file that is then atomically renamed into place, so concurrent readers
+    and writers (threads or processes on one machine) only ever see complete entries.
+    Every process keeps its own :func:`~DiskCache.stats`, the entries themselves are shared.
+
+    :param directory: the directory to store the entries in, created if needed
+    :param max_bytes: maximum total size in bytes of the entries to hold, None for no limit
+    """
+    SUFFIX = '.cache'
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        assert max_bytes is None or max_bytes > 0, "max_bytes should be positive (or None for no limit)"
+        self.directory = os.path.abspath(os.fspath(directory))
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def _path(self, key: str):
+        assert len(key) > 0 and os.path.basename(key) == key and key[0] != '.', f"invalid key '{key}', use plain file-names"
+        return os.path.join(self.directory, key + DiskCache.SUFFIX)
+
+    def get(self, key: str, valid=None):
+        """ Returns the bytes cached for the key (marking it as recently used), or None if not available.
+
+        :param valid: optional function checking if the cached bytes can (still) be used, if not this counts as a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as entry:
+                data = entry.read()
+            os.utime(path)
+        except OSError:  # not there, or evicted meanwhile
+            data = None
+        if data is not None and valid is not None and not valid(data):
+            data = None
+        with self._lock:
+            if data is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return data
+
+    def put(self, key: str, data):
+        """ Adds (or replaces) the bytes for the key, evicting the least recently used entries as needed.
+        Entries that on their own exceed max_bytes are not cached at all.
+        """
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        handle, temp = tempfile.mkstemp(dir=self.directory, prefix=key, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry:
+                entry.write(data)
+            os.replace(temp, self._path(key))
+        except BaseException:
+            os.remove(temp)
+            raise
+        self._evict()
+
+    def _entries(self):
+        """ the list of (last use, size, path) of the current entries, least recently used first
+        """
+        entries = list()
+        with os.scandir(self.directory) as found:
+            for entry in found:
+                if not entry.name.endswith(DiskCache.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:  # removed meanwhile
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                with self._lock:
+                    self._evictions += 1
+            except OSError:  # removed by some other process, or still open for reading (on windows)
+                pass
+            total -= size
+
+    def discard(self, key: str):
+        """ Removes the entry for the key, if any.
+        """
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """ Removes all entries and resets the stats.
+        """
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self):
+        """ Returns a dict with the hits, misses and evictions (of this process), and the current entries and bytes.
+        """
+        entries = self._entries()
+        with self._lock:
+            return dict(
+                hits=self._hits, misses=self._misses, evictions=self._evictions,
+                entries=len(entries), bytes=sum(size for _, size, _ in entries),
+                max_bytes=self.max_bytes, directory=self.directory,
+            )
+
+    def __contains__(self, key: str):
+        return os.path.exists(self._path(key))
+
+    def __len__(self):
+        return len(self._entries())
+
+
+_disk_caches = dict()  # directory -> the DiskCache used for it by parse()
+_disk_caches_lock = Lock()
+
+
+def disk_cache(directory):
+    """ Returns the :class:`~DiskCache` for the directory, (re)using a single instance per directory.
+
+    :param directory: the path of the directory, or a :class:`~DiskCache` (which is returned as is)
+    :rtype: DiskCache
+    """
+    if isinstance(directory, DiskCache):
+        return directory
+    path = os.path.abspath(os.fspath(directory))
+    with _disk_caches_lock:
+        if path not in _disk_caches:
+            _disk_caches[path] = DiskCache(path)
+        return _disk_caches[path]
+
+
+_serializations = None  # the opt-in cache for xml serializations, None when disabled
+
+
+def enable_serialization_cache(max_bytes: int = 16 * 1024 * 1024, max_entries: int = None):
+    """ Enables caching the XML serializations produced by str(wrapper) and wrapper.dumps()
+    Entries are kept per element and evicted (least recently used first) by the size of the produced strings.
+
+    Note that the cache keeps the serialized elements alive, and assumes the wrapped XML trees are not changed.
+
+    :param max_bytes: maximum size in bytes of the cached serializations
+    :param max_entries: maximum number of cached serializations, None for no limit
+    :return: the enabled cache, to inspect its stats()
+    :rtype: LRUCache
+    """
+    global _serializations
+    _serializations = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda entry: sys.getsizeof(entry[1]))
+    log.debug("enabled serialization cache with max_bytes=%s and max_entries=%s", max_bytes, max_entries)
+    return _serializations
+
+
+def disable_serialization_cache():
+    """ Disables (and drops) the cache for XML serializations.
+    """
+    global _serializations
+    _serializations = None
+
+
+def serialization_cache():
+    """ Returns the active cache for XML serializations, or None if not enabled.
+
+    :rtype: LRUCache
+    """
+    return _serializations
+
+
+_parses = None  # the opt-in cache for parsed files, None when disabled
+
+
+def enable_parse_cache(max_entries: int = 128, max_bytes: int = None):
+    """ Enables memoizing :func:`~xmlasdict.parse` for files passed by their path, in this process.
+    Parsing the same file again returns the very same :class:`~xmlasdict.Wrapper`, as long as the size and mtime
+    of the file are unchanged. Entries are evicted (least recently used first) by their number and/or size,
+    where the size of the (not yet parsed) file is used as estimate of the memory taken.
+
+    Note that the cached wrappers are shared, so the wrapped XML trees should not be changed.
+
+    :param max_entries: maximum number of cached documents, None for no limit
+    :param max_bytes: maximum total size in bytes of the cached files, None for no limit
+    :return: the enabled cache, to inspect its stats() or clear() it
+    :rtype: LRUCache
+    """
+    global _parses
+    _parses = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda entry: entry[0])
+    log.debug("enabled parse cache with max_entries=%s and max_bytes=%s", max_entries, max_bytes)
+    return _parses
+
+
+def disable_parse_cache():
+    """ Disables (and drops) the cache for parsed files.
+    """
+    global _parses
+    _parses = None
+
+
+def parse_cache():
+    """ Returns the active cache for parsed files, or None if not enabled.
+
+    :rtype: LRUCache
+    """
+    return _parses
+
+
+def serialized(node, serialize):
+    """ Returns serialize(node), from the serialization cache if that is enabled
+    """
+    cache = _serializations
+    if cache is None:
+        return serialize(node)
+    key = (serialize, id(node))
+    entry = cache.get(key)
+    if entry is not None:
+        return entry[1]
+    text = serialize(node)
+    cache.put(key, (node, text))  # holding on to the node ensures its id is not reused while cached
+    return text
@@ -0,0 +1,199 @@
+from itertools import islice
+from .wrapper import Wrapper, IterWrapper, textXML
+from .path import CompiledPath
+import logging
+
+
+log = logging.getLogger(__name__)
+BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}  # the xsd:boolean lexical space
+
+
+def to_columns(records, fields, dtypes: dict = None, missing: dict = None):
+    """ Extracts the fields from each of the records, in one single pass, into typed NumPy arrays (one per field).
+
+    e.g. ``to_columns(xdict.unpack(), fields={'id': '@id', 'depth': 'measure/depth'}, dtypes={'depth': float})``
+
+    Each field is the access path (see :class:`~xmlasdict.CompiledPath`) to evaluate on each record,
+    yielding the value of an attribute (``'@name'`` as last step), or else the (stripped) text of the element.
+    Where a path matches more than one element, only the first is used.
+
+    Text ends up in arrays of dtype object unless some other dtype is requested for the field.
+    Where the path matches nothing for some record the missing value is used, which defaults to
+    ``nan`` for float, ``NaT`` for datetime, ``''`` for fixed-length str and ``None`` for object arrays.
+    For int and bool arrays, which have no such value, a missing value must be given if any value is missing.
+    Boolean text is read as in xsd:boolean ('true', 'false', '1' or '0').
+
+    Requires NumPy to be installed.
+
+    :param records: the records, as :class:`~xmlasdict.IterWrapper`, or any iterable of :class:`~xmlasdict.Wrapper`
+        (e.g. the streaming :func:`~xmlasdict.parse_iter`), or raw elements
+    :param fields: dict of the column names to the paths to evaluate, or a list of paths (also used as column names)
+    :param dtypes: dict of column names to the NumPy dtype to convert their values to, object if not given
+    :type dtypes: dict
+    :param missing: dict of column names to the value to use where the path matches nothing
+    :type missing: dict
+    :return: dict of the column names to the NumPy arrays, in the order of the fields
+    :rtype: dict
+    """
+    import numpy   # conditional dependency -- we only need this when columns are requested
+    if not isinstance(fields, dict):
+        fields = {path: path for path in fields}
+    dtypes = dtypes or dict()
+    missing = missing or dict()
+    assert set(dtypes) <= set(fields), f"dtypes given for unknown fields {set(dtypes) - set(fields)}"
+    paths = [CompiledPath(path) if not isinstance(path, CompiledPath) else path for path in fields.values()]
+    values = [list() for _ in paths]
+    for node in _recordnodes(records):
+        for path, column in zip(paths, values):
+            column.append(_value(node, path))
+    return {
+        name: _column(numpy, name, column, dtypes.get(name), missing.get(name))
+        for name, column in zip(fields, values)
+    }
+
+
+def _recordnodes(records):
+    """ the raw elements of the records
+    """
+    if isinstance(records, (Wrapper, IterWrapper)):
+        return CompiledPath._startnodes(records)
+    return (r._node if isinstance(r, Wrapper) else r for r in records)
+
+
+def _value(node, path: CompiledPath):
+    """ the str value of the path in the node, None if missing
+    """
+    node = path._first(node)  # i.e. path.find() through the path compiled for the backend of the (raw) node
+    if node is None:
+        return None
+    if path.attribute is not None:
+        return node.get(path.attribute)
+    return textXML(node)
+
+
+def _column(numpy, name: str, values: list, dtype, missing):
+    """ turns the values (str or None) into an array of the dtype
+    """
+    dtype = numpy.dtype(dtype if dtype is not None else object)
+    if missing is None:
+        missing = {'f': numpy.nan, 'c': numpy.nan, 'M': 'NaT', 'm': 'NaT', 'U': '', 'S': b''}.get(dtype.kind)
+    if missing is not None or dtype.kind == 'O':
+        values = [missing if v is None else v for v in values]
+    elif None in values:
+        raise ValueError(f"field '{name}' has missing values, which requires a missing value for dtype {dtype}")
+    if dtype.kind == 'b':
+        values = [v if isinstance(v, bool) else _boolean(name, v) for v in values]
+    if dtype.kind == 'O':
+        column = numpy.empty(len(values), dtype=object)  # avoids numpy interpreting the values
+        column[:] = values
+        return column
+    return numpy.array(values, dtype=dtype)
+
+
+def to_dataframe(records, fields=None, dtypes: dict = None, missing: dict = None):
+    """ Builds a pandas DataFrame with one row per record.
+
+    Without fields, all content of the records is flattened into columns with dotted names:
+    the text of the nested leaf elements (e.g. ``'measure.depth'``), and their attributes (e.g. ``'measure.@unit'``),
+    where repeated elements get their position appended (e.g. ``'keyword'``, ``'keyword[2]'``, ...),
+    dots in tag-names are escaped (e.g. ``'measure.unit\\.code'`` for ``<measure><unit.code/></measure>``),
+    and the attributes of the record itself are named ``'@attribute'``, its text (if a leaf) ``'#text'``.
+    Records lacking some column get a missing value (None, or NaN) there,
+    and the text of elements with nested elements (mixed content) is left out.
+    With fields, the columns are extracted as by :func:`~xmlasdict.to_columns`.
+
+    The columns are collected in plain lists (rather than building a dict per row) before making up the frame.
+    Requires pandas to be installed.
+
+    :param records: the records, as :class:`~xmlasdict.IterWrapper`, or any iterable of :class:`~xmlasdict.Wrapper`
+        (e.g. the streaming :func:`~xmlasdict.parse_iter`), or raw elements
+    :param fields: dict of the column names to the paths to evaluate, or a list of paths, None to flatten all content
+    :param dtypes: dict of column names to the dtype to convert their values to, object if not given
+    :type dtypes: dict
+    :param missing: dict of column names to the value to use where the path matches nothing (only used with fields)
+    :type missing: dict
+    :rtype: pandas.DataFrame
+    """
+    import pandas   # conditional dependency -- we only need this when a dataframe is requested
+    if fields is not None:
+        return pandas.DataFrame(to_columns(records, fields, dtypes, missing))
+    # else
+    columns = _flattened(_recordnodes(records))
+    frame = pandas.DataFrame(columns, columns=list(columns))
+    return frame.astype(dtypes) if dtypes else frame
+
+
+def iter_dataframes(records, chunksize: int = 10000, fields=None, dtypes: dict = None, missing: dict = None):
+    """ Yields pandas DataFrames of (at most) chunksize rows, see :func:`~to_dataframe`,
+    to handle the (streamed) records without ever holding all of them, or the full frame, in memory.
+    Note that when flattening all content, the chunks only hold the columns found in their records.
+
+    :param chunksize: the maximum number of rows per frame
+    :type chunksize: int
+    :return: generator of pandas.DataFrame
+    """
+    assert chunksize > 0, "chunksize should be positive"
+    records = iter(_recordnodes(records))
+    chunk = list(islice(records, chunksize))
+    while len(chunk) > 0:
+        yield to_dataframe(chunk, fields, dtypes, missing)
+        chunk = list(islice(records, chunksize))
+
+
+def _flattened(nodes):
+    """ the dict of the dotted names to the lists of the (flattened) values in each of the nodes
+    """
+    columns = dict()
+    rows = 0
+    for node in nodes:
+        for name, value in _flattened_items(node):
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * rows
+            column.append(value)
+        rows += 1
+        for column in columns.values():
+            if len(column) < rows:
+                column.append(None)
+    return columns
+
+
+def _flattened_items(node):
+    """ yields the (dotted name, value) of the attributes and leaf elements of the node (and its descendants),
+    in document order
+    """
+    yield from _attribute_items(node, '')
+    if len(node) == 0:
+        yield '#text', textXML(node)
+    todo = [(iter(node), '', dict())]  # the children still to flatten, their prefix and the counts of their tags
+    while len(todo) > 0:
+        children, prefix, counts = todo[-1]
+        child = next(children, None)
+        if child is None:
+            todo.pop()
+            continue
+        count = counts[child.tag] = counts.get(child.tag, 0) + 1
+        name = prefix + _escaped(child.tag) + (f'[{count}]' if count > 1 else '')
+        yield from _attribute_items(child, name + '.')
+        if len(child) == 0:
+            yield name, textXML(child)
+        else:  # descend first, to keep the columns in document order
+            todo.append((iter(child), name + '.', dict()))
+
+
+def _attribute_items(node, prefix: str):
+    """ the (dotted name, value) of the attributes of the node """
+    return ((f"{prefix}@{attr}", value) for attr, value in node.attrib.items())
+
+
+def _escaped(tag: str):
+    """ the tag-name with the dots in its local name escaped, to not mistake these for the separators of the names """
+    namespace, brace, local = tag.rpartition('}')
+    return namespace + brace + local.replace('.', '\\.')
+
+
+def _boolean(name: str, value: str):
+    boolean = BOOLEANS.get(value.strip().lower())
+    if boolean is None:
+        raise ValueError(f"field '{name}' has non-boolean value '{value}'")
+    return boolean
@@ -0,0 +1,191 @@
+from hashlib import blake2b
+from typing import NamedTuple, Any
+from weakref import WeakKeyDictionary, ref
+from .cache import LRUCache
+from .frozen import FrozenElement
+import logging
+
+
+log = logging.getLogger(__name__)
+DIGEST_SIZE = 16
+
+_digests = WeakKeyDictionary()  # element -> the digest of its subtree, for the elements supporting weak references
+_held_digests = LRUCache(max_entries=64 * 1024)  # id(element) -> (element, digest), for all other (e.g. lxml) elements
+_weakrefable = dict()  # element type -> if it supports weak references
+
+
+def _memoized(node):
+    """ the memoized digest of the node, None if not (or no longer) available
+    """
+    if isinstance(node, FrozenElement):  # these proxies come and go, so memoize by the document
+        return node._doc.digests.get(node._index)
+    if _supports_weakref(node):
+        return _digests.get(node)
+    entry = _held_digests.get(id(node))
+    return entry[1] if entry is not None and entry[0] is node else None
+
+
+def _memoize(node, digest: bytes):
+    if isinstance(node, FrozenElement):
+        node._doc.digests[node._index] = digest
+    elif _supports_weakref(node):
+        _digests[node] = digest
+    else:
+        _held_digests.put(id(node), (node, digest))  # holding on to the node ensures its id is not reused while cached
+
+
+def _supports_weakref(node):
+    supported = _weakrefable.get(type(node))
+    if supported is None:
+        try:
+            ref(node)
+            supported = True
+        except TypeError:
+            supported = False
+        _weakrefable[type(node)] = supported
+    return supported
+
+
+def _strip(text: str):
+    return str(text or '').strip()
+
+
+def element_digest(node):
+    """ Returns the content digest of the (subtree of the) element, covering its tag, attributes, (stripped) text and
+    the digests and (stripped) tails of its child elements, but not its own tail.
+    The digests of the element and all its descendants are memoized, assuming the XML tree remains unchanged.
+    Elements that do not support weak references (i.e. those of lxml) are memoized in a bounded cache holding on to them.
+    Computing it visits every element once, in a single (non-recursive) pass, so wide and deep trees are handled alike.
+
+    :param node: the element
+    :return: the digest
+    :rtype: bytes
+    """
+    found = _memoized(node)
+    if found is not None:
+        return found
+    computed = dict()  # element -> digest, holding on to the elements while computing
+    todo = [node]
+    while len(todo) > 0:
+        elm = todo[-1]
+        pending = list()
+        for child in elm:
+            if child not in computed:
+                found = _memoized(child)
+                if found is None:
+                    pending.append(child)
+                else:
+                    computed[child] = found
+        if len(pending) > 0:
+            todo.extend(pending)
+            continue
+        todo.pop()
+        if elm in computed:
+            continue
+        hasher = blake2b(digest_size=DIGEST_SIZE)
+        hasher.update(repr((elm.tag, sorted(elm.attrib.items()), _strip(elm.text))).encode('utf-8'))
+        for child in elm:
+            hasher.update(computed[child])
+            hasher.update(repr(_strip(child.tail)).encode('utf-8'))
+        computed[elm] = hasher.digest()
+        _memoize(elm, computed[elm])
+    return computed[node]
+
+
+def digest(wrapper):
+    """ Returns the digest of the content of the wrapped node: tag-name, attributes, stripped text and nested elements.
+    The digests of all nested elements are memoized, so later comparisons and hashing of these are O(1).
+    For an :class:`~xmlasdict.IterWrapper` it covers the digests of all the contained elements, in order.
+
+    :param wrapper: the :class:`~xmlasdict.Wrapper` (or :class:`~xmlasdict.IterWrapper`)
+    :rtype: bytes
+    """
+    digests = wrapper._digests()
+    if len(digests) == 1:
+        return digests[0]
+    hasher = blake2b(digest_size=DIGEST_SIZE)
+    for found in digests:
+        hasher.update(found)
+    return hasher.digest()
+
+
+def diff(this, other):
+    """ Returns the list of differences between the two :class:`~xmlasdict.Wrapper` (or :class:`~xmlasdict.IterWrapper`),
+    elements are paired by position, and identical subtrees are skipped (by their digest) without visiting them.
+
+    :param this: the wrapper on this side
+    :param other: the wrapper on the other side
+    :return: list of :class:`~xmlasdict.Difference` (path, this, other) tuples,
+        with paths like ``'a/b[2]/@attr'`` (relative to the compared nodes) or ``'[2]/a'`` (when comparing lists)
+    """
+    from .wrapper import Wrapper  # imported here, as the wrapper module builds on this one
+    assert isinstance(this, Wrapper) and isinstance(other, Wrapper), \
+        f"can only diff Wrappers, not '{type(this)}' and '{type(other)}'"
+    return diff_elements(this._elements(), other._elements(), Wrapper.build)
+
+
+class Difference(NamedTuple):
+    """ One difference found by :func:`~xmlasdict.diff`
+    """
+    path: str          # the path to the difference: ElementTree-path like, ending in '@attribute' or '#text' if applicable
+    this: Any = None   # the value on this side, None if missing: str for attributes and text, else a Wrapper
+    other: Any = None  # the value on the other side, None if missing: str for attributes and text, else a Wrapper
+
+
+def diff_elements(these: list, others: list, build):
+    """ Returns the list of :class:`~Difference` between the two lists of elements, compared pairwise by position.
+    Subtrees with the same digest are skipped, and child elements are paired by tag and position.
+
+    :param these: the elements on this side
+    :param others: the elements on the other side
+    :param build: the function to wrap the elements that are reported
+    """
+    differences = list()
+    todo = [(f"[{n + 1}]" if len(these) != 1 or len(others) != 1 else '.', this, other)
+            for n, (this, other) in enumerate(_paired(these, others))]
+    todo.reverse()
+    while len(todo) > 0:
+        path, this, other = todo.pop()
+        if this is None or other is None or this.tag != other.tag:
+            differences.append(Difference(path, build(this) if this is not None else None,
+                                          build(other) if other is not None else None))
+            continue
+        if element_digest(this) == element_digest(other):
+            continue
+        # else find the actual differences
+        prefix = '' if path == '.' else path + '/'
+        this_attrib, other_attrib = this.attrib, other.attrib
+        for name in sorted(set(this_attrib) | set(other_attrib)):
+            if this_attrib.get(name) != other_attrib.get(name):
+                differences.append(Difference(f"{prefix}@{name}", this_attrib.get(name), other_attrib.get(name)))
+        this_text, other_text = _owntext(this), _owntext(other)
+        if this_text != other_text:
+            differences.append(Difference(f"{prefix}#text", this_text, other_text))
+        nested = list()
+        this_children, other_children = _bytag(this), _bytag(other)
+        for tag in list(this_children) + [t for t in other_children if t not in this_children]:
+            these_tagged, others_tagged = this_children.get(tag, []), other_children.get(tag, [])
+            for n, (this_child, other_child) in enumerate(_paired(these_tagged, others_tagged)):
+                indexed = f"[{n + 1}]" if len(these_tagged) > 1 or len(others_tagged) > 1 else ''
+                nested.append((f"{prefix}{tag}{indexed}", this_child, other_child))
+        todo.extend(reversed(nested))
+    return differences
+
+
+def _paired(these: list, others: list):
+    """ pairs the elements by position, padding the shorter list with None """
+    return [(these[n] if n < len(these) else None, others[n] if n < len(others) else None)
+            for n in range(max(len(these), len(others)))]
+
+
+def _bytag(node):
+    """ the child elements grouped by tag, in document order """
+    children = dict()
+    for child in node:
+        children.setdefault(child.tag, []).append(child)
+    return children
+
+
+def _owntext(node):
+    """ the (stripped) text of the element itself, including the tails of its children but not their content """
+    return ' '.join(t for t in [_strip(node.text)] + [_strip(c.tail) for c in node] if len(t) > 0)
@@ -0,0 +1,437 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from weakref import WeakValueDictionary
+from xml.etree import ElementPath
+from .backend import EtreeBackend, CHUNK_SIZE, get_backend, register_element_type, filechunks
+from .tagindex import DESCENDANT_SEARCH
+import struct
+import logging
+
+
+log = logging.getLogger(__name__)
+SNAPSHOT_MAGIC = b'xmlasdict-frozen-1\n'  # marks (the version of) the binary snapshots of frozen documents
+SHARED_TEXT_SIZE = 64  # whitespace (i.e. indentation) up to this length is stored once in the text buffer, and then shared
+FEED_SIZE = 64 * 1024  # size of the chunks fed to the pullparser, small enough to never hold much of the tree
+
+
+class FrozenDocument:
+    """ Compact, read-only, structure-of-arrays representation of a parsed XML document.
+
+    The elements are numbered in document order (so the descendants of an element directly follow it),
+    and each element is described by its entries in a number of flat arrays:
+
+    - the interned id of its tag-name (into the names list, which also holds the attribute names)
+    - the number of its parent (-1 for the root), its number of children,
+      and the end of its subtree (i.e. the number of its next sibling)
+    - the start and end offsets of its text and tail into the one single text buffer (-1 for None)
+    - the start of its attributes in the attribute arrays
+      (holding the interned id of the name and the start and end offsets of the value into the text buffer)
+
+    The elements themselves are only materialized as lightweight :class:`~FrozenElement` proxies when accessed.
+    Instead of instantiating these yourself use ``parse(input, frozen=True)``.
+
+    Deep searches for a tag-name (i.e. ``.//tag`` paths, or ``element.iter(tag)``) are served from a tag index,
+    that is built (once) on the first such search: per tag-name the array of the numbers of its elements,
+    so finding those in any subtree is a range lookup rather than a scan of the subtree.
+    The documents of the etree and lxml backends get a similar index, see :class:`~xmlasdict.tagindex.TagIndex`.
+    This index takes another 4 bytes per element (and some 100 bytes per distinct tag-name), included in
+    :func:`~FrozenDocument.nbytes` once built. Set ``use_tag_index = False`` on the document, or on the class
+    (for all documents), to switch it off.
+    """
+    use_tag_index = True
+
+    def __init__(self):
+        self.names = list()
+        self.tags = array('i')
+        self.parents = array('i')
+        self.child_counts = array('i')
+        self.ends = array('i')
+        self.text_starts = array('q')
+        self.text_ends = array('q')
+        self.tail_starts = array('q')
+        self.tail_ends = array('q')
+        self.attr_starts = array('i')
+        self.attr_names = array('i')
+        self.attr_value_starts = array('q')
+        self.attr_value_ends = array('q')
+        self.text = ''
+        self.digests = dict()  # number -> the memoized content digest of that element, see xmlasdict.compare
+        self._tag_index = None  # lazily built (name -> id of the name, id of the tag-name -> numbers of its elements)
+        self._elements = WeakValueDictionary()  # number -> the live proxy of that element
+
+    def __len__(self):
+        return len(self.tags)
+
+    @property
+    def root(self):
+        """ The :class:`~FrozenElement` for the root element of the document
+        """
+        return self.element(0)
+
+    def element(self, index: int):
+        """ Returns the :class:`~FrozenElement` for the element with the given number.
+        There is only ever one live proxy per element, so (like for ElementTree elements) their identity can be compared.
+        """
+        elm = self._elements.get(index)
+        if elm is None:
+            elm = self._elements[index] = FrozenElement(self, index)
+        return elm
+
+    def nbytes(self):
+        """ Returns the (approximate) number of bytes held by the arrays and text buffer of this document
+        """
+        arrays = list(self._arrays())
+        if self._tag_index is not None:
+            arrays.extend(self._tag_index[1].values())
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.text.encode('utf-8'))
+
+    def tagged(self, tag: str, start: int, end: int):
+        """ Returns the numbers of the elements with the tag-name, in the given range of numbers (e.g. a subtree),
+        in document order, as looked up in the tag index (building it if needed).
+
+        :rtype: array
+        """
+        if self._tag_index is None:
+            self._tag_index = self._build_tag_index()
+        name_ids, tag_elements = self._tag_index
+        found = tag_elements.get(name_ids.get(tag))
+        if found is None:
+            return array('i')
+        return found[bisect_left(found, start):bisect_left(found, end)]
+
+    def _build_tag_index(self):
+        """ the tag index: the ids of the names, and the numbers of the elements by the id of their tag-name """
+        counts = Counter(self.tags)
+        ordered = array('i', sorted(range(len(self.tags)), key=self.tags.__getitem__))  # stable, so in document order
+        tag_elements = dict()
+        start = 0
+        for name_id in sorted(counts):
+            tag_elements[name_id] = ordered[start:start + counts[name_id]]
+            start += counts[name_id]
+        log.debug("built the tag index of %d elements with %d distinct tags", len(self.tags), len(tag_elements))
+        return {name: name_id for name_id, name in enumerate(self.names)}, tag_elements
+
+    def tobytes(self):
+        """ Returns a binary snapshot of this document, to be loaded again with :func:`~FrozenDocument.frombytes`.
+        The arrays are stored in the native byte-order, so snapshots are only meant to be loaded on the same machine.
+        """
+        parts = ['\0'.join(self.names).encode('utf-8'), self.text.encode('utf-8')]
+        parts.extend(a.tobytes() for a in self._arrays())
+        sizes = struct.pack(f'<{len(parts)}q', *(len(p) for p in parts))
+        return b''.join([SNAPSHOT_MAGIC, sizes] + parts)
+
+    @staticmethod
+    def frombytes(data):
+        """ Loads the document from a binary snapshot produced by :func:`~FrozenDocument.tobytes`
+
+        :param data: the snapshot
+        :type data: bytes-like
+        :rtype: FrozenDocument
+        """
+        with memoryview(data) as view:
+            assert view[:len(SNAPSHOT_MAGIC)] == SNAPSHOT_MAGIC, "not a snapshot of a frozen document"
+            doc = FrozenDocument()
+            arrays = doc._arrays()
+            offset = len(SNAPSHOT_MAGIC)
+            sizes = struct.unpack_from(f'<{2 + len(arrays)}q', view, offset)
+            offset += 8 * len(sizes)
+            parts = list()
+            for size in sizes:
+                parts.append(view[offset:offset + size])
+                offset += size
+            assert offset == len(view), "truncated snapshot of a frozen document"
+            doc.names = str(parts[0], 'utf-8').split('\0')
+            doc.text = str(parts[1], 'utf-8')
+            for a, part in zip(arrays, parts[2:]):
+                a.frombytes(part)
+            for part in parts:
+                part.release()
+        return doc
+
+    def _arrays(self):
+        """ the arrays describing the elements, in a fixed order """
+        return (
+            self.tags, self.parents, self.child_counts, self.ends, self.text_starts, self.text_ends,
+            self.tail_starts, self.tail_ends, self.attr_starts, self.attr_names, self.attr_value_starts, self.attr_value_ends,
+        )
+
+    def _gettext(self, start: int, end: int):
+        return self.text[start:end] if start >= 0 else None
+
+    def _attr_range(self, index: int):
+        end = self.attr_starts[index + 1] if index + 1 < len(self.attr_starts) else len(self.attr_names)
+        return range(self.attr_starts[index], end)
+
+
+class FrozenBuilder:
+    """ Builds the :class:`~FrozenDocument` from the ('start', 'end') events of a pullparser,
+    every completed element is detached from the parsed tree as soon as its tail is known,
+    so the full ElementTree never has to be held in memory.
+    """
+    def __init__(self):
+        self.doc = FrozenDocument()
+        self._name_ids = dict()
+        self._blocks = list()  # the completed blocks of the text buffer
+        self._texts = list()   # the parts of the text buffer still to be joined into a block
+        self._length = 0       # the length of the text buffer so far
+        self._shared = dict()  # short whitespace -> its (start, end) in the text buffer
+        self._stack = list()   # [element, its number, its last completed child, the number of that] of open elements
+
+    def _name(self, name: str):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.doc.names)
+            self.doc.names.append(name)
+        return name_id
+
+    def _store(self, text: str):
+        """ adds the text to the text buffer, returns its (start, end) offsets
+        """
+        if text is None:
+            return -1, -1
+        shared = len(text) <= SHARED_TEXT_SIZE and text.isspace()
+        if shared:
+            offsets = self._shared.get(text)
+            if offsets is not None:
+                return offsets
+        start = self._length
+        self._texts.append(text)
+        self._length += len(text)
+        if len(self._texts) >= 4096:  # join them early, as many small str objects take far more memory than one big
+            self._blocks.append(''.join(self._texts))
+            self._texts.clear()
+        if shared:
+            self._shared[text] = (start, self._length)
+        return start, self._length
+
+    def _complete_child(self, open_elm: list):
+        """ stores the tail of the last completed child of the open element, and detaches that child
+        """
+        child, child_index = open_elm[2], open_elm[3]
+        if child is None:
+            return
+        self.doc.tail_starts[child_index], self.doc.tail_ends[child_index] = self._store(child.tail)
+        open_elm[0].remove(child)
+        open_elm[2] = None
+
+    def start(self, elem):
+        doc = self.doc
+        index = len(doc.tags)
+        parent = -1
+        if len(self._stack) > 0:
+            self._complete_child(self._stack[-1])
+            parent = self._stack[-1][1]
+            doc.child_counts[parent] += 1
+        doc.tags.append(self._name(elem.tag))
+        doc.parents.append(parent)
+        doc.child_counts.append(0)
+        doc.ends.append(index + 1)
+        for offsets in (doc.text_starts, doc.text_ends, doc.tail_starts, doc.tail_ends):
+            offsets.append(-1)
+        doc.attr_starts.append(len(doc.attr_names))
+        for name, value in elem.attrib.items():
+            doc.attr_names.append(self._name(name))
+            start, end = self._store(value)
+            doc.attr_value_starts.append(start)
+            doc.attr_value_ends.append(end)
+        self._stack.append([elem, index, None, -1])
+
+    def end(self, elem):
+        doc = self.doc
+        open_elm = self._stack.pop()
+        self._complete_child(open_elm)
+        index = open_elm[1]
+        doc.text_starts[index], doc.text_ends[index] = self._store(elem.text)
+        doc.ends[index] = len(doc.tags)
+        if len(self._stack) > 0:
+            self._stack[-1][2:4] = elem, index
+
+    def feed(self, events):
+        for event, elem in events:
+            if event == 'start':
+                self.start(elem)
+            else:
+                self.end(elem)
+
+    def close(self):
+        assert len(self._stack) == 0 and len(self.doc) > 0, "incomplete xml document"
+        self._blocks.append(''.join(self._texts))
+        self.doc.text = ''.join(self._blocks)
+        self._blocks, self._texts, self._shared = None, None, None
+        if log.isEnabledFor(logging.DEBUG):  # avoid calculating the size when not logged
+            log.debug("frozen document of %d elements takes %d bytes", len(self.doc), self.doc.nbytes())
+        return self.doc
+
+
+class FrozenElement:
+    """ Lightweight read-only proxy for one element of a :class:`~FrozenDocument`, get these from :func:`~FrozenDocument.element`.
+    It supports the (non-modifying) part of the ElementTree.Element interface that is needed for the
+    :class:`~xmlasdict.Wrapper` navigation, the ElementTree-path queries and the ElementTree serialization.
+    """
+    __slots__ = ('_doc', '_index', '__weakref__')
+
+    def __init__(self, doc: FrozenDocument, index: int):
+        self._doc = doc
+        self._index = index
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.tag!r} at {id(self):#x}>"
+
+    @property
+    def tag(self):
+        return self._doc.names[self._doc.tags[self._index]]
+
+    @property
+    def text(self):
+        return self._doc._gettext(self._doc.text_starts[self._index], self._doc.text_ends[self._index])
+
+    @property
+    def tail(self):
+        return self._doc._gettext(self._doc.tail_starts[self._index], self._doc.tail_ends[self._index])
+
+    @property
+    def attrib(self):
+        """ a new dict of the attributes of this element, changing it has no effect on the (frozen) document """
+        return dict(self.items())
+
+    def items(self):
+        doc = self._doc
+        return [
+            (doc.names[doc.attr_names[a]], doc.text[doc.attr_value_starts[a]:doc.attr_value_ends[a]])
+            for a in doc._attr_range(self._index)
+        ]
+
+    def keys(self):
+        doc = self._doc
+        return [doc.names[doc.attr_names[a]] for a in doc._attr_range(self._index)]
+
+    def get(self, key, default=None):
+        for name, value in self.items():
+            if name == key:
+                return value
+        return default
+
+    def getparent(self):
+        parent = self._doc.parents[self._index]
+        return self._doc.element(parent) if parent >= 0 else None
+
+    def __len__(self):
+        return self._doc.child_counts[self._index]
+
+    def __bool__(self):  # in line with ElementTree.Element
+        return len(self) != 0
+
+    def __iter__(self):
+        doc = self._doc
+        ends = doc.ends
+        child, end = self._index + 1, ends[self._index]
+        while child < end:
+            yield doc.element(child)
+            child = ends[child]
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def iter(self, tag: str = None):
+        doc = self._doc
+        if tag is None or tag == '*':
+            return (doc.element(i) for i in range(self._index, doc.ends[self._index]))
+        if doc.use_tag_index:
+            return map(doc.element, doc.tagged(tag, self._index, doc.ends[self._index]))
+        # else
+        names = doc.names
+        tags = doc.tags
+        return (doc.element(i) for i in range(self._index, doc.ends[self._index]) if names[tags[i]] == tag)
+
+    def itertext(self):
+        doc = self._doc
+        ends = doc.ends
+        open_elms = list()  # the stack of elements whose tail is still to come
+        for i in range(self._index, ends[self._index]):
+            while len(open_elms) > 0 and ends[open_elms[-1]] <= i:
+                tail = doc._gettext(doc.tail_starts[open_elms[-1]], doc.tail_ends[open_elms.pop()])
+                if tail:
+                    yield tail
+            text = doc._gettext(doc.text_starts[i], doc.text_ends[i])
+            if text:
+                yield text
+            open_elms.append(i)
+        while len(open_elms) > 1:  # the tail of the element itself is not part of its text
+            tail = doc._gettext(doc.tail_starts[open_elms[-1]], doc.tail_ends[open_elms.pop()])
+            if tail:
+                yield tail
+
+    def find(self, path: str, namespaces=None):
+        return ElementPath.find(self, path, namespaces)
+
+    def findall(self, path: str, namespaces=None):
+        doc = self._doc
+        if doc.use_tag_index and namespaces is None:
+            descendant = DESCENDANT_SEARCH.fullmatch(path)
+            if descendant is not None:  # skip the ElementPath machinery for these plain lookups in the tag index
+                return [doc.element(i) for i in doc.tagged(descendant.group(1), self._index + 1, doc.ends[self._index])]
+        return ElementPath.findall(self, path, namespaces)
+
+    def iterfind(self, path: str, namespaces=None):
+        return ElementPath.iterfind(self, path, namespaces)
+
+    def findtext(self, path: str, default=None, namespaces=None):
+        return ElementPath.findtext(self, path, default, namespaces)
+
+
+class FrozenBackend(EtreeBackend):
+    """ Backend producing :class:`~FrozenElement` nodes: the xml is parsed by the events of a pullparser of
+    the wrapped (etree or lxml) backend, directly into a compact :class:`~FrozenDocument`.
+    The path-queries on the frozen elements are handled by the standard library ElementPath support.
+
+    :param parser: the backend (or name of it) doing the actual parsing, defaults to the default backend
+    """
+    name = 'frozen'
+
+    def __init__(self, parser=None):
+        self._parser = parser if isinstance(parser, EtreeBackend) else get_backend(parser)
+
+    @property
+    def element_type(self):
+        return FrozenElement
+
+    def freeze(self, chunks):
+        """ Parses the chunks of XML content into a :class:`~FrozenDocument` and returns its root element
+        """
+        builder = FrozenBuilder()
+        pullparser = self._parser.pullparser(events=('start', 'end'))
+        for chunk in chunks:
+            pullparser.feed(chunk)
+            builder.feed(pullparser.read_events())
+        pullparser.close()
+        builder.feed(pullparser.read_events())
+        return builder.close().root
+
+    def parse(self, source):
+        if isinstance(source, str):
+            with open(source, 'rb') as xmlfile:
+                return self.freeze(filechunks(xmlfile, FEED_SIZE))
+        return self.freeze(filechunks(source, FEED_SIZE))
+
+    def fromstring(self, text):
+        if isinstance(text, str):
+            return self.freeze(text[start:start + FEED_SIZE] for start in range(0, len(text), FEED_SIZE))
+        return self.frombuffer(text)
+
+    def frombuffer(self, buffer):
+        return self.freeze(self.chunks(buffer, FEED_SIZE))
+
+    def chunks(self, buffer, chunk_size: int = CHUNK_SIZE):
+        return self._parser.chunks(buffer, chunk_size)
+
+    def compile(self, path: str):
+        if DESCENDANT_SEARCH.fullmatch(path) is not None:
+            return lambda node: node.findall(path)
+        return super().compile(path)
+
+    def pullparser(self, events=('end', )):
+        return self._parser.pullparser(events=events)
+
+
+register_element_type(FrozenElement, FrozenBackend())
@@ -0,0 +1,165 @@
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from .wrapper import Wrapper, IterWrapper
+import logging
+
+
+log = logging.getLogger(__name__)
+
+# name -> (class, method, whether the size of the produced str is measured) of the instrumented operations
+OPERATIONS = dict(
+    findchildren=(Wrapper, '_findchildren', False),
+    getchildren=(Wrapper, '_getchildren', False),
+    getattribute=(Wrapper, '_getattribute', False),
+    keys=(Wrapper, 'keys', False),
+    unwrap=(Wrapper, 'unwrap', False),
+    iter_unwrap=(IterWrapper, 'unwrap', False),
+    str=(Wrapper, '__str__', True),
+    iter_str=(IterWrapper, '__str__', True),
+    dumps=(Wrapper, 'dumps', True),
+    iter_dumps=(IterWrapper, 'dumps', True),
+)
+ALLOCATIONS = (Wrapper, IterWrapper)  # the classes of which the instantiations are counted
+
+_active = list()  # the active instrumentations of all contexts, the operations are patched while there are any
+_current = ContextVar('xmlasdict_instrumentations', default=())  # the active instrumentations of the current context
+_originals = dict()  # (class, method) -> the original (uninstrumented) attribute
+_lock = Lock()
+
+
+class Instrumentation:
+    """ Counts and times the operations on :class:`~xmlasdict.Wrapper` and :class:`~xmlasdict.IterWrapper` objects,
+    and counts their allocations, while it is active. Use it as a context manager, through :func:`~instrumented`.
+
+    The operations are only instrumented while some instrumentation is active, so otherwise they cost nothing extra.
+    While active, the operations are counted by the instrumentations entered in the current :mod:`contextvars` context,
+    so the numbers of concurrent threads (or asyncio tasks) each using their own instrumentation don't mix.
+    New threads start in an empty context: to have their operations counted as well, run them in a copy of it,
+    e.g. ``threading.Thread(target=contextvars.copy_context().run, args=(work,))``.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._operations = dict()   # name -> [calls, seconds, bytes]
+        self._allocations = dict()  # class name -> count
+
+    def __enter__(self):
+        _activate(self)
+        _current.set(_current.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _current.set(tuple(instrumentation for instrumentation in _current.get() if instrumentation is not self))
+        _deactivate(self)
+
+    def _record(self, name: str, seconds: float, size: int):
+        with self._lock:
+            counts = self._operations.get(name)
+            if counts is None:
+                counts = self._operations[name] = [0, 0.0, 0]
+            counts[0] += 1
+            counts[1] += seconds
+            counts[2] += size
+
+    def _allocated(self, name: str):
+        with self._lock:
+            self._allocations[name] = self._allocations.get(name, 0) + 1
+
+    def snapshot(self):
+        """ Returns a dict with the current numbers: under 'operations' the calls, (inclusive) seconds and, for the
+        serializations, the bytes produced for each operation; under 'allocations' the number of instantiated wrappers.
+        """
+        with self._lock:
+            operations = dict()
+            for name, (calls, seconds, size) in self._operations.items():
+                operations[name] = dict(calls=calls, seconds=seconds)
+                if OPERATIONS[name][2]:
+                    operations[name]['bytes'] = size
+            return dict(operations=operations, allocations=dict(self._allocations))
+
+    def reset(self):
+        """ Resets all numbers to zero.
+        """
+        with self._lock:
+            self._operations.clear()
+            self._allocations.clear()
+
+
+def instrumented():
+    """ Returns a new :class:`~Instrumentation` to use as context manager, e.g.
+
+    .. code-block:: python
+
+        with xmlasdict.instrumented() as stats:
+            render(xmlasdict.parse(path))
+        print(stats.snapshot())
+
+    :rtype: Instrumentation
+    """
+    return Instrumentation()
+
+
+def _activate(instrumentation: Instrumentation):
+    with _lock:
+        if len(_active) == 0:
+            _patch()
+        _active.append(instrumentation)
+
+
+def _deactivate(instrumentation: Instrumentation):
+    with _lock:
+        _active.remove(instrumentation)
+        if len(_active) == 0:
+            _unpatch()
+
+
+def _patch():
+    """ replaces the operations with their instrumented version
+    """
+    for name, (cls, method, sized) in OPERATIONS.items():
+        original = cls.__dict__[method]
+        _originals[(cls, method)] = original
+        if isinstance(original, staticmethod):
+            setattr(cls, method, staticmethod(_timed(name, original.__func__, sized)))
+        else:
+            setattr(cls, method, _timed(name, original, sized))
+    for cls in ALLOCATIONS:
+        original = cls.__dict__['__init__']
+        _originals[(cls, '__init__')] = original
+        setattr(cls, '__init__', _counted(cls.__name__, original))
+    log.debug("instrumented the wrapper operations")
+
+
+def _unpatch():
+    """ restores the original operations
+    """
+    for (cls, method), original in _originals.items():
+        setattr(cls, method, original)
+    _originals.clear()
+    log.debug("removed the instrumentation of the wrapper operations")
+
+
+def _timed(name: str, operation, sized: bool):
+    @wraps(operation)
+    def timed(*args, **kwargs):
+        current = _current.get()
+        if len(current) == 0:  # not instrumented in this context
+            return operation(*args, **kwargs)
+        start = perf_counter()
+        result = operation(*args, **kwargs)
+        seconds = perf_counter() - start
+        size = len(result.encode('utf-8')) if sized else 0
+        for instrumentation in current:
+            instrumentation._record(name, seconds, size)
+        return result
+    return timed
+
+
+def _counted(name: str, init):
+    @wraps(init)
+    def counted(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        for instrumentation in _current.get():
+            instrumentation._allocated(name)
+    return counted
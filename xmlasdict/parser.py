@@ -1,21 +1,536 @@
+import asyncio
+import hashlib
+import logging
+import mmap
 import os
-from xml.etree import ElementTree
-from .wrapper import Wrapper
+import re
+import struct
+from collections import deque
+from .wrapper import Wrapper, is_tag
+from .backend import get_backend, filechunks
+from .cache import DiskCache, LRUCache, disk_cache, parse_cache
+from .frozen import FrozenBackend, FrozenDocument, FEED_SIZE
+from .tagindex import TagIndex
 
 
-def parse(input: str):
+log = logging.getLogger(__name__)
+SNAPSHOT_HEADER = struct.Struct('<qq32s')  # the size and mtime (ns) of the snapshotted file, and its content-hash
+XML_CONTENT = re.compile(r'\s*<')  # str input starting with '<' is XML content rather than a file-path
+PATH_STEP = re.compile(r'(?:\{[^}]*\})?[^/{}]+')  # the steps of a path of tag-names, which may hold {namespace}/ prefixes
+WHITESPACE = frozenset(b' \t\r\n') | frozenset(' \t\r\n')  # the xml whitespace, as bytes (int) and str items
+
+
+def parse(input, backend: str = None, frozen: bool = False, cache_dir=None, stop_after=None):
     """ Parses the xml into a xmlasdict structure that allows approaching the wrapped emltree as a (somewhat) regular dict.
 
-    :param input: actual XML content, or a file-path to an xml file to read
-    :type input: str
+    The type of input decides how it is read:
+
+    - str: actual XML content (if it starts with '<') or else a file-path to an xml file to read
+    - bytes or bytearray: actual XML content, passed to the parser as is (i.e. without decoding)
+    - memoryview, mmap or any other buffer: actual XML content, fed to the parser without copying
+    - pathlib.Path (or any os.PathLike): the xml file to read
+    - file object (anything with a read method): the opened xml file to read
+
+    :param input: the XML content, or file to read it from
+    :type input: str, bytes, memoryview, mmap, os.PathLike or file object
+    :param backend: the parser backend to use: 'etree' (default, the standard library) or 'lxml' (if installed)
+    :type backend: str
+    :param frozen: build a compact read-only representation of the document rather than an ElementTree
+        (see :class:`~xmlasdict.frozen.FrozenDocument`), taking far less memory to keep resident
+    :type frozen: bool
+    :param cache_dir: directory (or :class:`~xmlasdict.DiskCache`) to keep binary snapshots of parsed files in,
+        to load these (rather than parsing the file again) as long as the size and mtime, or else content-hash,
+        of the file are unchanged. Snapshots are frozen documents, so this implies frozen=True.
+        Only applies to files passed by their path.
+    :type cache_dir: str
+    :param stop_after: only read the document up to (and including) the first element matching this condition,
+        e.g. some header, to then stop reading (and close the file) right away. Either a tag-name (matching at any depth),
+        a path of tag-names (and '*') from the root element (e.g. ``'metadata/header'``),
+        or a function called with the :class:`~Wrapper` of each completed element, returning True to stop after it.
+        The root then holds all elements read so far, i.e. the ancestors of the matching element are incomplete,
+        and hold no content after it. Without any match, the whole document is read.
+        Can not be combined with frozen or cache_dir.
+    :type stop_after: str or function
     :return: the dict-like object to access the content of the parsed XML file
     :rtype: Wrapper
     """
+    kind = input_kind(input)
+    if stop_after is not None:
+        assert not frozen and cache_dir is None, "stop_after can not be combined with frozen or cache_dir"
+        assert kind is not None, f"could not parse input {input}"
+        return _parse_until(input, kind, backend, _stop_condition(stop_after))
+    # else
+    memo = parse_cache()
+    if memo is not None and kind == 'path':
+        return _parse_memoized(input, backend, frozen, cache_dir, memo)
+    # else
+    return _parse(input, kind, backend, frozen, cache_dir)
+
+
+def _parse_memoized(path, backend: str, frozen: bool, cache_dir, memo: LRUCache):
+    """ returns the wrapper for the file from the in-memory cache of parsed files, or else parses the file and caches it
+    """
+    stat = os.stat(path)
+    frozen = frozen or cache_dir is not None
+    key = (os.path.realpath(path), get_backend(backend).name, frozen)
+    entry = memo.get(key, valid=lambda entry: entry[:2] == (stat.st_size, stat.st_mtime_ns))
+    if entry is not None:
+        return entry[2]
+    # else
+    xdict = _parse(path, 'path', backend, frozen, cache_dir)
+    memo.put(key, (stat.st_size, stat.st_mtime_ns, xdict))
+    return xdict
+
+
+def _parse(input, kind: str, backend: str, frozen: bool, cache_dir):
+    """ actually parses the input of the given kind
+    """
+    if cache_dir is not None and kind == 'path':
+        return Wrapper.build(_parse_cached(input, backend, disk_cache(cache_dir)))
+    # else
+    parser = get_backend(backend) if not frozen and cache_dir is None else FrozenBackend(backend)
     xml = None
-    if os.path.isfile(input):
-        xml = ElementTree.parse(input).getroot()
-    elif isinstance(input, str):
-        xml = ElementTree.fromstring(input)
+    if kind == 'content':
+        xml = parser.fromstring(input)
+    elif kind == 'buffer':
+        xml = parser.frombuffer(input)
+    elif kind == 'path':
+        xml = parser.parse(os.fspath(input))
+    elif kind == 'file':
+        xml = parser.parse(input)
 
     assert xml is not None, f"could not parse input {input}"
-    return Wrapper.build(xml)
+    if isinstance(parser, FrozenBackend):  # which have a tag index of their own
+        return Wrapper.build(xml)
+    return Wrapper.build(xml, doc_index=TagIndex(xml))
+
+
+def _parse_until(input, kind: str, backend: str, stop):
+    """ parses the input of the given kind up to the element meeting the stop condition
+    """
+    parser = get_backend(backend)
+    if kind == 'path':
+        with open(input, 'rb') as xmlfile:
+            return _read_until(_iterevents(filechunks(xmlfile), parser), stop)
+    if kind == 'file':
+        return _read_until(_iterevents(filechunks(input), parser), stop)
+    if kind == 'buffer' or not isinstance(input, str):
+        return _read_until(_iterevents(parser.chunks(input, FEED_SIZE), parser), stop)
+    chunks = (input[start:start + FEED_SIZE] for start in range(0, len(input), FEED_SIZE))
+    return _read_until(_iterevents(chunks, parser), stop)
+
+
+def _read_until(events, stop):
+    """ consumes the parse events up to the end of the element meeting the stop condition,
+    returns the wrapped root with (only) the elements read so far
+    """
+    path = []  # the stack of currently open elements
+    root = None
+    for event, elem in events:
+        if event == 'start':
+            root = elem if root is None else root
+            path.append(elem)
+            continue
+        # else event == 'end'
+        if stop(path, elem):
+            events.close()
+            # the parser may have built more of the tree than the events reported so far: remove what follows
+            for parent, child in zip(path, path[1:]):
+                while parent[-1] is not child:
+                    del parent[-1]
+            for open_elm in path:
+                open_elm.tail = None  # which might be incomplete, or even belong to content after elem
+            log.debug("stopped parsing after %s", elem.tag)
+            break
+        path.pop()
+    assert root is not None, "could not parse input"
+    return Wrapper.build(root, doc_index=TagIndex(root))
+
+
+def _stop_condition(stop_after):
+    """ the function checking if the element (with its path of open elements) meets the stop_after condition
+    """
+    if callable(stop_after):
+        return lambda path, elem: stop_after(Wrapper.build(elem))
+    assert isinstance(stop_after, str) and len(stop_after) > 0, f"invalid stop_after condition '{stop_after}'"
+    if is_tag(stop_after):
+        return lambda path, elem: elem.tag == stop_after
+    steps = PATH_STEP.findall(stop_after)
+    assert '/'.join(steps) == stop_after and all(step == '*' or is_tag(step) for step in steps), \
+        f"stop_after path '{stop_after}' should only hold tag-names"
+    return lambda path, elem: len(path) == len(steps) + 1 and all(
+        step == '*' or step == e.tag for step, e in zip(steps, path[1:])
+    )
+
+
+def _parse_cached(path, backend: str, cache: DiskCache):
+    """ loads the frozen document from the cached snapshot of the file, or else parses the file and caches it
+    """
+    path = os.fspath(path)
+    key = hashlib.sha256(os.path.realpath(path).encode('utf-8')).hexdigest()
+    stat = os.stat(path)
+    digest = None
+
+    def fresh(data):
+        nonlocal digest
+        if len(data) < SNAPSHOT_HEADER.size:
+            return False
+        size, mtime, cached_digest = SNAPSHOT_HEADER.unpack_from(data)
+        if size != stat.st_size:
+            return False
+        if mtime == stat.st_mtime_ns:
+            return True
+        digest = digest or _filedigest(path)  # touched, but maybe not changed
+        return digest == cached_digest
+
+    data = cache.get(key, valid=fresh)
+    if data is not None:
+        try:
+            with memoryview(data) as view:
+                doc = FrozenDocument.frombytes(view[SNAPSHOT_HEADER.size:])
+            if digest is not None:  # store the new mtime, to not have to compare the content-hash again
+                cache.put(key, SNAPSHOT_HEADER.pack(stat.st_size, stat.st_mtime_ns, digest) + data[SNAPSHOT_HEADER.size:])
+            log.debug("loaded %s from the snapshot in %s", path, cache.directory)
+            return doc.root
+        except Exception as e:
+            log.warning("dropping unusable snapshot of %s in %s: %s", path, cache.directory, e)
+            cache.discard(key)
+    # else parse the file, calculating the content-hash while reading it
+    hasher = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as xmlfile:
+        stat = os.fstat(xmlfile.fileno())
+        root = FrozenBackend(backend).freeze(_hashed(filechunks(xmlfile, FEED_SIZE), hasher))
+    cache.put(key, SNAPSHOT_HEADER.pack(stat.st_size, stat.st_mtime_ns, hasher.digest()) + root._doc.tobytes())
+    return root
+
+
+def _hashed(chunks, hasher):
+    """ passes on the chunks, after updating the hasher with them
+    """
+    for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+
+def _filedigest(path: str):
+    """ the content-hash of the file
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as xmlfile:
+        for chunk in filechunks(xmlfile, FEED_SIZE):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def input_kind(input):
+    """ Determines the kind of input, one of 'content' (str or bytes), 'buffer', 'path' or 'file' (or None if unknown)
+    A str is only checked for being an existing file-path if it does not start with '<', avoiding a stat for XML content.
+    """
+    if isinstance(input, str):
+        if XML_CONTENT.match(input) is None and os.path.isfile(input):
+            return 'path'
+        return 'content'
+    if isinstance(input, (bytes, bytearray)):
+        return 'content'
+    if isinstance(input, os.PathLike):
+        return 'path'
+    if isinstance(input, (memoryview, mmap.mmap)):  # before checking for read(), which mmap has as well
+        return 'buffer'
+    if hasattr(input, 'read'):
+        return 'file'
+    try:
+        memoryview(input).release()
+        return 'buffer'
+    except TypeError:
+        return None
+
+
+def parse_iter(source, record_tag: str = None, backend: str = None):
+    """ Parses the xml incrementally, yielding a :class:`~Wrapper` for each completed record element.
+    Records are detached from the (partially) parsed tree as soon as the consumer moves on to the next one,
+    so memory stays flat no matter the size of the input, as long as the consumer does not hold on to them.
+
+    :param source: the XML content, or the file to read it from, see :func:`~xmlasdict.parse` for the supported types
+    :param record_tag: the tag-name of the repeated record elements, defaults to any direct child of the root element
+    :type record_tag: str
+    :param backend: the parser backend to use: 'etree' (default, the standard library) or 'lxml' (if installed)
+    :type backend: str
+    :return: a generator of :class:`~Wrapper` objects, one per record
+    """
+    parser = get_backend(backend)
+    kind = input_kind(source)
+    assert kind is not None, f"could not parse source {source}"
+    if kind == 'path':
+        with open(source, 'rb') as xmlfile:
+            yield from _iterrecords(_iterevents(filechunks(xmlfile), parser), record_tag)
+    elif kind == 'file':
+        yield from _iterrecords(_iterevents(filechunks(source), parser), record_tag)
+    elif kind == 'buffer' or not isinstance(source, str):
+        yield from _iterrecords(_iterevents(parser.chunks(source), parser), record_tag)
+    else:
+        yield from _iterrecords(_iterevents([source], parser), record_tag)
+
+
+def _iterevents(chunks, parser):
+    """ feeds the chunks of xml content to a pullparser of the backend, and yields the (start, end) events
+    """
+    pullparser = parser.pullparser(events=('start', 'end'))
+    for chunk in chunks:
+        pullparser.feed(chunk)
+        yield from pullparser.read_events()
+    pullparser.close()
+    yield from pullparser.read_events()
+
+
+def _iterrecords(events, record_tag: str = None):
+    """ consumes the parse events, yields the wrapped records and detaches every completed element
+    """
+    yield from _RecordReader(record_tag).read(events)
+
+
+class _RecordReader:
+    """ the state of reading records from the parse events of one document, which can come in any number of batches
+    """
+    def __init__(self, record_tag: str = None, depth: int = None):
+        self.record_tag = record_tag
+        self.depth = depth if depth is not None or record_tag is not None else 1
+        self.path = []           # the stack of currently open elements
+        self.record_depth = -1   # the depth of the record currently being read, -1 when outside of any record
+        self.root = None         # the root element, once started
+
+    @property
+    def done(self):
+        """ if the root element of the document is completed """
+        return self.root is not None and len(self.path) == 0
+
+    def read(self, events):
+        """ consumes the parse events, yields the wrapped records and detaches every completed element
+        """
+        path, record_tag, record_depth = self.path, self.record_tag, self.depth
+        for event, elem in events:
+            if event == 'start':
+                if self.root is None:
+                    self.root = elem
+                if (self.record_depth < 0 and (record_tag is None or elem.tag == record_tag)
+                        and (record_depth is None or len(path) == record_depth)):
+                    self.record_depth = len(path)
+                path.append(elem)
+                continue
+            # else event == 'end'
+            path.pop()
+            depth = len(path)
+            if self.record_depth >= 0 and depth > self.record_depth:
+                continue  # still inside a record, keep building it
+            if depth == self.record_depth:
+                self.record_depth = -1
+                yield Wrapper.build(elem)
+            # release the completed element (record or not) so the tree does not grow
+            if depth > 0:
+                path[-1].remove(elem)
+
+
+class IncrementalParser:
+    """ Push-style parsing of records, for xml content that is handed over in pieces (e.g. by callbacks),
+    without ever holding (or buffering) all of it. Feed it the content as it comes, and drain the completed records:
+
+    .. code-block:: python
+
+        parser = xmlasdict.IncrementalParser(record_tag='row')
+        for fragment in fragments:
+            parser.feed(fragment)
+            for record in parser.records():
+                handle(record)
+        parser.close()
+        for record in parser.records():
+            handle(record)
+
+    As with :func:`~xmlasdict.parse_iter` the completed records are detached from the (partially) parsed tree,
+    and so are all other completed elements, so memory is bounded by the records not yet drained
+    (i.e. one record when draining after each feed) and the content of the last feed.
+
+    The content can hold multiple back-to-back xml documents, of which the records are read in turn.
+    These are split right after the end-tag of each root element, assuming an ascii-compatible encoding.
+
+    :param record_tag: the tag-name of the record elements, defaults to any element at the given depth
+    :type record_tag: str
+    :param depth: the depth of the record elements, where the root element is at depth 0,
+        defaults to 1 (i.e. the direct children of the root element) if no record_tag is given, else any depth
+    :type depth: int
+    :param backend: the parser backend to use: 'etree' (default, the standard library) or 'lxml' (if installed)
+    :type backend: str
+    """
+    def __init__(self, record_tag: str = None, depth: int = None, backend: str = None):
+        assert depth is None or depth >= 0, "depth should not be negative"
+        self.record_tag = record_tag
+        self.depth = depth
+        self.backend = get_backend(backend)
+        self.documents = 0        # the number of completed documents
+        self._records = deque()   # the completed records, not yet drained
+        self._closed = False
+        self._pullparser = None   # the pullparser of the current document, None in between documents
+        self._reader = None       # the _RecordReader of the current document
+        self._root_end = None     # the regex matching the (possible) end-tags of the current root element
+        self._held = None         # the held back content, i.e. an incomplete tag that might start or end the root element
+
+    def feed(self, data):
+        """ Feeds the next piece of xml content, all pieces should be either bytes(-like) or str.
+
+        :param data: the xml content
+        :type data: bytes, bytearray, memoryview or str
+        """
+        assert not self._closed, "cannot feed a closed parser"
+        if not isinstance(data, (str, bytes)):
+            data = bytes(data)  # to search it for the end-tags
+        if self._held is not None:
+            data, self._held = self._held + data, None
+        pos = 0
+        while pos < len(data):
+            if self._pullparser is None:  # in between documents
+                pos = self._start_document(data, pos)
+                if pos == len(data):
+                    break
+            end = self._piece_end(data, pos)
+            if end is None:  # hold back the rest, as it might be the start of the root element or of its end-tag
+                self._held = data[pos:]
+                break
+            self._feed_piece(data[pos:end])
+            pos = end
+
+    def records(self):
+        """ Drains the records completed so far, in document order.
+
+        :return: a generator of :class:`~Wrapper` objects, one per record
+        """
+        while len(self._records) > 0:
+            yield self._records.popleft()
+
+    def close(self):
+        """ Signals the end of the content, completing the last records (which are still to be drained).
+        Raises the SyntaxError of the parser backend (e.g. the ParseError of etree) if the last document is incomplete.
+        """
+        self._closed = True
+        if self._held is not None:  # which is an incomplete tag, for the parser to report
+            self._pullparser.feed(self._held)
+            self._held = None
+            self._end_document()
+        elif self._pullparser is not None and self._reader.root is not None:
+            self._end_document()
+        # else: nothing, or only comments or processing-instructions after the last document
+        self._pullparser = self._reader = None
+
+    def _read_events(self):
+        self._records.extend(self._reader.read(self._pullparser.read_events()))
+
+    def _start_document(self, chunk, pos: int):
+        """ skips the whitespace in between documents, and starts the next document if any content follows
+        returns the position of that content, or the end of the chunk
+        """
+        while pos < len(chunk) and chunk[pos] in WHITESPACE:
+            pos += 1
+        if pos < len(chunk):
+            self._pullparser = self.backend.pullparser(events=('start', 'end'))
+            self._reader = _RecordReader(self.record_tag, self.depth)
+        return pos
+
+    def _feed_piece(self, piece):
+        """ feeds the piece of the current document, reading its records and ending it once the root element is completed
+        """
+        self._pullparser.feed(piece)
+        self._read_events()
+        if self._reader.root is None and piece[-2:] in (b'/>', '/>'):
+            # lxml reports nothing before reading 5 bytes, so have it read past an (empty) root element like <r/>
+            self._pullparser.feed(' ' if isinstance(piece, str) else b' ')
+            self._read_events()
+        if self._root_end is None and self._reader.root is not None:
+            self._root_end = _end_tag(self._reader.root.tag, isinstance(piece, str))
+        if self._reader.done:
+            self._end_document()
+
+    def _piece_end(self, chunk, pos: int):
+        """ where to end the next piece to feed: at the end of the chunk, or right after the possible end of the document
+        None if the remainder should be held back for the next chunk
+        """
+        text = isinstance(chunk, str)
+        if self._root_end is None:  # as long as the root element did not start, feed tag by tag (the prolog is short)
+            found = chunk.find('>' if text else b'>', pos)
+            if found >= 0:
+                return found + 1
+        else:
+            found = self._root_end.search(chunk, pos)
+            if found is not None:
+                return found.end()
+        open_tag = chunk.rfind('<' if text else b'<', pos)
+        if open_tag >= 0 and ('>' if text else b'>') not in chunk[open_tag:]:
+            return open_tag if open_tag > pos else None
+        return len(chunk)
+
+    def _end_document(self):
+        """ closes the current document, reading its last records
+        """
+        pullparser = self._pullparser
+        self._pullparser = self._root_end = None
+        pullparser.close()
+        self._records.extend(self._reader.read(pullparser.read_events()))
+        self._reader = None
+        self.documents += 1
+
+
+def _end_tag(tag: str, text: bool):
+    """ the regex matching the end-tags (with any namespace prefix) of elements with the tag
+    """
+    local = re.escape(tag.rpartition('}')[2])
+    pattern = r'</(?:[^\s<>/:]+:)?' + local + r'\s*>'
+    return re.compile(pattern if text else pattern.encode('utf-8'))
+
+
+async def aparse(stream, record_tag: str = None, backend: str = None, chunk_size: int = FEED_SIZE):
+    """ Parses the xml from an asyncio stream, yielding a :class:`~Wrapper` for each completed record element
+    as soon as it is closed, e.g. ``async for record in aparse(reader, record_tag='row'): ...``.
+    As :func:`~xmlasdict.parse_iter`, records are detached from the (partially) parsed tree so memory stays flat.
+
+    The content is fed to the parser in pieces of (at most) chunk_size, handing control back to the event loop
+    in between, so large chunks do not block it. The stream can hold multiple back-to-back xml documents
+    (in an ascii-compatible encoding), of which the records are yielded in turn.
+
+    :param stream: the source of the xml content: an asyncio.StreamReader (or anything with an async read(n) method)
+        or an async iterable of bytes (or str) chunks
+    :param record_tag: the tag-name of the repeated record elements, defaults to any direct child of the root element
+    :type record_tag: str
+    :param backend: the parser backend to use: 'etree' (default, the standard library) or 'lxml' (if installed)
+    :type backend: str
+    :param chunk_size: the maximum size of the pieces read from the stream and fed to the parser at once
+    :type chunk_size: int
+    :return: an async generator of :class:`~Wrapper` objects, one per record
+    """
+    assert chunk_size > 0, "chunk_size should be positive"
+    parser = IncrementalParser(record_tag, backend=backend)
+    async for chunk in _achunks(stream, chunk_size):
+        for piece in _pieces(chunk, chunk_size):
+            parser.feed(piece)
+            for record in parser.records():
+                yield record
+            await asyncio.sleep(0)  # let others run in between the pieces
+    parser.close()
+    for record in parser.records():
+        yield record
+
+
+async def _achunks(stream, chunk_size: int):
+    """ the chunks of content read from the stream
+    """
+    if hasattr(stream, 'read'):
+        chunk = await stream.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = await stream.read(chunk_size)
+    else:
+        async for chunk in stream:
+            yield chunk
+
+
+def _pieces(chunk, chunk_size: int):
+    """ the chunk of content split into pieces of at most chunk_size
+    """
+    if len(chunk) <= chunk_size:
+        return [chunk]
+    return (chunk[start:start + chunk_size] for start in range(0, len(chunk), chunk_size))
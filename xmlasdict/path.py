@@ -0,0 +1,246 @@
+from .wrapper import Wrapper, IterWrapper, textXML, unwrapXML, is_tag
+from .backend import backend_of
+from .cache import LRUCache
+import logging
+import re
+
+
+log = logging.getLogger(__name__)
+# the dots separating the steps of a path, i.e. those not inside a [predicate], {namespace} or 'quoted' value
+STEP_SEPARATOR = re.compile(r"""\.(?=(?:[^\[\]{}'"]|\[(?:[^\]'"]|'[^']*'|"[^"]*")*\]|\{[^}]*\}|'[^']*'|"[^"]*")*$)""")
+TAG_STEP = re.compile(r'(?:\{[^}]*\})?[^/{}]+')  # the steps of a tag/tag path, which may hold {namespace}/ prefixes
+_selections = LRUCache(max_entries=256)  # fields -> their compiled Selection, to reuse across select() calls
+
+
+class CompiledPath:
+    """ An access path that is parsed once, to then be evaluated against any number of :class:`~xmlasdict.Wrapper`
+    objects or raw elements. Instead of :func:`~xmlasdict.compile` one could also directly instantiate these.
+
+    The steps of the path are the keys one would otherwise use in the wrapper[key] or wrapper.key notation,
+    including path-like keys, a last ``'@attribute'`` or ``'#text'`` step, and the ``[]`` suffix forcing a list return.
+    Evaluation walks the raw elements without allocating any intermediate wrappers.
+
+    Where some step matches multiple elements, the next steps are applied to each of them (in document order),
+    much like an xpath location path would.
+
+    :param steps: the steps of the path, a single str of steps separated by dots is split into its steps
+        (unless it is a path-like key starting with '.' or containing '/'), leaving the dots in predicates like
+        ``item[@x='1.5']`` or ``{urn:x.y}item`` namespaces alone
+    """
+    def __init__(self, *steps: str):
+        if len(steps) == 1 and not steps[0].startswith('.') and '/' not in steps[0]:
+            steps = STEP_SEPARATOR.split(steps[0])
+        assert len(steps) > 0 and all(isinstance(s, str) and len(s) > 0 for s in steps), f"invalid path steps {steps}"
+        self.steps = tuple(steps)
+        self.force_list = steps[-1][-2:] == '[]'
+        last = steps[-1][:-2] if self.force_list else steps[-1]
+        self.attribute = last[1:] if last[0] == '@' else None
+        self.text = last == '#text'
+        elm_steps = steps[:-1] if self.attribute is not None or self.text else steps
+        elm_steps = [s[:-2] if s[-2:] == '[]' else s for s in elm_steps]
+        assert not any(s[0] in '@#' for s in elm_steps), f"only the last step of {steps} can be an attribute or text"
+        self.elm_steps = tuple(tag for s in elm_steps for tag in CompiledPath._tag_steps(s))
+        # the element steps are joined into one ElementTree-path (or none if we stay at the current node)
+        self.path = '/'.join(elm_steps) if len(elm_steps) > 0 else None
+        self._selectors = dict()  # the path, compiled per backend
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(repr(s) for s in self.steps)})"
+
+    @staticmethod
+    def _tag_steps(step: str):
+        """ the plain tag-names making up a ``tag/tag`` step, or else the step itself
+        """
+        if '/' not in step:
+            return [step]
+        tags = TAG_STEP.findall(step)
+        return tags if '/'.join(tags) == step and all(is_tag(tag) for tag in tags) else [step]
+
+    def findall(self, target):
+        """ Returns the list of raw elements matched by the element steps of this path
+
+        :param target: a :class:`~xmlasdict.Wrapper`, :class:`~xmlasdict.IterWrapper` or raw element to start from
+        """
+        found = list()
+        for matched in self._matches(target):
+            found.extend(matched)
+        return found
+
+    def find(self, target):
+        """ Returns the first raw element matched by the element steps of this path, None if there is none.
+        Unlike :meth:`findall` this stops at the first of the start nodes with a match.
+
+        :param target: a :class:`~xmlasdict.Wrapper`, :class:`~xmlasdict.IterWrapper` or raw element to start from
+        """
+        if not isinstance(target, (Wrapper, IterWrapper)):
+            return self._first(target)
+        for matched in self._matches(target):
+            if len(matched) > 0:
+                return matched[0]
+        return None
+
+    def _first(self, node):
+        """ the first raw element matched from the raw element node, None if there is none
+        """
+        if self.path is None:
+            return node
+        found = self._selector(node)(node)
+        return found[0] if len(found) > 0 else None
+
+    def _matches(self, target):
+        """ generates the list of raw elements matched from each of the start nodes, in turn
+        """
+        doc_index = target._doc_index if isinstance(target, Wrapper) else None
+        for node in CompiledPath._startnodes(target):
+            if self.path is None:
+                yield [node]
+                continue
+            indexed = doc_index.findall(node, self.path) if doc_index is not None else None
+            if indexed is not None:  # a deep search served from the tag index of the document
+                yield indexed
+                continue
+            yield self._selector(node)(node)
+
+    def _selector(self, node):
+        """ the element path compiled for the backend of the node
+        """
+        backend = backend_of(node)
+        select = self._selectors.get(backend)
+        if select is None:
+            select = self._selectors[backend] = backend.compile(self.path)
+        return select
+
+    def __call__(self, target):
+        """ Evaluates this path against the target, returning what the equivalent chain of wrapper accessors would:
+        a :class:`~xmlasdict.Wrapper`, :class:`~xmlasdict.IterWrapper` or str (for attributes and text)
+
+        :param target: a :class:`~xmlasdict.Wrapper`, :class:`~xmlasdict.IterWrapper` or raw element to start from
+        """
+        found = self.findall(target)
+        if self.attribute is None and not self.text:
+            doc_index = target._doc_index if isinstance(target, Wrapper) else None
+            return Wrapper._wrapchildren(found, self.path, self.force_list, doc_index)
+        # else grab the str value(s) from the found elements
+        if len(found) == 0 and not self.force_list:
+            raise AttributeError(f"Current node has no child with tag '{self.path}'")
+        if len(found) == 1 and not self.force_list:
+            return textXML(found[0]) if self.text else Wrapper._getattribute(found[0], self.attribute)
+        if self.text:
+            return [textXML(node) for node in found]
+        return [node.attrib[self.attribute] for node in found if self.attribute in node.attrib]
+
+    @staticmethod
+    def _startnodes(target):
+        """ the list of raw elements to start evaluating from
+        """
+        if isinstance(target, IterWrapper):
+            return [n._node if isinstance(n, Wrapper) else n for n in target._iternodes()]
+        if isinstance(target, Wrapper):
+            return [target._node]
+        return [target]
+
+
+class Selection:
+    """ A set of named access paths (see :class:`~CompiledPath`) that are evaluated together,
+    in one single traversal of the subtree of each node, to project them into a plain dict.
+
+    Paths made up of plain tag-name steps (separated by dots or slashes) are merged into one tree of steps,
+    so that each child element is visited (at most) once for all of them.
+    Other (path-like) steps are evaluated through their own findall.
+
+    :param fields: dict of the names to the paths to evaluate, or a list of paths (also used as names)
+    """
+    def __init__(self, fields):
+        if not isinstance(fields, dict):
+            fields = {path: path for path in fields}
+        self.fields = {
+            name: path if isinstance(path, CompiledPath) else CompiledPath(path) for name, path in fields.items()
+        }
+        self._steps = (list(), dict())  # the tree of plain tag steps: (names of the paths ending here, tag -> subtree)
+        self._others = list()           # the names of the paths evaluated through their own findall
+        for name, path in self.fields.items():
+            if not all(is_tag(step) for step in path.elm_steps):
+                self._others.append(name)
+                continue
+            steps = self._steps
+            for step in path.elm_steps:
+                steps = steps[1].setdefault(step, (list(), dict()))
+            steps[0].append(name)
+
+    def __call__(self, node):
+        """ Returns the dict of the names to the values of their paths in the raw element,
+        as described in :func:`~xmlasdict.select`
+        """
+        found = {name: list() for name in self.fields}
+        todo = [(node, self._steps)]
+        while len(todo) > 0:
+            elm, (names, substeps) = todo.pop()
+            for name in names:
+                found[name].append(elm)
+            if len(substeps) > 0:
+                matched = [(child, substeps[child.tag]) for child in elm if child.tag in substeps]
+                todo.extend(reversed(matched))  # keeps the found elements in document order
+        for name in self._others:
+            found[name] = self.fields[name].findall(node)
+        return {name: Selection._value(self.fields[name], elms) for name, elms in found.items()}
+
+    @staticmethod
+    def _value(path: CompiledPath, elms: list):
+        """ the plain value of the path for the elements it matched
+        """
+        if path.attribute is not None:
+            values = [e.attrib[path.attribute] for e in elms if path.attribute in e.attrib]
+        elif path.text:
+            values = [textXML(e) for e in elms]
+        else:
+            values = [unwrapXML(e) for e in elms]
+        if path.force_list or len(values) > 1:
+            return values
+        return values[0] if len(values) == 1 else None
+
+    @staticmethod
+    def of(fields):
+        """ Returns the (reused) :class:`~Selection` for the fields
+        """
+        if isinstance(fields, Selection):
+            return fields
+        key = tuple(fields.items()) if isinstance(fields, dict) else tuple(fields)
+        selection = _selections.get(key)
+        if selection is None:
+            selection = Selection(fields)
+            _selections.put(key, selection)
+        return selection
+
+
+def compile(*steps: str):
+    """ Parses an access path once into a reusable :class:`~CompiledPath` to evaluate against many documents.
+
+    e.g. ``compile("Element1.E.para.ulink.@url")(wrapper)`` yields the same as ``wrapper.Element1.E.para.ulink['@url']``,
+    and ``compile('.//D_child_source')(wrapper)`` the same as ``wrapper['.//D_child_source']``.
+
+    :param steps: the steps of the path, either as one str of steps separated by dots or as separate str arguments
+    :rtype: CompiledPath
+    """
+    return CompiledPath(*steps)
+
+
+def select(wrapper, fields):
+    """ Returns a plain dict projecting the fields, all evaluated together in one traversal of the wrapped node,
+    e.g. ``select(wrapper, {'name': 'meta/name', 'id': '@id', 'tags': 'tag[]'})``
+
+    The paths are those accepted by :class:`~xmlasdict.CompiledPath`.
+    Their values are plain: str for attributes and text, the :func:`~xmlasdict.Wrapper.unwrap` result for elements,
+    a list of these where the path matches multiple (or ends in ``[]``), and None where it matches nothing.
+
+    For an :class:`~xmlasdict.IterWrapper` it returns the list of these dicts for each of the contained wrappers
+    (with the paths compiled only once for all of them).
+
+    :param wrapper: the :class:`~xmlasdict.Wrapper` (or :class:`~xmlasdict.IterWrapper`) to project
+    :param fields: dict of the names to the paths to evaluate, or a list of paths (also used as names)
+    :rtype: dict (or list of dict)
+    """
+    assert isinstance(wrapper, Wrapper), f"can only select from a Wrapper, not '{type(wrapper)}'"
+    selection = Selection.of(fields)
+    if isinstance(wrapper, IterWrapper):
+        return [selection(node) for node in wrapper._elements()]
+    return selection(wrapper._node)
@@ -0,0 +1,64 @@
+from bisect import bisect_left
+import re
+import logging
+
+
+log = logging.getLogger(__name__)
+DESCENDANT_SEARCH = re.compile(r'\.//((?:\{[^{}*]+\})?[^./*\[\]()@=!:{}\s][^/*\[\]()@=!:{}\s]*)')  # .//tag paths
+
+
+class TagIndex:
+    """ Index of the elements of one parsed (etree or lxml) document by tag-name, that serves the deep searches
+    for a tag-name (i.e. ``wrapper['.//tag']``) from any :class:`~xmlasdict.Wrapper` on that document.
+
+    It is built (once) on the first such search, with one single pass over all elements of the document:
+    per tag-name the list of the numbers of its elements in document order, and per element its number and
+    the number right after its subtree. Finding the elements with a tag-name in any subtree then is a range lookup
+    rather than a scan of the subtree. As such the XML tree is expected to remain unchanged once parsed.
+
+    The index holds on to all elements of the document (which for lxml means to a proxy object for each of them).
+    Set ``use_tag_index = False`` on the index, or on the class (for all documents), to switch it off.
+    Frozen documents have their own tag index, see :class:`~xmlasdict.frozen.FrozenDocument`.
+    """
+    use_tag_index = True
+
+    def __init__(self, root):
+        self.root = root
+        self._elements = None   # all elements, in document order
+        self._numbers = None    # element -> its number in document order
+        self._ends = None       # number of an element -> the number right after its subtree
+        self._tagged = None     # tag-name -> the numbers of the elements with that tag-name, in document order
+
+    def findall(self, node, path: str):
+        """ Returns the list of elements matching the path from the node, as looked up in the index (building it if needed),
+        or None if the index does not apply: if switched off, for paths other than ``.//tag``,
+        or for nodes that are not (or no longer) part of the document.
+        """
+        if not self.use_tag_index:
+            return None
+        descendant = DESCENDANT_SEARCH.fullmatch(path)
+        if descendant is None:
+            return None
+        if self._elements is None:
+            self._build()
+        number = self._numbers.get(node)
+        if number is None:
+            return None
+        found = self._tagged.get(descendant.group(1))
+        if found is None:
+            return []
+        elements = self._elements
+        return [elements[n] for n in found[bisect_left(found, number + 1):bisect_left(found, self._ends[number])]]
+
+    def _build(self):
+        elements = list(self.root.iter())
+        numbers = {elm: n for n, elm in enumerate(elements)}
+        ends = [0] * len(elements)
+        for n in range(len(elements) - 1, -1, -1):  # backwards, so the subtree of the last child is done already
+            elm = elements[n]
+            ends[n] = ends[numbers[elm[-1]]] if len(elm) > 0 else n + 1
+        tagged = dict()
+        for n, elm in enumerate(elements):
+            tagged.setdefault(elm.tag, []).append(n)
+        self._elements, self._numbers, self._ends, self._tagged = elements, numbers, ends, tagged
+        log.debug("built the tag index of %d elements with %d distinct tags", len(elements), len(tagged))
@@ -1,9 +1,13 @@
 from collections.abc import Mapping
 from xml.etree import ElementTree
+from .cache import serialized
+from .compare import element_digest
+from .backend import is_element, findall
 import logging
 
 
 log = logging.getLogger(__name__)
+PATH_CHARS = frozenset('/*[]()@=!:{} \t\r\n')  # characters that are not part of plain tag-names
 
 
 def xmlstr(node):
@@ -12,12 +16,124 @@ def xmlstr(node):
     return ElementTree.tostring(node, encoding="unicode", method="xml")
 
 
+def is_tag(key: str):
+    """ Helper function checking if the key is a plain (optionally {namespace} prefixed) tag-name
+    rather than a path-like expression that needs the ElementTree.node.findall support
+    """
+    if key[0] == '{':
+        ns_end = key.find('}')
+        if ns_end < 2 or '*' in key[:ns_end]:
+            return False
+        key = key[ns_end + 1:]
+    return len(key) > 0 and key[0] != '.' and PATH_CHARS.isdisjoint(key)
+
+
 def innerXML(node):
     """ Helper function dumping the innerXML content of a node
     """
     return str(node.text or '') + ''.join(xmlstr(c) for c in node)
 
 
+def strXML(node):
+    """ Helper function producing the str() representation of a node, i.e. its stripped innerXML content
+    """
+    return innerXML(node).strip()
+
+
+def textXML(node):
+    """ Helper function producing the stripped text content of a node (and its descendants)
+    """
+    if len(node) == 0:
+        return str(node.text or '').strip()
+    return ''.join(node.itertext()).strip()
+
+
+def unwrapXML(node):
+    """ Helper function turning the node into its native py representation (dict or str)
+    Visits every element once, in a single (non-recursive) pass, so wide and deep trees are handled alike.
+    """
+    if len(node) == 0 and len(node.attrib) == 0:
+        return str(node.text or '').strip()
+    # else
+    unwrapped = dict()
+    todo = [(node, unwrapped)]  # elements still to be unwrapped into their (already linked) dict
+    while len(todo) > 0:
+        elm, content = todo.pop()
+        for attr, value in elm.attrib.items():
+            content['@' + attr] = value
+        for child in elm:
+            if len(child) == 0 and len(child.attrib) == 0:
+                value = str(child.text or '').strip()
+            else:
+                value = dict()
+                todo.append((child, value))
+            # unwrapped elements are either dict or str, so a list can only be the collection of repeated tags
+            if child.tag not in content:
+                content[child.tag] = value
+            elif isinstance(content[child.tag], list):
+                content[child.tag].append(value)
+            else:
+                content[child.tag] = [content[child.tag], value]
+    return unwrapped
+
+
+def walkXML(roots: list, prune=None, max_depth: int = None, doc_index=None):
+    """ Helper function walking the (path, node) roots and all their content in document order,
+    yielding (path, depth, Wrapper or attribute value) tuples, with an explicit stack rather than recursion.
+    See :func:`~walk` for the arguments.
+    """
+    todo = [(path, 0, node) for path, node in reversed(roots)]  # the elements still to visit, next one last
+    while len(todo) > 0:
+        path, depth, node = todo.pop()
+        wrapper = Wrapper.build(node, doc_index=doc_index)
+        yield path, depth, wrapper
+        if (max_depth is not None and depth >= max_depth) or (prune is not None and prune(path, depth, wrapper)):
+            continue
+        prefix = '' if path == '.' else path + '/'
+        for attr, value in node.attrib.items():
+            yield f"{prefix}@{attr}", depth + 1, value
+        children = list(node)
+        if len(children) == 0:
+            continue
+        totals = dict()  # tag -> number of children with that tag, to only number the repeated ones
+        for child in children:
+            totals[child.tag] = totals.get(child.tag, 0) + 1
+        counts = dict()
+        nested = list()
+        for child in children:
+            count = counts[child.tag] = counts.get(child.tag, 0) + 1
+            nested.append((prefix + child.tag + (f"[{count}]" if totals[child.tag] > 1 else ''), depth + 1, child))
+        todo.extend(reversed(nested))
+
+
+def walk(wrapper, prune=None, max_depth: int = None):
+    """ Visits the wrapped node and all its content in document order, without recursion (so at any depth),
+    yielding a (path, depth, value) tuple for each element and attribute:
+
+    - the path relative to the wrapped node, much like the keys used in wrapper[key] and the paths of diff():
+      ``'.'`` for the wrapped node itself, ``'a/b[2]'`` for (the second of the) nested elements,
+      and ``'a/@attribute'`` for attributes
+    - the depth, 0 for the wrapped node, 1 for its attributes and child elements, and so on
+    - the value, a :class:`~Wrapper` for elements and the str value for attributes
+
+    The attributes of an element come right after it, and before its child elements.
+    An :class:`IterWrapper` has each of its contained wrappers walked in turn,
+    with their paths prefixed by their position (i.e. ``'[1]'``, ``'[2]/a/@attribute'``, ...)
+
+    :param wrapper: the :class:`~Wrapper` (or :class:`IterWrapper`) to walk
+    :param prune: optional function called with the (path, depth, wrapper) of each element,
+        returning True to skip its content (attributes and nested elements), which then is not even visited
+    :param max_depth: the maximum depth to yield, deeper content is not visited
+    :type max_depth: int
+    :return: generator of (path, depth, value) tuples
+    """
+    assert isinstance(wrapper, Wrapper), f"can only walk a Wrapper, not '{type(wrapper)}'"
+    if isinstance(wrapper, IterWrapper):
+        roots = [(f"[{n + 1}]", node) for n, node in enumerate(wrapper._elements())]
+        return walkXML(roots, prune, max_depth, wrapper._doc_index)
+    return walkXML([('.', wrapper._node)], prune, max_depth, wrapper._doc_index)
+
+
 class Wrapper(Mapping):
     """ The core of the xmlasdict solution is a wrapper around etree nodes that fake some dict like look on their content.
     This is the basic return-type of the function :func:`~xmlasdict.parse`.
@@ -42,16 +158,25 @@ class Wrapper(Mapping):
     Beyond the expected dict[key] access these :class:`Wrapper` objects also allow for path-like accessor-calls.
     e.g. wrapper['.//x'] will not only return the direct children, but (depth-first or xml-document-order) all descendants.
     The allowed syntax for these paths follow the ElementTree.node.findall support.
+
+    Plain tag-name lookups and the set of keys are served from an index that is built (once) on first use,
+    and deep searches (``wrapper['.//tag']``) from the :class:`~xmlasdict.tagindex.TagIndex` of the parsed document,
+    as such the wrapped XML tree is expected to remain unchanged for the lifetime of the wrapper.
     """
 
-    def __init__(self, node: ElementTree.Element):
-        assert isinstance(node, ElementTree.Element), f"Wrapper only works with xml.etree.ElementTree.Element not '{type(node)}'"
+    def __init__(self, node: ElementTree.Element, doc_index=None):
+        assert is_element(node), f"Wrapper only works with elements produced by a known backend, not '{type(node)}'"
         self._node = node
+        self._doc_index = doc_index  # the TagIndex of the document, if any, shared by all wrappers on it
+        self._index = None  # lazily built index of the child elements by tag-name
+        self._keys = None   # lazily built set of keys
 
     def keys(self):
         """ Returns a set of nested items (= attributes (@ prefixed) and nested unique tags).
         """
-        return set() | self._attr_keys() | self._elm_keys()  # the union of attr_keys and elm_keys
+        if self._keys is None:
+            self._keys = frozenset(self._attr_keys() | self._elm_keys())  # the union of attr_keys and elm_keys
+        return self._keys
 
     def _attr_keys(self):
         """ the set of available attribute names presented as __getitem__() keys
@@ -64,28 +189,38 @@ class Wrapper(Mapping):
     def _elm_keys(self):
         """ the set of nested element_tags presented as __getitem__() keys
         """
-        keys = set()
-        for child in self._node:
-            keys.add(child.tag)
-        return keys
+        return set(self._tag_index())
+
+    def _tag_index(self):
+        """ the (cached) index of the child elements by tag-name, each list in document order
+        """
+        if self._index is None:
+            index = dict()
+            for child in self._node:
+                index.setdefault(child.tag, []).append(child)
+            self._index = index
+        return self._index
 
     def __str__(self):
         """ returns the xml content of the current node as a string
         """
-        return innerXML(self._node).strip()
+        if len(self._node) == 0:  # leaf nodes have nothing to serialize
+            return str(self._node.text or '').strip()
+        return serialized(self._node, strXML)
 
     def __bool__(self):
         """ returns true/false based on if the node has any content
         this allows direct usage of empty elements in if statements
         """
-        return bool(str(self))
+        # any nested element will show up in str(self), so only the text of leaf nodes needs checking
+        return len(self._node) > 0 or len(str(self._node.text or '').strip()) > 0
 
     def dumps(self):
         """ Dumps the full xml representation of the current node as a string.
         wrapper.dumps() is distinct to str(wrapper) in that will include the wrapping tag
         (i.e. the outerXML) rather than only the nested content (innerXML).
         """
-        return xmlstr(self._node)
+        return serialized(self._node, xmlstr)
 
     @property
     def tag(self):
@@ -100,24 +235,24 @@ class Wrapper(Mapping):
 
         :param tag: stop unwrapping if the tag-name matches
         """
-        nested_tags = self._elm_keys()  # remeber this is a set of (unique) child elm keys
-        mytag = self._node.tag
+        wrapper = self
+        while not isinstance(wrapper, IterWrapper):  # descend (without recursion) down the chain of single wrappers
+            nested_tags = wrapper._elm_keys()  # remeber this is a set of (unique) child elm keys
+            mytag = wrapper._node.tag
 
-        log.debug(f"unpacking {mytag} to {nested_tags} and stopping at {tag}")
+            log.debug("unpacking %s to %s and stopping at %s", mytag, nested_tags, tag)
 
-        # if there are (or) mixed elements under this node (or) none (or) the tag-name matches the requested param tag
-        if len(nested_tags) > 1 or len(nested_tags) == 0 or tag == mytag:
-            return IterWrapper([self])                      # then unpack ends here
-        # else actually (try) unpack if all nested elements are of the same flavour
-        content = Wrapper._getchildren(self._node, '*')
-        return content.unpack(tag=tag)
+            # if there are (or) mixed elements under this node (or) none (or) the tag-name matches the requested param tag
+            if len(nested_tags) > 1 or len(nested_tags) == 0 or tag == mytag:
+                return IterWrapper([wrapper], doc_index=wrapper._doc_index)  # then unpack ends here
+            # else actually (try) unpack if all nested elements are of the same flavour
+            wrapper = Wrapper._getchildren(wrapper._node, '*', doc_index=wrapper._doc_index)
+        return wrapper.unpack(tag=tag)
 
     def unwrap(self):
         """ Turns the content into a native py representation (dict).
         """
-        # handle both nested element as well as str (attribute) returns
-        def unwrap(value): return value.unwrap() if isinstance(value, Wrapper) else value
-        return {k: unwrap(self[k]) for k in set(self)} if len(set(self)) > 0 else str(self)
+        return unwrapXML(self._node)
 
     def copy(self):
         """ Turns the content into a native py representation (dict for :class:`~Wrapper` and list for :class:`IterWrapper`)
@@ -125,26 +260,29 @@ class Wrapper(Mapping):
         return self.unwrap()
 
     def __getitem__(self, key: str):
-        log.debug(f"accessing [{key}] inside tag {self._node.tag}")
+        log.debug("accessing [%s] inside tag %s", key, self._node.tag)
         assert key is not None and isinstance(key, str) and len(key) > 0, f"Cannot get attribute with invalid key '{key}'"
         force_list = False
         # @ prefix indicates looking up attributes
         if key[0] == '@':
             attr_key = key[1:]
             return Wrapper._getattribute(self._node, attr_key)
+        # the #text key grabs the text content of the node and its descendants, much like the xpath string() function
+        # unlike str(wrapper) this never serializes the nested XML
+        if key == '#text':
+            return textXML(self._node)
         # else
 
         # the [] suffix indicates we want a forced list return
         if key[-2:] == '[]':
             key = key[:-2]  # truncate the key
             force_list = True
-        # TODO maybe consider other special ones like #text to grab the equivalent of xpath text() ??
-        return Wrapper._getchildren(self._node, key, force_list)
+        return self._findchildren(key, force_list)
 
     def __getattr__(self, key: str):
-        log.debug(f"accessing .{key} inside tag {self._node.tag}")
+        log.debug("accessing .%s inside tag %s", key, self._node.tag)
         assert key is not None and len(key) > 0, f"Cannot get children with invalid key '{key}'"
-        return Wrapper._getchildren(self._node, key)
+        return self._findchildren(key)
 
     def __iter__(self):
         return iter(self.keys())
@@ -152,33 +290,68 @@ class Wrapper(Mapping):
     def __len__(self):
         return len(self.keys())
 
+    def __eq__(self, other):
+        """ Wrappers are equal if the elements they wrap have the same content, see :func:`~xmlasdict.digest`
+        (where a :class:`~Wrapper` equals an :class:`IterWrapper` with that one single element),
+        other mappings are compared by their items as usual.
+        """
+        if not isinstance(other, Wrapper):
+            return super().__eq__(other)
+        return self._digests() == other._digests()
+
+    def __hash__(self):
+        return hash(self._digests())
+
+    def _digests(self):
+        return (element_digest(self._node), )
+
+    def _elements(self):
+        """ the list of wrapped elements """
+        return [self._node]
+
     @staticmethod
-    def build(node, force_list: bool = False):
+    def build(node, force_list: bool = False, doc_index=None):
         """ Actually "builds" a :class:`~Wrapper` or :class:`~IterWrapper` by introspecting the passed node
         Normally one avoids using this to build your own wrappers in favour of just using the :func:`~xmlasdict.parse` method.
 
         :param node: can be a :class:`~Wrapper` that doesn't need further wrapping or an ElementTree.node or a list of those
         :param force_list: enforce returning a list of nodes (i.e an :class:`~IterWrapper`)
+        :param doc_index: the :class:`~xmlasdict.tagindex.TagIndex` of the document the node is part of, if any
         """
         assert node is not None, "cannot wrap None"
         if isinstance(node, Wrapper):  # the wrapper is already there!
-            return node if not force_list else IterWrapper([node])
+            return node if not force_list else IterWrapper([node], doc_index=node._doc_index)
         # else
         if isinstance(node, list):
             assert len(node) > 0 or force_list, "cannot wrap empty node lists unless force_list == True"
             if len(node) > 1 or force_list is True:
-                return IterWrapper(node) if len(node) > 0 else []
+                return IterWrapper(node, doc_index=doc_index) if len(node) > 0 else []
             else:
                 node = node[0]  # unpack the single element from the list
         # else - and also if we unpacked that single element !
-        return Wrapper(node)
+        return node if isinstance(node, Wrapper) else Wrapper(node, doc_index)
+
+    def _findchildren(self, key: str, force_list: bool = False):
+        """ finds the children matching the key, plain tag-names are served from the child index,
+        deep searches for a tag-name from the document index (if any), while other path-like keys are passed on to findall
+        """
+        doc_index = self._doc_index
+        if is_tag(key):
+            return Wrapper._wrapchildren(self._tag_index().get(key, []), key, force_list, doc_index)
+        found = doc_index.findall(self._node, key) if doc_index is not None else None
+        if found is not None:
+            return Wrapper._wrapchildren(found, key, force_list, doc_index)
+        return Wrapper._getchildren(self._node, key, force_list, doc_index)
+
+    @staticmethod
+    def _getchildren(node, key: str, force_list: bool = False, doc_index=None):
+        return Wrapper._wrapchildren(findall(node, key), key, force_list, doc_index)
 
     @staticmethod
-    def _getchildren(node, key: str, force_list: bool = False):
-        found_elms = node.findall(key)
+    def _wrapchildren(found_elms: list, key: str, force_list: bool = False, doc_index=None):
         if len(found_elms) == 0 and not force_list:  # enforce-list mode prefers an empty list over an error
             raise AttributeError(f"Current node has no child with tag '{key}'")
-        return Wrapper.build(found_elms, force_list)
+        return Wrapper.build(found_elms, force_list, doc_index)
 
     @staticmethod
     def _getattribute(node, attr_key: str):
@@ -193,29 +366,52 @@ class IterWrapper(Wrapper):
 
     As a list-like beast this representation of the nested XML content is not subscriptable by str
     (name of child-element or ``@attribute``) but instead by int or slice.
+
+    The contained elements are only wrapped on demand (while iterating or indexing),
+    and slicing produces a view on the same list of elements rather than a copy.
     """
-    def __init__(self, node_list):
-        assert len(node_list) > 0, "Do not use IterWrapper for empty lists."
-        self._nodes = node_list  # original nodes
-        self._wrappers = list(map(lambda n: Wrapper.build(n), node_list))  # nodes, ready wrapped
+    def __init__(self, node_list, view: range = None, doc_index=None):
+        self._nodes = node_list  # original nodes, shared with any slice-views on them
+        self._view = view if view is not None else range(len(node_list))
+        self._doc_index = doc_index
+        assert len(self._view) > 0, "Do not use IterWrapper for empty lists."
+
+    def _iternodes(self):
+        return map(self._nodes.__getitem__, self._view)
+
+    def _elements(self):
+        return [n._node if isinstance(n, Wrapper) else n for n in self._iternodes()]
+
+    def _digests(self):
+        return tuple(element_digest(n) for n in self._elements())
 
     def __str__(self):
-        if len(self._nodes) == 1:
-            return str(self._wrappers[0])
+        if len(self._view) == 1:
+            return str(self[0])
         else:
-            return str(list(map(lambda w: str(w), self._wrappers)))
+            return str([str(w) for w in self])
+
+    def __bool__(self):
+        # in line with str(self) a list is only empty if it holds one single empty element
+        return len(self._view) > 1 or bool(self[0])
 
     def __getitem__(self, index):
-        log.debug(f"accessing [{index}] inside list[{len(self._nodes)}]")
+        log.debug("accessing [%s] inside list[%d]", index, len(self._view))
         assert isinstance(index, (int, slice)), "IterWrapper is only subscriptable by int or slice"
-        sublist = self._nodes[index]
-        return Wrapper.build(sublist)
+        if isinstance(index, int):
+            return Wrapper.build(self._nodes[self._view[index]], doc_index=self._doc_index)
+        # else slicing produces a view on the same node_list
+        view = self._view[index]
+        if len(view) > 1:
+            return IterWrapper(self._nodes, view, self._doc_index)
+        return Wrapper.build([self._nodes[i] for i in view], doc_index=self._doc_index)
 
     def __iter__(self):
-        return iter(self._wrappers)
+        doc_index = self._doc_index
+        return (Wrapper.build(node, doc_index=doc_index) for node in self._iternodes())
 
     def __len__(self):
-        return len(self._wrappers)
+        return len(self._view)
 
     def unpack(self, tag: str = None):
         """ Returns self, as by nature the IterWrapper is the level not to be further unpacked.
@@ -225,15 +421,15 @@ class IterWrapper(Wrapper):
     def unwrap(self):
         """ Turns the content into a native py representation (list).
         """
-        return [w.unwrap() for w in self._wrappers]
+        return [w.unwrap() for w in self]
 
     def dumps(self):
         """ Returns the joined outerXML of the various contained wrappers.
         """
-        return ''.join([w.dumps() for w in self._wrappers])
+        return ''.join([w.dumps() for w in self])
 
     @property
     def tag(self):
         """ Returns the list of tags of the contained wrappers.
         """
-        return [n.tag for n in self._wrappers]
+        return [n.tag for n in self._iternodes()]